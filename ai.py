@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Inference backend (Hugging Face Inference API compatible). Point AI_API_URL
+# at stub_inference.py for local development and tests.
+API_URL = os.environ.get('AI_API_URL', 'https://api-inference.huggingface.co/models/gpt2')
+API_TOKEN = os.environ.get('AI_API_TOKEN', '')
+
+CONNECT_TIMEOUT = float(os.environ.get('AI_CONNECT_TIMEOUT', '3.05'))  # seconds
+READ_TIMEOUT = float(os.environ.get('AI_READ_TIMEOUT', '30'))  # seconds between bytes
+STREAM_DEADLINE = float(os.environ.get('AI_STREAM_DEADLINE', '60'))  # seconds for a whole streamed reply
+POOL_SIZE = int(os.environ.get('AI_POOL_SIZE', '16'))
+
+FALLBACK_RESPONSE = 'Sorry, I could not generate a response.'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared keep-alive session so calls reuse pooled connections to the backend"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                if API_TOKEN:
+                    session.headers['Authorization'] = f'Bearer {API_TOKEN}'
+                _session = session
+    return _session
+
+
+def query(payload):
+    response = get_session().post(API_URL, json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    return response.json()
+
+
+def generate_response(prompt):
+    output = query({"inputs": prompt})
+    if isinstance(output, list) and len(output) > 0:
+        return output[0].get('generated_text', FALLBACK_RESPONSE)
+    return FALLBACK_RESPONSE
+
+
+def generate_responses(prompts):
+    """Generate replies for several prompts in one batched backend call"""
+    if len(prompts) == 1:
+        return [generate_response(prompts[0])]
+    output = query({"inputs": list(prompts)})
+    if not isinstance(output, list) or len(output) != len(prompts):
+        return [FALLBACK_RESPONSE] * len(prompts)
+    responses = []
+    for item in output:
+        # Batched text generation returns one list of candidates per input
+        if isinstance(item, list):
+            item = item[0] if item else {}
+        responses.append(item.get('generated_text', FALLBACK_RESPONSE) if isinstance(item, dict) else FALLBACK_RESPONSE)
+    return responses
+
+
+def stream_response(prompt, deadline=None):
+    """Yield chunks of the reply to ``prompt`` as the backend produces them.
+
+    Backends that stream (``text/event-stream`` with ``{"token": {"text": ...}}``
+    events) are relayed token by token; anything else is yielded as a single
+    chunk. Raises TimeoutError once ``deadline`` (a time.monotonic() value) has
+    passed. Closing the generator closes the upstream response, which is how a
+    client disconnect cancels the call.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + STREAM_DEADLINE
+    payload = {"inputs": prompt, "stream": True}
+    with get_session().post(API_URL, json=payload, stream=True,
+                            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        response.raise_for_status()
+        if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+            output = response.json()
+            if isinstance(output, list) and len(output) > 0:
+                yield output[0].get('generated_text', FALLBACK_RESPONSE)
+            else:
+                yield FALLBACK_RESPONSE
+            return
+
+        for line in response.iter_lines():
+            if time.monotonic() > deadline:
+                raise TimeoutError('Inference stream exceeded its deadline')
+            if not line.startswith(b'data:'):
+                continue
+            data = line[5:].strip()
+            if data == b'[DONE]':
+                break
+            event = json.loads(data)
+            token = event.get('token') or {}
+            if token.get('special'):
+                continue
+            if token.get('text'):
+                yield token['text']
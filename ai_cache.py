@@ -0,0 +1,120 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+STOP_WORDS = frozenset("""
+a about am an and any are as at be did do does for from get give has have
+i in is it me my need of on or our please some tell that the there this to
+us we will with you your
+""".split())
+# Kept in cache keys: "how much protein" and "why protein" are different questions
+QUESTION_WORDS = frozenset("""
+can could how much should what whats when which why would
+""".split())
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_prompt(prompt):
+    """Cache key for a prompt: lowercase words without punctuation or stop words.
+
+    "How much water per day?" and "how much WATER per day" share a key.
+    """
+    words = _PUNCTUATION.sub(' ', prompt.lower()).split()
+    meaningful = [word for word in words if word not in STOP_WORDS]
+    return ' '.join(meaningful or words)
+
+
+class ResponseCache:
+    """Bounded LRU of assistant responses with a TTL and an optional SQLite tier.
+
+    The SQLite file (``disk_path``) survives restarts and is shared by all
+    workers; the in-memory LRU in front of it keeps hot prompts off disk.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute('PRAGMA journal_mode=WAL')
+            self._disk.execute(
+                'CREATE TABLE IF NOT EXISTS ai_response (key TEXT PRIMARY KEY, response TEXT, expires_at REAL)'
+            )
+            self._disk.execute('DELETE FROM ai_response WHERE expires_at < ?', (time.time(),))
+
+    def get(self, prompt):
+        key = normalize_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    'SELECT response, expires_at FROM ai_response WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, prompt, response):
+        key = normalize_prompt(prompt)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, response, expires_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    'INSERT OR REPLACE INTO ai_response (key, response, expires_at) VALUES (?, ?, ?)',
+                    (key, response, expires_at),
+                )
+
+    def _store(self, key, response, expires_at):
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_generate(self, prompt, generate, skip=()):
+        """Cached response for ``prompt``, calling ``generate(prompt)`` on a miss.
+
+        Responses listed in ``skip`` (such as a fallback error message) are
+        returned but never stored.
+        """
+        response = self.get(prompt)
+        if response is None:
+            response = generate(prompt)
+            if response not in skip:
+                self.set(prompt, response)
+        return response
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ai_cache import normalize_prompt
+
+
+class InferenceBusy(Exception):
+    """``max_pending`` distinct prompts are already waiting for the backend"""
+
+
+class InferenceDispatcher:
+    """Coalesces and micro-batches prompts bound for the inference backend.
+
+    Concurrent requests for the same (normalized) prompt share one upstream
+    call. Distinct prompts arriving within ``max_wait`` seconds of each other
+    are sent together through ``batch_call(prompts) -> responses``, up to
+    ``max_batch_size`` at a time, with at most ``max_concurrent_batches``
+    batches in flight. Once ``max_pending`` distinct prompts are queued or in
+    flight, new ones are rejected with InferenceBusy rather than queued.
+    """
+
+    def __init__(self, batch_call, max_batch_size=8, max_wait=0.01, max_concurrent_batches=4, max_pending=256):
+        self.batch_call = batch_call
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending = []
+        self._inflight = {}
+        self._executor = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_prompts = 0
+        self.rejected = 0
+
+    def _start(self):
+        # Started lazily so no threads exist before a pre-forking server forks
+        self._executor = ThreadPoolExecutor(self.max_concurrent_batches, thread_name_prefix='inference-batch')
+        threading.Thread(target=self._collect, name='inference-dispatcher', daemon=True).start()
+
+    def submit(self, prompt):
+        """Future resolving to the reply for ``prompt``; raises InferenceBusy when the backlog is full"""
+        key = normalize_prompt(prompt)
+        with self._cond:
+            if self._executor is None:
+                self._start()
+            self.submitted += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                raise InferenceBusy(f'{len(self._inflight)} prompts already waiting for the backend')
+            future = self._inflight[key] = Future()
+            self._pending.append((key, prompt, future, time.monotonic()))
+            self._cond.notify()
+            return future
+
+    def generate(self, prompt, timeout=None):
+        return self.submit(prompt).result(timeout)
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Hold the batch open until it fills or its oldest prompt has waited max_wait
+                flush_at = self._pending[0][3] + self.max_wait
+                while len(self._pending) < self.max_batch_size:
+                    remaining = flush_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+                self.batches += 1
+                self.batched_prompts += len(batch)
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        try:
+            responses = self.batch_call([prompt for _, prompt, _, _ in batch])
+            error = None
+        except Exception as e:
+            responses, error = None, e
+        with self._cond:
+            for key, _, _, _ in batch:
+                self._inflight.pop(key, None)
+        for index, (_, _, future, _) in enumerate(batch):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(responses[index])
+
+    def stats(self):
+        with self._cond:
+            return {
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'batches': self.batches,
+                'average_batch_size': round(self.batched_prompts / self.batches, 2) if self.batches else 0.0,
+                'pending': len(self._pending),
+                'inflight': len(self._inflight),
+                'rejected': self.rejected,
+            }
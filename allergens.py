@@ -0,0 +1,115 @@
+"""A fixed allergen vocabulary and the per-meal bitmasks built from it.
+
+Each allergen is one bit. A meal's ``allergen_mask`` has the bit set when
+its name, description or imported ingredient list mentions one of the
+allergen's keywords (whole words, so "eggplant" is not an egg and
+"buckwheat" is not wheat). A user's free-text allergies map onto the same
+bits, and excluding unsafe meals is a single ``meal_mask & user_mask == 0``
+test per meal. Allergy terms outside the vocabulary (e.g. "strawberry") are
+returned separately and matched as substrings, as before.
+
+Keyword matching errs towards exclusion: "peanut sauce" sets peanuts, and a
+meal that only lists "nuts" sets both nut bits.
+"""
+import re
+from functools import lru_cache
+
+# (name, keywords); the bit is the position in this list, so only append
+ALLERGENS = [
+    ('gluten', ('gluten', 'wheat', 'barley', 'rye', 'spelt', 'bulgur', 'couscous', 'semolina', 'seitan',
+                'bread', 'breadcrumbs', 'flour', 'pasta', 'spaghetti', 'noodles', 'pizza', 'crackers')),
+    ('crustaceans', ('shrimp', 'shrimps', 'prawn', 'prawns', 'crab', 'lobster', 'crayfish', 'langoustine')),
+    ('eggs', ('egg', 'eggs', 'omelet', 'omelette', 'mayonnaise', 'mayo', 'meringue', 'frittata')),
+    ('fish', ('fish', 'salmon', 'tuna', 'cod', 'trout', 'sardine', 'sardines', 'anchovy', 'anchovies',
+              'mackerel', 'tilapia', 'halibut', 'haddock', 'herring')),
+    ('peanuts', ('peanut', 'peanuts', 'groundnut', 'groundnuts', 'nut', 'nuts')),
+    ('soy', ('soy', 'soya', 'soybean', 'soybeans', 'tofu', 'tempeh', 'edamame', 'miso')),
+    ('milk', ('milk', 'cheese', 'yogurt', 'yoghurt', 'butter', 'cream', 'whey', 'casein', 'ghee', 'paneer',
+              'feta', 'mozzarella', 'parmesan', 'ricotta', 'kefir', 'dairy', 'lactose')),
+    ('tree nuts', ('almond', 'almonds', 'cashew', 'cashews', 'walnut', 'walnuts', 'pecan', 'pecans',
+                   'pistachio', 'pistachios', 'hazelnut', 'hazelnuts', 'macadamia', 'nut', 'nuts')),
+    ('celery', ('celery', 'celeriac')),
+    ('mustard', ('mustard',)),
+    ('sesame', ('sesame', 'tahini')),
+    ('sulphites', ('sulphite', 'sulphites', 'sulfite', 'sulfites')),
+    ('lupin', ('lupin', 'lupine')),
+    ('molluscs', ('mussel', 'mussels', 'oyster', 'oysters', 'clam', 'clams', 'scallop', 'scallops',
+                  'squid', 'calamari', 'octopus', 'snail', 'snails')),
+]
+BITS = {name: 1 << position for position, (name, _) in enumerate(ALLERGENS)}
+
+# Words people use for their allergy that aren't ingredient keywords
+ALIASES = {
+    'shellfish': ('crustaceans', 'molluscs'),
+    'seafood': ('fish', 'crustaceans', 'molluscs'),
+    'tree nut': ('tree nuts',),
+    'coeliac': ('gluten',),
+    'celiac': ('gluten',),
+    'sulfites': ('sulphites',),
+}
+
+# "peanut butter", "almond milk", "coconut cream": the first word still counts, the dairy word doesn't
+PLANT_DAIRY = re.compile(r'\b(peanut|almond|cashew|coconut|soy|oat|rice|cocoa|shea|apple)\s+(butter|milk|cream)\b')
+KEYWORD_BITS = {}
+for name, keywords in ALLERGENS:
+    for keyword in keywords:
+        KEYWORD_BITS[keyword] = KEYWORD_BITS.get(keyword, 0) | BITS[name]
+# Every allergen in one pass over the text
+KEYWORDS = re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(KEYWORD_BITS, key=len, reverse=True))) + r')\b')
+
+
+def parse_terms(text):
+    """Split a free-text list such as "peanuts, shellfish; dairy" into lowercase terms"""
+    if not text:
+        return []
+    terms = []
+    for part in text.replace(';', ',').replace('\n', ',').split(','):
+        part = part.strip().lower()
+        if part and part not in ('none', 'n/a', 'no'):
+            terms.append(part)
+    return terms
+
+
+def text_mask(*texts):
+    """Allergen bits mentioned anywhere in ``texts`` (None and lists are fine)"""
+    text = ' '.join(
+        ' '.join(value) if isinstance(value, (list, tuple)) else value
+        for value in texts if value
+    ).lower()
+    text = PLANT_DAIRY.sub(r'\1', text)
+    mask = 0
+    for keyword in set(KEYWORDS.findall(text)):
+        mask |= KEYWORD_BITS[keyword]
+    return mask
+
+
+def mask_of(names):
+    """Bits for allergen names, e.g. from an imported ``allergens`` list; unknown names are ignored"""
+    if isinstance(names, str):
+        names = parse_terms(names)
+    mask = 0
+    for name in names or ():
+        name = name.strip().lower()
+        mask |= BITS.get(name, 0)
+        for alias in ALIASES.get(name, ()):
+            mask |= BITS[alias]
+    return mask
+
+
+def names_of(mask):
+    return [name for name, _ in ALLERGENS if mask & BITS[name]]
+
+
+@lru_cache(maxsize=4096)
+def parse_allergies(text):
+    """``(mask, unmatched terms)`` for a user's free-text allergies"""
+    mask = 0
+    unmatched = []
+    for term in parse_terms(text):
+        # An allergen name or alias is exact ("tree nuts"); otherwise look for keywords ("peanut allergy")
+        bits = mask_of([term]) or text_mask(term)
+        if bits:
+            mask |= bits
+        else:
+            unmatched.append(term)
+    return mask, tuple(unmatched)
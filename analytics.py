@@ -0,0 +1,137 @@
+"""Per-user daily and weekly rollups and community counters, kept up to date as events arrive.
+
+Logging (or deleting) a meal and writing a batch of quiz attempts add to the
+UserRollup rows for that day and its week (weeks start on Monday) in the same
+transaction as the event, and to one randomly chosen shard of each
+CommunityCounter. Charts read a year of daily history as one primary-key
+range scan over at most 366 rows instead of aggregating raw logs.
+"""
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import func
+
+from counters import increment
+from extensions import db
+from models import CommunityCounter, MealLog, QuizAttempt, Recipe, User, UserRollup
+
+NUTRIENT_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+ROLLUP_FIELDS = NUTRIENT_FIELDS + ('meals_logged', 'quiz_attempts', 'quiz_percent_total')
+ROLLUP_KEYS = ('user_id', 'period', 'start')
+PERIODS = {'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+COUNTER_SHARDS = 8
+
+
+def period_start(period, day):
+    return day - timedelta(days=day.weekday()) if period == 'week' else day
+
+
+def add_to_rollups(changes):
+    """Apply ``{(user_id, day): {field: amount}}`` to the day and week rollups"""
+    rows = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    for (user_id, day), values in changes.items():
+        for period in PERIODS:
+            row = rows[(user_id, period, period_start(period, day))]
+            for field, amount in values.items():
+                row[field] += amount
+    increment(UserRollup.__table__, ROLLUP_KEYS, [
+        dict(zip(ROLLUP_KEYS, key), **values) for key, values in rows.items()
+    ])
+
+
+def count(amounts, shard=None):
+    """Add ``{counter name: amount}`` to one shard of each community counter"""
+    shard = random.randrange(COUNTER_SHARDS) if shard is None else shard
+    increment(CommunityCounter.__table__, ('name', 'shard'), [
+        {'name': name, 'shard': shard, 'value': amount} for name, amount in amounts.items() if amount
+    ])
+
+
+def meal_log_changes(log, sign=1):
+    values = {field: sign * getattr(log, field) for field in NUTRIENT_FIELDS}
+    values['meals_logged'] = sign
+    return values
+
+
+def record_meal_log(log, sign=1):
+    """Add a new meal log to the rollups, or take a deleted one (``sign=-1``) out"""
+    add_to_rollups({(log.user_id, log.logged_on): meal_log_changes(log, sign)})
+    count({'meals_logged': sign})
+
+
+def quiz_attempt_changes(attempts):
+    changes = defaultdict(lambda: {'quiz_attempts': 0, 'quiz_percent_total': 0.0})
+    for attempt in attempts:
+        values = changes[(attempt['user_id'], attempt['created_at'].date())]
+        values['quiz_attempts'] += 1
+        values['quiz_percent_total'] += attempt['percent']
+    return changes
+
+
+def record_quiz_attempts(attempts):
+    """Add a batch of QuizAttempt row values to the rollups"""
+    add_to_rollups(quiz_attempt_changes(attempts))
+    count({'quiz_attempts': len(attempts)})
+
+
+def community_totals():
+    return {name: int(total or 0) for name, total in db.session.query(
+        CommunityCounter.name, func.sum(CommunityCounter.value)
+    ).group_by(CommunityCounter.name)}
+
+
+def series(user_id, period, first, last):
+    """Chart-ready labels and one value per ``period`` for every series, first..last inclusive"""
+    step = PERIODS[period]
+    start = period_start(period, first)
+    rows = {row.start: row for row in UserRollup.query.filter(
+        UserRollup.user_id == user_id,
+        UserRollup.period == period,
+        UserRollup.start.between(start, last),
+    )}
+    labels = []
+    values = {field: [] for field in NUTRIENT_FIELDS + ('meals_logged', 'quiz_attempts', 'quiz_average')}
+    while start <= last:
+        row = rows.get(start)
+        labels.append(start.isoformat())
+        for field in NUTRIENT_FIELDS:
+            values[field].append(round(getattr(row, field), 1) if row else 0.0)
+        values['meals_logged'].append(row.meals_logged if row else 0)
+        values['quiz_attempts'].append(row.quiz_attempts if row else 0)
+        values['quiz_average'].append(
+            round(row.quiz_percent_total / row.quiz_attempts, 2) if row and row.quiz_attempts else None
+        )
+        start += step
+    return {'period': period, 'labels': labels, 'series': values}
+
+
+def rebuild(batch_size=5000):
+    """Recompute every rollup and community counter from the raw tables"""
+    db.session.query(UserRollup).delete()
+    db.session.query(CommunityCounter).filter(
+        CommunityCounter.name.in_(('meals_logged', 'quiz_attempts', 'members', 'recipes_shared'))
+    ).delete(synchronize_session=False)
+
+    changes = defaultdict(lambda: defaultdict(int))
+    meals = attempts = 0
+    for log in db.session.query(MealLog).yield_per(batch_size):
+        for field, amount in meal_log_changes(log).items():
+            changes[(log.user_id, log.logged_on)][field] += amount
+        meals += 1
+    rows = db.session.query(QuizAttempt.user_id, QuizAttempt.percent, QuizAttempt.created_at).yield_per(batch_size)
+    for (user_id, day), values in quiz_attempt_changes(row._asdict() for row in rows).items():
+        for field, amount in values.items():
+            changes[(user_id, day)][field] += amount
+        attempts += values['quiz_attempts']
+
+    items = list(changes.items())
+    for offset in range(0, len(items), batch_size):
+        add_to_rollups(dict(items[offset:offset + batch_size]))
+    count({
+        'meals_logged': meals,
+        'quiz_attempts': attempts,
+        'members': db.session.query(User).count(),
+        'recipes_shared': db.session.query(Recipe).filter(Recipe.status == 'published').count(),
+    }, shard=0)
+    db.session.commit()
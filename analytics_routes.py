@@ -0,0 +1,124 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import date, datetime, timedelta
+import analytics
+from database import read_only
+from extensions import db, csrf
+from models import Meal, MealLog
+
+analytics_bp = Blueprint('analytics', __name__)
+
+def parse_day(value, default):
+    """ISO date from a request value; raises ValueError on anything else"""
+    if value in (None, ''):
+        return default
+    return date.fromisoformat(value)
+
+def today():
+    return datetime.utcnow().date()
+
+@analytics_bp.route('/api/meal-logs', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+def log_meal():
+    """Log a catalog meal (``meal_id``) or a free-form one (``name`` and nutrients)"""
+    data = request.get_json() or {}
+    try:
+        logged_on = parse_day(data.get('date'), today())
+        servings = float(data.get('servings', 1))
+        if not 0 < servings <= 20:
+            raise ValueError('servings must be between 0 and 20')
+        if data.get('meal_id') is not None:
+            meal = Meal.query.get(int(data['meal_id']))
+            if meal is None:
+                return jsonify({'error': 'Meal not found'}), 404
+            meal_id, name = meal.id, meal.name
+            nutrients = {'calories': meal.calories, **meal.nutrient_dict()}
+        else:
+            meal_id = None
+            name = str(data.get('name') or '').strip()[:200]
+            if not name or data.get('calories') is None:
+                raise ValueError('meal_id, or name and calories, is required')
+            nutrients = {field: float(data.get(field) or 0) for field in analytics.NUTRIENT_FIELDS}
+        if any(nutrients.get(field, 0) < 0 for field in analytics.NUTRIENT_FIELDS):
+            raise ValueError('Nutrients cannot be negative')
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        log = MealLog(
+            user_id=int(get_jwt_identity()),
+            meal_id=meal_id,
+            name=name,
+            servings=servings,
+            logged_on=logged_on,
+            **{field: float(nutrients.get(field) or 0) * servings for field in analytics.NUTRIENT_FIELDS}
+        )
+        db.session.add(log)
+        analytics.record_meal_log(log)
+        db.session.commit()
+        return jsonify(log.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error logging meal: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@analytics_bp.route('/api/meal-logs', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_meal_logs():
+    """The authenticated user's meal logs for one day (``date``, default today)"""
+    try:
+        day = parse_day(request.args.get('date'), today())
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+
+    try:
+        logs = MealLog.query.filter_by(user_id=int(get_jwt_identity()), logged_on=day).order_by(MealLog.id)
+        return jsonify({'date': day.isoformat(), 'logs': [log.to_dict() for log in logs]})
+    except Exception as e:
+        current_app.logger.error(f"Error fetching meal logs: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@analytics_bp.route('/api/meal-logs/<int:log_id>', methods=['DELETE'])
+@csrf.exempt
+@jwt_required()
+def delete_meal_log(log_id):
+    try:
+        log = MealLog.query.filter_by(id=log_id, user_id=int(get_jwt_identity())).first()
+        if log is None:
+            return jsonify({'error': 'Meal log not found'}), 404
+        analytics.record_meal_log(log, sign=-1)
+        db.session.delete(log)
+        db.session.commit()
+        return jsonify({'message': 'Meal log deleted'})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error deleting meal log: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@analytics_bp.route('/api/analytics', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_analytics():
+    """Daily or weekly nutrition and quiz series for charts, read from the rollups, plus community totals"""
+    period = request.args.get('period', 'day')
+    if period not in analytics.PERIODS:
+        return jsonify({'error': "period must be 'day' or 'week'"}), 400
+    try:
+        last = parse_day(request.args.get('to'), today())
+        first = parse_day(request.args.get('from'), last - timedelta(days=current_app.config['ANALYTICS_DEFAULT_DAYS'] - 1))
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD'}), 400
+    if first > last or (last - first).days >= current_app.config['ANALYTICS_MAX_DAYS']:
+        return jsonify({'error': f"Range must cover 1 to {current_app.config['ANALYTICS_MAX_DAYS']} days"}), 400
+
+    try:
+        payload = analytics.series(int(get_jwt_identity()), period, first, last)
+        payload['community'] = analytics.community_totals()
+        return jsonify(payload)
+    except Exception as e:
+        current_app.logger.error(f"Error fetching analytics: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
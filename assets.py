@@ -0,0 +1,151 @@
+"""Fingerprinted, precompressed frontend assets served from memory.
+
+``AssetManifest.build()`` runs once at startup: it reads the HTML pages,
+css/ and js/, content-hashes each file, rewrites HTML references to
+fingerprinted ``/assets/<name>.<hash>.<ext>`` URLs and keeps gzip (and, when
+the ``brotli`` package is installed, brotli) variants next to the original
+bytes. Serving a request is a dictionary lookup; nothing touches the disk.
+
+Run ``python assets.py`` to print the manifest with compressed sizes.
+"""
+import glob
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; without it only gzip variants are served
+    brotli = None
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Stable URLs (pages, legacy script paths) are revalidated with their ETag
+REVALIDATE = 'public, no-cache'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 256
+# Ties in Accept-Encoding ("gzip, deflate, br") go to the smallest variant
+ENCODING_PREFERENCE = ('br', 'gzip', 'identity')
+
+_REFERENCE = re.compile(r'''(?P<attr>\b(?:href|src)=)(?P<quote>["'])(?P<url>[^"'#?]+)(?P=quote)''')
+
+
+class Asset:
+    def __init__(self, body, content_type, etag, cache_control):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = etag
+        self.variants = {'identity': body}
+
+    def add_variant(self, encoding, body):
+        # Only worth keeping when it actually saves bytes
+        if len(body) < len(self.variants['identity']):
+            self.variants[encoding] = body
+
+
+class AssetManifest:
+    """Maps request paths (``/index.html``, ``/assets/ui.1a2b3c4d.js``) to Assets"""
+
+    def __init__(self, root, patterns=('*.html', 'css/*.css', 'js/*.js', 'js/*.json', 'favicon.ico'),
+                 aliases=None, hash_length=10):
+        self.root = root
+        self.patterns = patterns
+        self.aliases = aliases or {}
+        self.hash_length = hash_length
+        self.assets = {}
+        self.fingerprints = {}
+
+    def build(self):
+        assets, fingerprints = {}, {}
+        files = {}
+        for pattern in self.patterns:
+            for path in sorted(glob.glob(os.path.join(self.root, pattern))):
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    files[name] = f.read()
+
+        # Fingerprint everything except pages first, so pages can link to them
+        for name, body in files.items():
+            if name.endswith('.html'):
+                continue
+            digest = hashlib.sha256(body).hexdigest()[:self.hash_length]
+            stem, ext = os.path.splitext(os.path.basename(name))
+            fingerprinted = f'/assets/{stem}.{digest}{ext}'
+            fingerprints[name] = fingerprinted
+            assets[fingerprinted] = self._asset(name, body, IMMUTABLE)
+            assets['/' + name] = self._asset(name, body, REVALIDATE)
+
+        for name, body in files.items():
+            if name.endswith('.html'):
+                body = self._rewrite(body, fingerprints)
+                assets['/' + name] = self._asset(name, body, REVALIDATE)
+
+        for alias, target in self.aliases.items():
+            if target in assets:
+                assets[alias] = assets[target]
+
+        self.assets = assets
+        self.fingerprints = fingerprints
+        return self
+
+    def _asset(self, name, body, cache_control):
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        etag = hashlib.sha256(body).hexdigest()[:16]
+        asset = Asset(body, content_type, etag, cache_control)
+        if len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            asset.add_variant('gzip', gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                asset.add_variant('br', brotli.compress(body, quality=11))
+        return asset
+
+    def _rewrite(self, body, fingerprints):
+        def replace(match):
+            url = match.group('url')
+            target = fingerprints.get(os.path.normpath(url.lstrip('/')).replace(os.sep, '/'))
+            if target is None:
+                return match.group(0)
+            return f"{match.group('attr')}{match.group('quote')}{target}{match.group('quote')}"
+
+        return _REFERENCE.sub(replace, body.decode('utf-8')).encode('utf-8')
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def response(self, path):
+        """Response for ``path`` negotiated against the request, or None if unknown"""
+        asset = self.assets.get(path)
+        if asset is None:
+            return None
+        encoding = request.accept_encodings.best_match(
+            [encoding for encoding in ENCODING_PREFERENCE if encoding in asset.variants], default='identity')
+        body = asset.variants[encoding]
+        response = Response(body, content_type=asset.content_type)
+        response.headers['Cache-Control'] = asset.cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation and needs its own strong ETag
+        response.set_etag(asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}')
+        return response.make_conditional(request)
+
+    def stats(self):
+        return {
+            'assets': len(self.assets),
+            'identity_bytes': sum(len(a.variants['identity']) for a in self.assets.values()),
+            'gzip_bytes': sum(len(a.variants.get('gzip', a.variants['identity'])) for a in self.assets.values()),
+            'brotli': brotli is not None,
+        }
+
+
+if __name__ == '__main__':
+    manifest = AssetManifest(os.path.dirname(os.path.abspath(__file__))).build()
+    for path, asset in sorted(manifest.assets.items()):
+        sizes = ', '.join(f'{encoding} {len(body)}' for encoding, body in asset.variants.items())
+        print(f'{path}: {sizes}')
@@ -0,0 +1,87 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
+from database import read_only
+from extensions import csrf, lazy
+from models import Quiz, QuizScore, QuizStats
+
+attempt_bp = Blueprint('attempts', __name__)
+
+def get_attempt_recorder():
+    def create(app):
+        from quiz_attempts import AttemptRecorder
+        return AttemptRecorder(
+            app,
+            pass_percent=app.config['QUIZ_PASS_PERCENT'],
+            max_queue=app.config['QUIZ_ATTEMPT_QUEUE_SIZE'],
+            batch_size=app.config['QUIZ_ATTEMPT_BATCH_SIZE'],
+            flush_interval=app.config['QUIZ_ATTEMPT_FLUSH_INTERVAL']
+        )
+    return lazy('quiz_attempts', create)
+
+def get_answer_keys():
+    def create(app):
+        from quiz_attempts import AnswerKeys
+        return AnswerKeys(app.extensions['quiz_version'])
+    return lazy('answer_keys', create)
+
+def load_questions(quiz_id):
+    quiz = Quiz.query.with_entities(Quiz.questions).filter_by(id=quiz_id).first()
+    return json.loads(quiz.questions) if quiz else None
+
+@attempt_bp.route('/api/quizzes/<int:quiz_id>/attempts', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+def submit_attempt(quiz_id):
+    """Grade a quiz submission server-side and record the attempt"""
+    from quiz_attempts import grade
+
+    try:
+        answer_key = get_answer_keys().get(quiz_id, load_questions)
+        if answer_key is None:
+            return jsonify({'error': 'Quiz not found'}), 404
+
+        data = request.get_json() or {}
+        try:
+            results = grade(answer_key, data.get('answers'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        summary = get_attempt_recorder().record(int(get_jwt_identity()), quiz_id, data['answers'], results)
+        summary['results'] = [
+            {'correct': correct, 'answerIndex': expected} for correct, expected in zip(results, answer_key)
+        ]
+        return jsonify(summary), 201
+    except Exception as e:
+        current_app.logger.error(f"Error recording quiz attempt: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@attempt_bp.route('/api/quizzes/scores', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_quiz_scores():
+    """Best, average, attempt count and streaks per quiz for the authenticated user"""
+    try:
+        scores = QuizScore.query.filter_by(user_id=int(get_jwt_identity())).order_by(QuizScore.quiz_id)
+        return jsonify({'scores': [score.to_dict() for score in scores]})
+    except Exception as e:
+        current_app.logger.error(f"Error fetching quiz scores: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@attempt_bp.route('/api/quizzes/<int:quiz_id>/stats', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_quiz_stats(quiz_id):
+    """Attempt, participant and pass-rate totals for one quiz"""
+    try:
+        stats = QuizStats.query.get(quiz_id)
+        if stats is None:
+            if Quiz.query.get(quiz_id) is None:
+                return jsonify({'error': 'Quiz not found'}), 404
+            stats = QuizStats(quiz_id=quiz_id, attempts=0, participants=0, passed=0, best_percent=0.0, total_percent=0.0)
+        return jsonify(stats.to_dict())
+    except Exception as e:
+        current_app.logger.error(f"Error fetching quiz stats: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
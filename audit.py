@@ -0,0 +1,178 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process writes the log, so no lock is needed
+    fcntl = None
+
+
+class AuditPipeline:
+    """Non-blocking audit trail written as JSON lines by a background thread.
+
+    ``event()`` only enqueues a record. The writer drains the queue in batches
+    (up to ``batch_size`` records, at least every ``flush_interval`` seconds)
+    and rotates the file once it would exceed ``max_bytes`` or a new
+    ``rotate_interval``-second period (a UTC day by default) begins, keeping
+    ``backup_count`` old files.
+
+    Every worker process has its own pipeline appending to the same file. Each
+    batch is written under an exclusive lock on ``<path>.lock``, after
+    reopening the file if another process has rotated it, so a rotation
+    happens once and no record lands in a renamed file. Size and period are
+    read from the file itself for the same reason.
+
+    When the queue is full new records are dropped. With ``overflow='sample'``
+    the pipeline starts keeping only one in ``sample_every`` records once the
+    queue is three-quarters full, so a flood degrades gradually instead of
+    going silent.
+    """
+
+    def __init__(self, path, max_queue=10000, batch_size=256, flush_interval=0.5,
+                 max_bytes=10 * 1024 * 1024, backup_count=5, rotate_interval=24 * 3600,
+                 overflow='drop', sample_every=10):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.overflow = overflow
+        self.sample_every = sample_every
+        self._queue = queue.Queue(max_queue)
+        self._high_water = max_queue * 3 // 4
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file = None
+        self._lock_file = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self._seen_over_high_water = 0
+
+    def event(self, action, **fields):
+        """Record an audit event without blocking the caller"""
+        if self._thread is None:
+            self._start()
+        if self.overflow == 'sample' and self._queue.qsize() >= self._high_water:
+            self._seen_over_high_water += 1
+            if self._seen_over_high_water % self.sample_every:
+                self.dropped += 1
+                return
+        record = {'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime()), 'event': action}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        # Started lazily so the thread is created in the worker, not a pre-fork parent
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if None in batch:
+                batch = [record for record in batch if record is not None]
+                stopping = True
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        data = ''.join(json.dumps(record, default=str) + '\n' for record in batch).encode('utf-8')
+        try:
+            self._acquire()
+            try:
+                self._reopen_if_rotated()
+                stat = os.fstat(self._file.fileno())
+                # A non-empty file belongs to the period of its last write, by whichever process
+                period = int(time.time() // self.rotate_interval)
+                if stat.st_size and (stat.st_size + len(data) > self.max_bytes
+                                     or int(stat.st_mtime // self.rotate_interval) != period):
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+            finally:
+                self._release()
+            self.written += len(batch)
+        except OSError:
+            self.dropped += len(batch)
+
+    def _acquire(self):
+        if fcntl is None:
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.path + '.lock', 'ab')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+
+    def _release(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        """Open the file, or reopen it when another process has renamed it away; call with the lock held"""
+        if self._file is not None:
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(self._file.fileno()).st_ino:
+                return
+            self._file.close()
+        self._file = open(self.path, 'ab')
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            if os.path.exists(self.path):
+                os.replace(self.path, f"{self.path}.1")
+        else:
+            open(self.path, 'wb').close()
+        self._file = open(self.path, 'ab')
+
+    def shutdown(self, timeout=5.0):
+        """Flush queued records and stop the writer"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+        }
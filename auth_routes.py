@@ -0,0 +1,144 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+import re
+from analytics import count as count_community
+from extensions import db, csrf, limiter, get_audit, get_serializer
+from models import EmailOutbox, User
+from password_hashing import HasherBusy
+from profile_routes import get_profile_cache, profile_token
+from user_context import UserProfile
+
+auth_bp = Blueprint('auth', __name__)
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+@auth_bp.app_errorhandler(HasherBusy)
+def hasher_busy(e):
+    # Shed load quickly instead of queueing behind a login storm
+    get_audit().event('request_shed', reason='hashing_pool_saturated', path=request.path, ip=request.remote_addr)
+    response = jsonify({'error': 'Server is busy, please try again'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def is_password_strong(password):
+    # Password strength: min 8 chars, at least 1 uppercase, 1 lowercase, 1 digit, 1 special char
+    if len(password) < 8:
+        return False
+    if not re.search(r'[A-Z]', password):
+        return False
+    if not re.search(r'[a-z]', password):
+        return False
+    if not re.search(r'\d', password):
+        return False
+    if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+        return False
+    return True
+
+@auth_bp.route('/api/register', methods=['POST'])
+@csrf.exempt
+@limiter.limit("5 per minute")
+def register():
+    data = request.get_json()
+    username = data.get('username')
+    email = data.get('email')
+    password = data.get('password')
+
+    if User.query.filter_by(email=email).first():
+        get_audit().event('register_failed', reason='email_registered', email=email, ip=request.remote_addr)
+        return jsonify({'error': 'Email already registered'}), 400
+
+    if not is_password_strong(password):
+        get_audit().event('register_failed', reason='weak_password', email=email, ip=request.remote_addr)
+        return jsonify({'error': 'Password does not meet strength requirements'}), 400
+
+    user = User(username=username, email=email)
+    user.set_password(password)
+    db.session.add(user)
+    count_community({'members': 1})
+    db.session.commit()
+
+    get_audit().event('register_succeeded', email=email, ip=request.remote_addr)
+    return jsonify({'message': 'User registered successfully'}), 201
+
+@auth_bp.route('/api/login', methods=['POST'])
+@csrf.exempt
+@limiter.limit("10 per minute")
+def login():
+    data = request.get_json()
+    email = data.get('email')
+    password = data.get('password')
+
+    # Input validation and sanitization
+    if not email or not password:
+        get_audit().event('login_failed', reason='missing_credentials', ip=request.remote_addr)
+        return jsonify({'error': 'Email and password are required'}), 400
+
+    # Sanitize email
+    email = email.strip().lower()
+    if not EMAIL_PATTERN.match(email):
+        get_audit().event('login_failed', reason='invalid_email_format', email=email, ip=request.remote_addr)
+        return jsonify({'error': 'Invalid email format'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if user and user.check_password(password):
+        if user.rehash_password_if_needed(password):
+            db.session.commit()
+
+        # Create JWT token carrying the profile claims, and warm this process's profile cache
+        access_token = profile_token(get_profile_cache().put(UserProfile.from_user(user)))
+        get_audit().event('login_succeeded', email=email, ip=request.remote_addr)
+        return jsonify({
+            'message': 'Login successful',
+            'access_token': access_token,
+            'user': {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email
+            }
+        }), 200
+    get_audit().event('login_failed', reason='invalid_credentials', email=email, ip=request.remote_addr)
+    return jsonify({'error': 'Invalid credentials'}), 401
+
+@auth_bp.route('/api/request-password-reset', methods=['POST'])
+@csrf.exempt
+@limiter.limit("5 per minute")
+def request_password_reset():
+    data = request.get_json() or {}
+    email = (data.get('email') or '').strip().lower()
+
+    # Queued without looking the account up, so the response time doesn't tell whether it
+    # exists; email_worker.py renders the link and skips addresses with no account
+    if len(email) <= 120 and EMAIL_PATTERN.match(email):
+        db.session.add(EmailOutbox(kind='password_reset', recipient=email))
+        db.session.commit()
+
+    return jsonify({'message': 'If the email exists, a reset link has been sent'}), 200
+
+@auth_bp.route('/api/reset-password', methods=['POST'])
+@csrf.exempt
+def reset_password():
+    data = request.get_json()
+    token = data.get('token')
+    new_password = data.get('new_password')
+
+    try:
+        email = get_serializer().loads(token, salt='password-reset-salt', max_age=3600)  # 1 hour
+    except:
+        return jsonify({'error': 'Invalid or expired token'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    user.set_password(new_password)
+    db.session.commit()
+
+    return jsonify({'message': 'Password reset successfully'}), 200
+
+# Logout route (client-side token removal)
+@auth_bp.route('/api/logout', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+def logout():
+    """Logout endpoint - client should remove token"""
+    return jsonify({'message': 'Logged out successfully'})
@@ -0,0 +1,70 @@
+"""Benchmark the assistant response cache against a stub inference backend.
+
+The stub adds a fixed delay to stand in for remote inference. Prompts are
+drawn from a small pool of paraphrases, like real traffic.
+
+Run from the project root:
+    python -m benchmarks.bench_ai_cache --requests 500 --delay 0.1
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from stub_inference import start_stub_server
+
+PROMPTS = [
+    'How much water per day?',
+    'how much WATER should I drink per day',
+    'What is vitamin D good for?',
+    'what is vitamin d good for',
+    'Is brown rice a good source of fiber?',
+    'Which foods are high in calcium?',
+    'which foods are HIGH in calcium??',
+    'How many servings of vegetables should I eat daily?',
+]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=0.1, help='simulated inference latency in seconds')
+    args = parser.parse_args()
+
+    server = start_stub_server(delay=args.delay)
+    os.environ['AI_API_URL'] = server.url
+    import ai
+    from ai_cache import ResponseCache
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ResponseCache(max_entries=256, ttl=3600, disk_path=os.path.join(workdir, 'ai_cache.db'))
+        hit_times, miss_times = [], []
+        for _ in range(args.requests):
+            prompt = rng.choice(PROMPTS)
+            misses = cache.misses
+            started = time.perf_counter()
+            cache.get_or_generate(prompt, ai.generate_response)
+            elapsed = (time.perf_counter() - started) * 1000
+            (miss_times if cache.misses > misses else hit_times).append(elapsed)
+
+        print(f"upstream calls: {server.request_count} for {args.requests} prompts  stats: {cache.stats()}")
+        print(f"miss: p50 {percentile(miss_times, 50):.2f} ms  p99 {percentile(miss_times, 99):.2f} ms")
+        print(f"hit:  p50 {percentile(hit_times, 50) * 1000:.1f} us  p99 {percentile(hit_times, 99) * 1000:.1f} us")
+
+        # A fresh process-level cache still answers from the on-disk tier
+        restarted = ResponseCache(max_entries=256, ttl=3600, disk_path=os.path.join(workdir, 'ai_cache.db'))
+        started = time.perf_counter()
+        restarted.get_or_generate(PROMPTS[0], ai.generate_response)
+        print(f"after restart: {(time.perf_counter() - started) * 1000:.2f} ms, stats: {restarted.stats()}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
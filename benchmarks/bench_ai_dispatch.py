@@ -0,0 +1,68 @@
+"""Load test for the inference dispatcher against a stub backend.
+
+Fires bursts of concurrent prompts (with repeats) either straight at the
+backend, one HTTP call each, or through InferenceDispatcher, then compares
+upstream call counts and latency.
+
+Run from the project root:
+    python -m benchmarks.bench_ai_dispatch --clients 32 --requests 400
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_inference import start_stub_server
+
+PROMPTS = [f'What should I eat for {meal} on day {day}?' for meal in ('breakfast', 'lunch', 'dinner') for day in range(8)]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(label, generate, server, prompts, clients):
+    def timed(prompt):
+        started = time.perf_counter()
+        generate(prompt)
+        return (time.perf_counter() - started) * 1000
+
+    calls = server.request_count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        timings = list(pool.map(timed, prompts))
+    elapsed = time.perf_counter() - started
+    print(f"{label:10} upstream calls {server.request_count - calls:4d}  "
+          f"p50 {percentile(timings, 50):7.1f} ms  p99 {percentile(timings, 99):7.1f} ms  "
+          f"{len(prompts) / elapsed:7.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--delay', type=float, default=0.1, help='simulated inference latency in seconds')
+    parser.add_argument('--max-batch-size', type=int, default=8)
+    parser.add_argument('--max-wait', type=float, default=0.01)
+    args = parser.parse_args()
+
+    server = start_stub_server(delay=args.delay)
+    os.environ['AI_API_URL'] = server.url
+    os.environ.setdefault('AI_POOL_SIZE', str(args.clients))
+    import ai
+    from ai_dispatch import InferenceDispatcher
+
+    rng = random.Random(3)
+    prompts = [rng.choice(PROMPTS) for _ in range(args.requests)]
+    run('direct', ai.generate_response, server, prompts, args.clients)
+
+    dispatcher = InferenceDispatcher(ai.generate_responses, args.max_batch_size, args.max_wait)
+    run('dispatcher', dispatcher.generate, server, prompts, args.clients)
+    print('dispatcher stats:', dispatcher.stats(), 'upstream batch sizes seen:', sorted(set(server.batch_sizes)))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
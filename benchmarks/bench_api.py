@@ -0,0 +1,293 @@
+"""End-to-end API benchmark: latency, throughput and queries per request.
+
+Boots the app in-process against a fresh SQLite database filled with a
+synthetic dataset, points the chatbot at the local stub inference backend
+and drives each endpoint from ``--concurrency`` threads. Results can be
+saved as JSON and compared with an earlier run to catch regressions.
+
+Run from the project root:
+    python -m benchmarks.bench_api --meals 20000 --requests 500 --concurrency 8 --output baseline.json
+    python -m benchmarks.bench_api --meals 20000 --requests 500 --concurrency 8 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+PASSWORD = 'Bench-Passw0rd!'
+CATEGORIES = ('high-protein', 'vegetarian', 'vegan', 'low-carb', 'balanced')
+PREFERENCES = ('', 'vegetarian', 'high-protein', 'vegan', 'low-carb')
+PROMPTS_LOCAL = (
+    'Which vitamin is primarily obtained from sunlight?',
+    'How much water should an adult drink daily?',
+    'Which food group is the best source of calcium?',
+)
+WORDS = ('iron', 'sleep', 'snacks', 'breakfast', 'recovery', 'sugar', 'budget', 'travel', 'fasting', 'salt')
+
+
+class QueryCounter:
+    """Counts SQL statements executed by the current thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def listen(self, engine):
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args, **kwargs):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    def value(self):
+        return getattr(self._local, 'count', 0)
+
+
+def build_dataset(app, users, quizzes, meals, rng):
+    from catalog_import import import_catalog
+    from extensions import db, hasher
+    from models import User
+
+    with app.app_context():
+        db.create_all()
+        password_hash = hasher.hash(PASSWORD)  # hashed once; bcrypt would dominate setup otherwise
+        db.session.execute(User.__table__.insert(), [{
+            'username': f'user{i}',
+            'email': f'user{i}@example.com',
+            'password_hash': password_hash,
+            'age': rng.randint(18, 70),
+            'weight': rng.randint(50, 110),
+            'dietary_goals': rng.choice(('weight loss', 'muscle gain', 'maintenance')),
+            'allergies': rng.choice(('', '', 'nuts', 'dairy')),
+        } for i in range(users)])
+        db.session.commit()
+        import_catalog('quizzes', ({
+            'external_id': f'quiz-{i}',
+            'title': f'Quiz {i}',
+            'description': 'Synthetic quiz',
+            'questions': [{
+                'question': f'Question {i}.{j} about {rng.choice(WORDS)}?',
+                'options': ['A', 'B', 'C', 'D'],
+                'answerIndex': rng.randrange(4),
+            } for j in range(10)],
+        } for i in range(quizzes)), report=lambda message: None)
+        import_catalog('meals', ({
+            'external_id': f'meal-{i}',
+            'name': f'Meal {i}',
+            'calories': rng.randint(150, 900),
+            'category': rng.choice(CATEGORIES),
+            'description': f'Synthetic meal with {rng.choice(WORDS)}',
+            'protein': round(rng.uniform(0, 60), 1),
+            'carbs': round(rng.uniform(0, 90), 1),
+            'fat': round(rng.uniform(0, 40), 1),
+            'fiber': round(rng.uniform(0, 15), 1),
+        } for i in range(meals)), report=lambda message: None)
+
+
+def scenarios(tokens, quizzes):
+    """name -> function(rng) returning (method, path, json body, token index)"""
+    today = datetime.utcnow().date()
+
+    def auth(rng):
+        return rng.randrange(len(tokens))
+
+    def login(rng):
+        user = rng.randrange(len(tokens))
+        return 'POST', '/api/login', {'email': f'user{user}@example.com', 'password': PASSWORD}, None
+
+    def chatbot(rng):
+        # Mix of locally answerable questions, repeated prompts and novel ones
+        roll = rng.random()
+        if roll < 0.4:
+            prompt = rng.choice(PROMPTS_LOCAL)
+        elif roll < 0.7:
+            prompt = f'Tips about {rng.choice(WORDS)}'
+        else:
+            prompt = f'Tips about {rng.choice(WORDS)} and {rng.choice(WORDS)} {rng.randrange(10 ** 6)}'
+        return 'POST', '/api/chatbot', {'prompt': prompt}, auth(rng)
+
+    return {
+        'login': login,
+        'quizzes': lambda rng: ('GET', '/api/quizzes', None, auth(rng)),
+        'quiz_questions': lambda rng: ('GET', f'/api/quizzes/{rng.randint(1, quizzes)}/questions', None, auth(rng)),
+        'meals': lambda rng: ('GET', f'/api/meals?limit=10&preferences={rng.choice(PREFERENCES)}', None, auth(rng)),
+        'profile_get': lambda rng: ('GET', '/api/profile', None, auth(rng)),
+        'profile_put': lambda rng: ('PUT', '/api/profile', {'weight': rng.randint(50, 110)}, auth(rng)),
+        'chatbot': chatbot,
+        'meal_log': lambda rng: ('POST', '/api/meal-logs', {
+            'meal_id': rng.randint(1, 100), 'date': (today - timedelta(days=rng.randrange(365))).isoformat()
+        }, auth(rng)),
+        'search': lambda rng: ('GET', f'/api/search?q={rng.choice(WORDS)[:rng.randint(3, 6)]}', None, auth(rng)),
+        'analytics_year': lambda rng: ('GET', f'/api/analytics?from={(today - timedelta(days=364)).isoformat()}',
+                                       None, auth(rng)),
+    }
+
+
+def run_scenario(app, counter, tokens, make_request, requests, concurrency, seed):
+    local = threading.local()
+
+    def one(index):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            local.rng = random.Random(seed * 1000 + threading.get_ident() % 1000)
+        method, path, body, token = make_request(local.rng)
+        headers = {'Authorization': f'Bearer {tokens[token]}'} if token is not None else {}
+        counter.reset()
+        started = time.perf_counter()
+        response = local.client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        return elapsed, counter.value(), response.status_code
+
+    for index in range(min(20, requests)):  # warm caches, pools and lazily built services
+        one(index)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _, _ in results)
+
+    def percentile(pct):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000, 3)
+
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, _, status in results if status >= 400),
+        'throughput_rps': round(requests / wall, 1),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'queries_per_request': round(statistics.mean(queries for _, queries, _ in results), 2),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print regressions against an earlier run; returns True if any were found"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['scenarios']
+    regressed = False
+    print(f"\ncompared with {baseline_path} (threshold {threshold:.0%}):")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        checks = (
+            ('p95_ms', current['p95_ms'] > before['p95_ms'] * (1 + threshold)),
+            ('throughput_rps', current['throughput_rps'] < before['throughput_rps'] * (1 - threshold)),
+            ('queries_per_request', current['queries_per_request'] > before['queries_per_request']),
+        )
+        for metric, worse in checks:
+            marker = 'REGRESSION' if worse else 'ok'
+            print(f"  {name:15} {metric:20} {before[metric]:>10} -> {current[metric]:>10}  {marker}")
+            regressed = regressed or worse
+    return regressed
+
+
+def git_revision(root):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--quizzes', type=int, default=50)
+    parser.add_argument('--meals', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=500, help='per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', help='comma-separated subset, e.g. meals,chatbot')
+    parser.add_argument('--bcrypt-rounds', type=int, default=10)
+    parser.add_argument('--inference-delay', type=float, default=0.05, help='stub backend latency in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='earlier results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed relative p95/throughput change')
+    args = parser.parse_args()
+    # The placeholder JWT secret in config.py is short; don't repeat the warning per request
+    warnings.filterwarnings('ignore', message='The HMAC key')
+
+    from stub_inference import start_stub_server
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    rng = random.Random(args.seed)
+    stub = start_stub_server(delay=args.inference_delay, token_delay=0.0)
+    os.environ['AI_API_URL'] = stub.url  # read when the AI client is first imported
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from app import create_app
+        from extensions import db, limiter
+
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+            'RATELIMIT_ENABLED': False,
+            'BCRYPT_LOG_ROUNDS': args.bcrypt_rounds,
+            'AUDIT_LOG_PATH': os.path.join(workdir, 'audit.log'),
+        }, instance_path=workdir)
+        limiter.enabled = False
+
+        started = time.perf_counter()
+        build_dataset(app, args.users, args.quizzes, args.meals, rng)
+        print(f"dataset: {args.users} users, {args.quizzes} quizzes, {args.meals} meals "
+              f"in {time.perf_counter() - started:.1f}s")
+        from search_routes import get_search_service
+        with app.app_context():
+            # Built in the background in production; the scenarios should measure a ready index
+            get_search_service().ready(timeout=300)
+
+        counter = QueryCounter()
+        with app.app_context():
+            for engine in db.engines.values():
+                counter.listen(engine)
+
+        client = app.test_client()
+        tokens = []
+        for i in range(min(args.users, 50)):
+            response = client.post('/api/login', json={'email': f'user{i}@example.com', 'password': PASSWORD})
+            tokens.append(response.get_json()['access_token'])
+
+        available = scenarios(tokens, args.quizzes)
+        selected = args.scenarios.split(',') if args.scenarios else list(available)
+        results = {}
+        print(f"{'scenario':15} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}")
+        for name in selected:
+            stats = run_scenario(app, counter, tokens, available[name], args.requests, args.concurrency, args.seed)
+            results[name] = stats
+            print(f"{name:15} {stats['throughput_rps']:8.1f} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} "
+                  f"{stats['p99_ms']:8.2f} {stats['queries_per_request']:8.2f} {stats['errors']:7d}")
+    stub.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'revision': git_revision(root),
+                    'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                    'python': platform.python_version(),
+                    'cpus': os.cpu_count(),
+                    'args': vars(args),
+                },
+                'scenarios': results,
+            }, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
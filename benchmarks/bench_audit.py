@@ -0,0 +1,66 @@
+"""Per-event cost of audit logging on the request path.
+
+"sync" is the old logging.FileHandler setup (format and write inside the
+request); "pipeline" is AuditPipeline.event(), which only enqueues.
+
+Run from the project root:
+    python -m benchmarks.bench_audit --events 20000 --threads 8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from audit import AuditPipeline
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(label, emit, events, threads):
+    def worker(count):
+        timings = []
+        for i in range(count):
+            started = time.perf_counter()
+            emit(i)
+            timings.append((time.perf_counter() - started) * 1e6)
+        return timings
+
+    with ThreadPoolExecutor(threads) as pool:
+        timings = [t for chunk in pool.map(worker, [events // threads] * threads) for t in chunk]
+    print(f"{label:8} p50 {percentile(timings, 50):7.1f} us  p99 {percentile(timings, 99):7.1f} us  "
+          f"max {max(timings):9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        logger = logging.getLogger('bench-audit')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.FileHandler(os.path.join(workdir, 'sync.log'))
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        logger.addHandler(handler)
+        run('sync', lambda i: logger.info(f"Login successful for user: user{i}@example.com from IP: 127.0.0.1"),
+            args.events, args.threads)
+        handler.close()
+
+        pipeline = AuditPipeline(os.path.join(workdir, 'audit.log'), max_bytes=512 * 1024)
+        run('pipeline', lambda i: pipeline.event('login_succeeded', email=f'user{i}@example.com', ip='127.0.0.1'),
+            args.events, args.threads)
+        started = time.perf_counter()
+        pipeline.shutdown()
+        rotated = sorted(name for name in os.listdir(workdir) if name.startswith('audit.log'))
+        print(f"shutdown flush {(time.perf_counter() - started) * 1000:.1f} ms  stats {pipeline.stats()}  files {rotated}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Throughput and memory of streaming catalog imports into SQLite.
+
+Writes a synthetic JSON-lines meal file, imports it into a fresh database,
+then imports it again to measure the all-updates (idempotent) path.
+
+Run from the project root:
+    python -m benchmarks.bench_catalog_import --meals 1000000 --batch-size 5000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+CATEGORIES = ('high-protein', 'vegetarian', 'vegan', 'low-carb', 'balanced')
+
+
+def write_meals(path, count, seed=7):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({
+                'external_id': f'food-{i}',
+                'name': f'Meal {i}',
+                'calories': rng.randint(100, 900),
+                'category': rng.choice(CATEGORIES),
+                'description': 'Synthetic catalog entry',
+                'nutrients': {
+                    'protein': round(rng.uniform(0, 60), 1),
+                    'carbs': round(rng.uniform(0, 90), 1),
+                    'fat': round(rng.uniform(0, 40), 1),
+                    'fiber': round(rng.uniform(0, 15), 1),
+                },
+            }) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meals', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    from app import create_app
+    from catalog_import import import_catalog, read_rows
+    from extensions import db
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, 'meals.jsonl')
+        started = time.perf_counter()
+        write_meals(data_path, args.meals)
+        print(f"wrote {args.meals:,} rows ({os.path.getsize(data_path) / 1e6:.0f} MB) in {time.perf_counter() - started:.1f}s")
+
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'catalog.db'),
+            'AUDIT_LOG_PATH': os.path.join(workdir, 'audit.log'),
+        }, instance_path=workdir)
+        with app.app_context():
+            db.create_all()
+            for label in ('insert', 'upsert'):
+                imported, _, seconds = import_catalog(
+                    'meals', read_rows(data_path), batch_size=args.batch_size, report=lambda message: None
+                )
+                print(f"{label:6} {imported:,} rows in {seconds:6.1f}s  {imported / seconds:9,.0f} rows/s")
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark the local knowledge base that answers chatbot prompts without inference.
+
+Indexes js/quiz-data.json plus a synthetic meal catalog, replays a mix of
+answerable and open-ended prompts, and reports the locally served share and
+lookup latency.
+
+Run from the project root:
+    python -m benchmarks.bench_knowledge --meals 20000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from knowledge import KnowledgeBase, load_quiz_file, meal_documents, quiz_documents
+
+PROMPTS = [
+    'Which vitamin do we get from sunlight?',
+    'vitamin from sunlight',
+    'What nutrient is the main source of energy for the body?',
+    'Which mineral is important for bones and teeth?',
+    'good source of dietary fiber',
+    'What is the recommended daily water intake?',
+    'Tell me about the Quinoa Buddha Bowl',
+    'Can you write me a weekly workout plan?',
+    'Is intermittent fasting safe for teenagers?',
+    'How do I stay motivated to cook at home?',
+]
+WORDS = ['chicken', 'salmon', 'tofu', 'quinoa', 'lentil', 'yogurt', 'spinach', 'rice', 'bean', 'oat']
+
+
+def synthetic_meals(count, seed=5):
+    rng = random.Random(seed)
+    names = [('Quinoa Buddha Bowl', 'Nutritious bowl with quinoa, roasted vegetables, chickpeas, avocado and tahini.')]
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        names.append((' '.join(words).title() + f' {i}', 'Made with ' + ', '.join(words) + '.'))
+    for name, description in names:
+        macros = {'protein': rng.randint(5, 40), 'carbs': rng.randint(5, 60)}
+        yield SimpleNamespace(name=name, description=description, category='balanced',
+                              calories=rng.randint(150, 700), nutrient_dict=lambda m=macros: m)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meals', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    knowledge = KnowledgeBase()
+    started = time.perf_counter()
+    documents = list(quiz_documents(load_quiz_file('js/quiz-data.json')))
+    documents.extend(meal_documents(synthetic_meals(args.meals)))
+    knowledge.build(documents)
+    print(f"indexed {len(knowledge)} documents in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for prompt in PROMPTS:
+        confidence, answer = knowledge.search(prompt)
+        verdict = 'local ' if confidence >= knowledge.min_confidence else 'remote'
+        print(f"  [{verdict} {confidence:.2f}] {prompt}")
+
+    rng = random.Random(9)
+    for _ in range(args.requests):
+        knowledge.answer(rng.choice(PROMPTS))
+    print('stats:', knowledge.stats())
+
+
+if __name__ == '__main__':
+    main()
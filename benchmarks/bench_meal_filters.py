@@ -0,0 +1,124 @@
+"""Before/after benchmark for macro filtering on the meal table.
+
+"before" is the original schema: macros live in a JSON text blob, so a query
+like "high-protein under 400 kcal with >= 25 g protein" has to decode every
+candidate row. "after" uses the typed columns and composite indexes that
+app.py declares on Meal.
+
+Run from the project root:
+    python -m benchmarks.bench_meal_filters --meals 200000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+CATEGORIES = ['high-protein', 'vegetarian', 'vegan', 'low-carb', 'salad', 'balanced']
+
+BEFORE_SCHEMA = [
+    'CREATE TABLE meal (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, calories INTEGER NOT NULL, '
+    'nutrients TEXT, category VARCHAR(100) NOT NULL, description TEXT)',
+]
+
+# Mirrors Meal.__table_args__ in app.py
+AFTER_SCHEMA = [
+    'CREATE TABLE meal (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, calories INTEGER NOT NULL, '
+    'protein FLOAT, carbs FLOAT, fat FLOAT, fiber FLOAT, nutrients TEXT, '
+    'category VARCHAR(100) NOT NULL, description TEXT)',
+    'CREATE INDEX ix_meal_category_calories ON meal (category, calories)',
+    'CREATE INDEX ix_meal_category_protein ON meal (category, protein)',
+    'CREATE INDEX ix_meal_protein_calories ON meal (protein, calories)',
+    'CREATE INDEX ix_meal_carbs_calories ON meal (carbs, calories)',
+    'CREATE INDEX ix_meal_fat_calories ON meal (fat, calories)',
+]
+
+AFTER_QUERY = (
+    'SELECT id, name, calories, protein, carbs, fat, fiber FROM meal '
+    'WHERE category = ? AND calories <= ? AND protein >= ? ORDER BY calories LIMIT 50'
+)
+BEFORE_QUERY = 'SELECT id, name, calories, nutrients FROM meal WHERE category = ? AND calories <= ?'
+
+
+def synthetic_meals(count, seed=42):
+    rng = random.Random(seed)
+    for meal_id in range(1, count + 1):
+        macros = {
+            'protein': rng.randint(2, 60),
+            'carbs': rng.randint(0, 110),
+            'fat': rng.randint(1, 45),
+            'fiber': rng.randint(0, 20),
+        }
+        yield meal_id, f'Meal {meal_id}', rng.randint(120, 900), macros, rng.choice(CATEGORIES)
+
+
+def build(path, schema, meals, typed):
+    conn = sqlite3.connect(path)
+    for statement in schema:
+        conn.execute(statement)
+    if typed:
+        conn.executemany(
+            'INSERT INTO meal (id, name, calories, protein, carbs, fat, fiber, category) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            ((i, name, cal, m['protein'], m['carbs'], m['fat'], m['fiber'], cat) for i, name, cal, m, cat in meals),
+        )
+    else:
+        conn.executemany(
+            'INSERT INTO meal (id, name, calories, nutrients, category) VALUES (?, ?, ?, ?, ?)',
+            ((i, name, cal, json.dumps(m), cat) for i, name, cal, m, cat in meals),
+        )
+    conn.commit()
+    conn.execute('ANALYZE')
+    return conn
+
+
+def query_before(conn, category, max_calories, min_protein):
+    matches = []
+    for meal_id, name, calories, nutrients in conn.execute(BEFORE_QUERY, (category, max_calories)):
+        macros = json.loads(nutrients)
+        if macros.get('protein', 0) >= min_protein:
+            matches.append((calories, meal_id, name, macros))
+    matches.sort()
+    return matches[:50]
+
+
+def query_after(conn, category, max_calories, min_protein):
+    return conn.execute(AFTER_QUERY, (category, max_calories, min_protein)).fetchall()
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meals', type=int, default=200000)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    meals = list(synthetic_meals(args.meals))
+    params = ('high-protein', 400, 25)
+    with tempfile.TemporaryDirectory() as workdir:
+        before = build(os.path.join(workdir, 'before.db'), BEFORE_SCHEMA, meals, typed=False)
+        after = build(os.path.join(workdir, 'after.db'), AFTER_SCHEMA, meals, typed=True)
+
+        plan = after.execute('EXPLAIN QUERY PLAN ' + AFTER_QUERY, params).fetchall()
+        print('after query plan:', '; '.join(row[-1] for row in plan))
+
+        p50, p99 = timed(lambda: query_before(before, *params), args.iterations)
+        print(f"before (JSON blob): p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+        p50, p99 = timed(lambda: query_after(after, *params), args.iterations)
+        print(f"after (indexed):    p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+        before.close()
+        after.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Meal plan solver time and target accuracy over catalog sizes.
+
+Run from the project root:
+    python -m benchmarks.bench_meal_planner --sizes 1000,10000,100000 --days 7,14
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.bench_meal_ranking import percentile, synthetic_rows
+from meal_planner import MealPlanner
+from meal_ranking import MealRankingEngine
+
+GOALS = ['weight-loss', 'muscle gain', 'maintenance', 'low-carb', '']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--days', default='7,14')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--candidates', type=int, default=40, help='per category')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    profiles = [SimpleNamespace(
+        weight=rng.randint(50, 110),
+        age=rng.randint(18, 70),
+        dietary_goals=rng.choice(GOALS),
+        allergies=rng.choice(['', '', 'peanut', 'shrimp, cheese']),
+    ) for _ in range(args.iterations)]
+
+    print(f"{'meals':>8} {'days':>4} {'p50 ms':>8} {'p99 ms':>8} {'kcal err':>9} {'protein err':>12} {'max uses':>9}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        engine = MealRankingEngine()
+        engine.load(synthetic_rows(size))
+        planner = MealPlanner(engine, per_category=args.candidates)
+        planner.plan(profiles[0])  # warm the allergy term masks
+        for days in (int(value) for value in args.days.split(',')):
+            timings, calorie_errors, protein_errors, max_uses = [], [], [], 0
+            for profile in profiles:
+                started = time.perf_counter()
+                targets, plan = planner.plan(profile, days=days)
+                timings.append((time.perf_counter() - started) * 1000)
+                for day in plan:
+                    totals = np.sum([values for _, values in day], axis=0)
+                    calorie_errors.append(abs(totals[0] - targets['calories']) / targets['calories'])
+                    protein_errors.append(abs(totals[1] - targets['protein']) / targets['protein'])
+                ids = [meal_id for day in plan for meal_id, _ in day]
+                max_uses = max(max_uses, max(ids.count(meal_id) for meal_id in ids))
+            print(f"{size:8d} {days:4d} {percentile(timings, 50):8.2f} {percentile(timings, 99):8.2f} "
+                  f"{np.mean(calorie_errors):9.2%} {np.mean(protein_errors):12.2%} {max_uses:9d}")
+
+
+if __name__ == '__main__':
+    main()
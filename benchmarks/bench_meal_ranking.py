@@ -0,0 +1,91 @@
+"""Microbenchmark for the meal ranking engine.
+
+Run from the project root:
+    python -m benchmarks.bench_meal_ranking --meals 100000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from allergens import text_mask
+from meal_ranking import MealRankingEngine
+
+CATEGORIES = ['high-protein', 'vegetarian', 'vegan', 'low-carb', 'salad', 'balanced']
+WORDS = ['chicken', 'salmon', 'tofu', 'quinoa', 'lentil', 'peanut', 'almond', 'yogurt',
+         'spinach', 'rice', 'egg', 'shrimp', 'avocado', 'oat', 'bean', 'cheese']
+
+
+def synthetic_rows(count, seed=42):
+    rng = random.Random(seed)
+    for meal_id in range(1, count + 1):
+        words = rng.sample(WORDS, 4)
+        name = ' '.join(words).title()
+        description = 'Made with ' + ', '.join(words) + '.'
+        yield (
+            meal_id,
+            rng.randint(120, 900),
+            rng.randint(2, 60),
+            rng.randint(0, 110),
+            rng.randint(1, 45),
+            rng.randint(0, 20),
+            text_mask(name, description),
+            rng.choice(CATEGORIES),
+            name,
+            description,
+        )
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--meals', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    engine = MealRankingEngine()
+    rows = list(synthetic_rows(args.meals))
+    started = time.perf_counter()
+    engine.load(rows)
+    print(f"loaded {len(engine)} meals in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    profiles = [
+        (SimpleNamespace(age=34, weight=82.0, dietary_goals='muscle gain', allergies=''), '', None),
+        (SimpleNamespace(age=51, weight=70.0, dietary_goals='weight-loss', allergies='peanut'), '', 450),
+        (SimpleNamespace(age=25, weight=60.0, dietary_goals='', allergies='shrimp, egg'), 'vegetarian', None),
+        (None, 'high-protein', 600),
+    ]
+    for profile, preferences, calories in profiles:
+        engine.rank(profile, preferences, calories, args.limit)  # warm allergy masks
+
+    # Vocabulary allergens are one AND over the stored bitmasks; other terms scan every meal's text once
+    for allergies in ('sesame, mustard', 'kiwi'):
+        started = time.perf_counter()
+        engine.rank(SimpleNamespace(allergies=allergies), '', None, args.limit)
+        print(f"first rank excluding {allergies!r}: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    timings = []
+    for i in range(args.iterations):
+        profile, preferences, calories = profiles[i % len(profiles)]
+        started = time.perf_counter()
+        engine.rank(profile, preferences, calories, args.limit)
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"rank top-{args.limit}: p50 {percentile(timings, 50):.3f} ms  "
+          f"p99 {percentile(timings, 99):.3f} ms  max {max(timings):.3f} ms")
+
+    timings = []
+    for row in synthetic_rows(1000, seed=7):
+        row = (row[0] + args.meals,) + row[1:]
+        started = time.perf_counter()
+        engine.upsert(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"incremental upsert: p50 {percentile(timings, 50):.4f} ms  p99 {percentile(timings, 99):.4f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Login-storm benchmark for password verification.
+
+"inline" runs bcrypt.checkpw on every client thread, as User.check_password
+used to. "capped" goes through PasswordHasher, which lets one bcrypt call
+per core run at a time and sheds excess load with HasherBusy.
+
+Run from the project root:
+    python -m benchmarks.bench_password_hashing --clients 32 --logins 200 --rounds 10
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from password_hashing import HasherBusy, PasswordHasher
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))] if samples else 0.0
+
+
+def storm(label, verify, clients, logins):
+    timings, rejected = [], [0]
+
+    def login(_):
+        started = time.perf_counter()
+        try:
+            verify()
+        except HasherBusy:
+            rejected[0] += 1
+            return
+        timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    cores = os.cpu_count() or 1
+    print(f"{label:8} {len(timings) / elapsed / cores:6.1f} logins/s/core  "
+          f"p50 {percentile(timings, 50):7.1f} ms  p99 {percentile(timings, 99):7.1f} ms  shed {rejected[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    password = b'Str0ng!Password'
+    stored = bcrypt.hashpw(password, bcrypt.gensalt(args.rounds)).decode('utf-8')
+    storm('inline', lambda: bcrypt.checkpw(password, stored.encode('utf-8')), args.clients, args.logins)
+
+    hasher = PasswordHasher(rounds=args.rounds)
+    storm('capped', lambda: hasher.verify(password.decode('utf-8'), stored), args.clients, args.logins)
+
+    strict = PasswordHasher(rounds=args.rounds, max_pending=2, queue_timeout=0.05)
+    storm('shedding', lambda: strict.verify(password.decode('utf-8'), stored), args.clients, args.logins)
+
+    upgraded = PasswordHasher(rounds=args.rounds + 1)
+    print(f"rehash needed after raising rounds to {upgraded.rounds}: {upgraded.needs_rehash(stored)}")
+
+
+if __name__ == '__main__':
+    main()
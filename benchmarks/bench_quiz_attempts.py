@@ -0,0 +1,87 @@
+"""Write cost of quiz attempts: one transaction each versus batched.
+
+"per-attempt" inserts each attempt and updates its aggregate rows in its own
+commit, as a naive request handler would; "batched" is AttemptRecorder, which
+buffers attempts and writes them with their aggregates a batch at a time.
+
+Run from the project root:
+    python -m benchmarks.bench_quiz_attempts --attempts 5000 --users 200 --quizzes 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import warnings
+
+
+def report(label, app, count, total, request_path):
+    from extensions import db
+    from models import QuizAttempt, QuizScore
+
+    with app.app_context():
+        rows = db.session.query(QuizAttempt).count()
+        aggregated = db.session.query(db.func.sum(QuizScore.attempts)).scalar()
+    print(f"{label:12} {count / total:9,.0f} attempts/s  request path {request_path / count * 1e6:8.1f} us/attempt  "
+          f"rows {rows}  aggregated {aggregated}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attempts', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--quizzes', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', message='The HMAC key')
+
+    from app import create_app
+    from extensions import db
+    from models import Quiz, QuizAttempt, QuizScore, QuizStats, User
+    from quiz_attempts import AttemptRecorder, make_attempt
+
+    rng = random.Random(args.seed)
+    submissions = [
+        (rng.randint(1, args.users), rng.randint(1, args.quizzes), [rng.random() < 0.7 for _ in range(10)])
+        for _ in range(args.attempts)
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'bench.db')},
+                         instance_path=workdir)
+        with app.app_context():
+            db.create_all()
+            db.session.execute(User.__table__.insert(), [
+                {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+                for i in range(args.users)
+            ])
+            db.session.execute(Quiz.__table__.insert(), [
+                {'title': f'Quiz {i}', 'questions': '[]'} for i in range(args.quizzes)
+            ])
+            db.session.commit()
+
+        def reset():
+            with app.app_context():
+                for model in (QuizAttempt, QuizScore, QuizStats):
+                    db.session.query(model).delete()
+                db.session.commit()
+
+        reset()
+        recorder = AttemptRecorder(app)
+        started = time.perf_counter()
+        for user_id, quiz_id, results in submissions:
+            recorder.write([make_attempt(user_id, quiz_id, [], results)])
+        elapsed = time.perf_counter() - started
+        report('per-attempt', app, args.attempts, elapsed, elapsed)
+
+        reset()
+        recorder = AttemptRecorder(app, max_queue=args.attempts)
+        started = time.perf_counter()
+        for user_id, quiz_id, results in submissions:
+            recorder.record(user_id, quiz_id, [], results)
+        request_path = time.perf_counter() - started
+        recorder.shutdown(timeout=60)
+        report('batched', app, args.attempts, time.perf_counter() - started, request_path)
+
+if __name__ == '__main__':
+    main()
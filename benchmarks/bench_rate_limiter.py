@@ -0,0 +1,54 @@
+"""Per-check overhead and cross-process accuracy of the rate limit storages.
+
+Run from the project root:
+    python -m benchmarks.bench_rate_limiter --checks 5000 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+import limiter_storage  # noqa: F401  registers sqlite://
+
+
+def per_check(uri, checks):
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse('1000000/minute')
+    started = time.perf_counter()
+    for i in range(checks):
+        limiter.hit(item, 'bench', str(i % 50))
+    return (time.perf_counter() - started) / checks * 1e6
+
+
+def hammer(args):
+    uri, attempts = args
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse('5/minute')
+    return sum(limiter.hit(item, 'register', '10.0.0.1') for _ in range(attempts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--checks', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sqlite_uri = 'sqlite:///' + os.path.join(workdir, 'ratelimit.db')
+        for label, uri in (('memory', 'memory://'), ('sqlite', sqlite_uri)):
+            print(f"{label:7} {per_check(uri, args.checks):6.1f} us per check")
+
+        # "5 per minute" hit from several worker processes at once
+        with multiprocessing.Pool(args.processes) as pool:
+            for label, uri in (('memory', 'memory://'), ('sqlite', sqlite_uri)):
+                allowed = sum(pool.map(hammer, [(uri, 20)] * args.processes))
+                print(f"{label:7} allowed {allowed} of {20 * args.processes} requests against a 5/minute limit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Search index build, snapshot load, query and incremental update timings.
+
+Run from the project root:
+    python -m benchmarks.bench_search --docs 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_meal_ranking import CATEGORIES, WORDS, percentile
+from search_index import SearchIndex
+
+SYLLABLES = ['ba', 'ko', 'ri', 'tu', 'men', 'sal', 'por', 'chi', 'lo', 've', 'dra', 'ni', 'que', 'sha', 'to', 'ga']
+
+
+def vocabulary(size, rng):
+    """Made-up words, with the real ingredient words at ranks where each is in a few percent of documents"""
+    words = []
+    seen = set(WORDS)
+    while len(words) < size - len(WORDS):
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    for position, word in enumerate(WORDS):
+        words.insert(20 + position * 5, word)
+    return words
+
+
+def synthetic_documents(count, words, seed=42):
+    """Meal-like documents whose words follow a Zipf distribution"""
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.3, size=count * 16), len(words)) - 1
+    for i in range(count):
+        picks = [words[rank] for rank in ranks[i * 16:(i + 1) * 16]]
+        yield {
+            'kind': 'meal',
+            'id': i + 1,
+            'title': ' '.join(picks[:4]).title(),
+            'body': 'Made with ' + ', '.join(picks[4:]) + '.',
+            'category': CATEGORIES[i % len(CATEGORIES)],
+        }
+
+
+def time_queries(index, queries, iterations, cached=True):
+    timings = []
+    for i in range(iterations):
+        if not cached:
+            index.clear_cache()
+        started = time.perf_counter()
+        index.search(queries[i % len(queries)], limit=10)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=1000000)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    words = vocabulary(args.vocabulary, rng)
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.build(synthetic_documents(args.docs, words))
+    print(f"built {len(index)} documents in {time.perf_counter() - started:.1f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'index.npz')
+        started = time.perf_counter()
+        index.save(path, version=1, offset=0)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        index, _ = SearchIndex.load(path)
+        print(f"snapshot {os.path.getsize(path) / 1e6:.0f} MB: save {saved * 1000:.0f} ms, "
+              f"load {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    scenarios = {
+        'most frequent terms': words[:3],
+        'common term': ['chicken', 'rice', 'salmon', 'tofu'],
+        'two terms': ['chicken rice', 'salmon spinach', 'tofu quinoa', 'lentil avocado'],
+        'rare term': words[2000:2100],
+        'prefix': ['chi', 'sal', 'tof', 'len', 'ave'],
+        'typo': ['chiken', 'salmn', 'quinao', 'spinnach'],
+        'three terms, prefix': ['chicken rice spi', 'tofu quinoa av', 'salmon egg ri'],
+    }
+    # Cold runs clear the result cache first, so broad queries pay for their full scan every time
+    for name, queries in scenarios.items():
+        cold = time_queries(index, queries, args.iterations, cached=False)
+        warm = time_queries(index, queries, args.iterations)
+        print(f"{name:>20}: cold p50 {percentile(cold, 50):6.2f} ms  p99 {percentile(cold, 99):6.2f} ms  "
+              f"warm p50 {percentile(warm, 50):6.2f} ms")
+
+    documents = list(synthetic_documents(2000, words, seed=7))
+    timings = []
+    for document in documents:
+        document['id'] += args.docs
+        started = time.perf_counter()
+        index.add([document])
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"incremental add: p50 {percentile(timings, 50):.3f} ms  p99 {percentile(timings, 99):.3f} ms")
+    timings = time_queries(index, scenarios['two terms'], args.iterations)
+    print(f"two terms with {index.delta_postings} delta postings: p50 {percentile(timings, 50):.2f} ms")
+    index.freeze()
+    started = time.perf_counter()
+    index.merge()
+    print(f"merge into base: {(time.perf_counter() - started) * 1000:.0f} ms (in the background, off the request path)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Import time and create_app() cost, checked against a budget.
+
+Each run imports the app in a fresh interpreter with ``python -X importtime``
+and exits non-zero when the median import or startup time exceeds its budget,
+or when a lazily loaded dependency gets imported at startup.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --runs 5 --import-budget-ms 700 --startup-budget-ms 100
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Only needed once the matching feature is used; importing them at startup is a regression
+LAZY_MODULES = ('requests', 'numpy', 'flask_mail', 'ai', 'meal_ranking', 'knowledge')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'startup_ms': (created - imported) * 1000,
+    'lazy_loaded': [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from ``-X importtime`` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def probe(root, instance_dir):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE % (LAZY_MODULES,)],
+        cwd=instance_dir, env=dict(os.environ, PYTHONPATH=root), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=700.0)
+    parser.add_argument('--startup-budget-ms', type=float, default=100.0)
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    with tempfile.TemporaryDirectory() as instance_dir:
+        for _ in range(args.runs):
+            runs.append(probe(root, instance_dir))
+
+    import_ms = statistics.median(run['import_ms'] for run, _ in runs)
+    startup_ms = statistics.median(run['startup_ms'] for run, _ in runs)
+    lazy_loaded = sorted({name for run, _ in runs for name in run['lazy_loaded']})
+
+    modules = runs[-1][1]
+    print("slowest imports (cumulative, last run):")
+    for name, (_, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print(f"import     {import_ms:7.1f} ms median (budget {args.import_budget_ms:.0f} ms)")
+    print(f"create_app {startup_ms:7.1f} ms median (budget {args.startup_budget_ms:.0f} ms)")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append('import time over budget')
+    if startup_ms > args.startup_budget_ms:
+        failures.append('create_app() time over budget')
+    if lazy_loaded:
+        failures.append(f"imported at startup: {', '.join(lazy_loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Stream meals or quizzes from CSV/JSONL into the database.
+
+Rows are read one at a time and written in batches of ``--batch-size`` with
+a single upsert statement each (INSERT ... ON CONFLICT on SQLite/PostgreSQL,
+ON DUPLICATE KEY UPDATE on MySQL), keyed on ``external_id``. Re-running an
+import updates rows in place instead of duplicating them, and memory use
+stays bounded by the batch size whatever the file size. The catalog's
+version stamp is bumped once at the end, so app workers reload once per
+import rather than once per batch.
+
+Usage:
+    python catalog_import.py meals foods.jsonl
+    python catalog_import.py meals foods.csv --batch-size 10000
+    python catalog_import.py quizzes quizzes.jsonl
+
+Meal rows need name, calories and category; protein, carbs, fat and fiber
+may be top-level fields or a ``nutrients`` object, and optional
+``ingredients`` and ``allergens`` (lists or comma-separated text) feed the
+meal's allergen mask. Quiz rows need title and
+questions (a list, or its JSON string). Without an ``external_id`` the
+natural key is derived from the meal name or quiz title.
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from itertools import islice
+
+from sqlalchemy import insert, update
+
+from allergens import mask_of, text_mask
+from extensions import db
+from models import Meal, Quiz
+from version_stamp import deferred_bumps
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def natural_key(text):
+    """'Grilled Chicken Salad' -> 'grilled-chicken-salad'"""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')[:100]
+
+
+def meal_record(row):
+    nutrients = row.get('nutrients') or {}
+    if isinstance(nutrients, str):
+        nutrients = json.loads(nutrients)
+    record = {
+        'external_id': str(row.get('external_id') or natural_key(row['name'])),
+        'name': row['name'].strip(),
+        'calories': int(float(row['calories'])),
+        'category': row['category'].strip(),
+        'description': row.get('description') or None,
+    }
+    for field in Meal.MACRO_FIELDS:
+        value = row.get(field, nutrients.get(field))
+        record[field] = float(value) if value not in (None, '') else None
+    record['allergen_mask'] = (text_mask(record['name'], record['description'], row.get('ingredients'))
+                               | mask_of(row.get('allergens')))
+    return record
+
+
+def quiz_record(row):
+    questions = row['questions']
+    if not isinstance(questions, str):
+        questions = json.dumps(questions)
+    return {
+        'external_id': str(row.get('external_id') or natural_key(row['title'])),
+        'title': row['title'].strip(),
+        'description': row.get('description') or None,
+        'questions': questions,
+    }
+
+
+CATALOGS = {
+    'meals': (Meal, meal_record),
+    'quizzes': (Quiz, quiz_record),
+}
+
+
+def read_rows(path, file_format=None):
+    """Yield dict rows from a CSV or JSON-lines file ('-' reads stdin)"""
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    f = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    try:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def upsert_statement(model, columns):
+    """Dialect-specific insert-or-update on external_id, or None if unsupported"""
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    changed = [column for column in columns if column != 'external_id']
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(model.__table__)
+        return statement.on_conflict_do_update(
+            index_elements=['external_id'],
+            set_={column: statement.excluded[column] for column in changed}
+        )
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(model.__table__)
+        return statement.on_duplicate_key_update({column: statement.inserted[column] for column in changed})
+    return None
+
+
+def upsert_batch(model, records):
+    # Last row wins when a key repeats inside one batch
+    records = list({record['external_id']: record for record in records}.values())
+    statement = upsert_statement(model, records[0].keys())
+    if statement is not None:
+        db.session.execute(statement, records)
+    else:
+        keys = [record['external_id'] for record in records]
+        existing = dict(db.session.query(model.external_id, model.id).filter(model.external_id.in_(keys)))
+        updates = [dict(record, id=existing[record['external_id']]) for record in records if record['external_id'] in existing]
+        inserts = [record for record in records if record['external_id'] not in existing]
+        if inserts:
+            db.session.execute(insert(model), inserts)
+        if updates:
+            db.session.execute(update(model), updates)
+    db.session.commit()
+
+
+def import_catalog(kind, rows, batch_size=DEFAULT_BATCH_SIZE, progress_every=100000, report=print):
+    """Upsert ``rows`` into the ``kind`` catalog; returns (imported, skipped, seconds)"""
+    model, to_record = CATALOGS[kind]
+    imported = skipped = position = 0
+    next_report = progress_every
+    started = time.perf_counter()
+    rows = iter(rows)
+    # Each batch commits, but workers reload the catalog once, after the last one
+    with deferred_bumps(db.session):
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            batch = []
+            for row in chunk:
+                position += 1
+                try:
+                    batch.append(to_record(row))
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    skipped += 1
+                    report(f"Skipping {kind} row {position}: {e!r}")
+            if batch:
+                upsert_batch(model, batch)
+                imported += len(batch)
+            if progress_every and position >= next_report:
+                elapsed = time.perf_counter() - started
+                report(f"{kind}: {position:,} rows read, {imported:,} imported ({imported / elapsed:,.0f} rows/s)")
+                next_report += progress_every
+    return imported, skipped, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('kind', choices=sorted(CATALOGS))
+    parser.add_argument('path', help="CSV or JSON-lines file, or '-' for stdin")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='defaults to the file extension')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--progress-every', type=int, default=100000)
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        imported, skipped, seconds = import_catalog(
+            args.kind,
+            read_rows(args.path, args.format),
+            batch_size=args.batch_size,
+            progress_every=args.progress_every
+        )
+    rate = imported / seconds if seconds else 0.0
+    print(f"Imported {imported:,} {args.kind} ({skipped:,} skipped) in {seconds:.1f}s, {rate:,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
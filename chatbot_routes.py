@@ -0,0 +1,177 @@
+from flask import Blueprint, current_app, request, jsonify, Response
+from flask_jwt_extended import jwt_required
+import json
+import os
+import re
+import time
+from extensions import csrf, instrumentation, lazy
+from models import Quiz, Meal
+from meal_routes import meal_catalog_version
+from quiz_routes import get_quiz_version
+
+chatbot_bp = Blueprint('chatbot', __name__)
+
+# The AI client (and requests), the response cache and the knowledge base are
+# only loaded when the assistant is first used
+
+def get_response_cache():
+    def create(app):
+        from ai_cache import ResponseCache
+        return ResponseCache(
+            max_entries=app.config['AI_CACHE_MAX_ENTRIES'],
+            ttl=app.config['AI_CACHE_TTL'],
+            disk_path=app.config['AI_CACHE_DISK_PATH']
+        )
+    return lazy('response_cache', create)
+
+def get_inference():
+    def create(app):
+        from ai import generate_responses
+        from ai_dispatch import InferenceDispatcher
+        return InferenceDispatcher(
+            instrumentation.timed_upstream('generate_batch', generate_responses),
+            max_batch_size=app.config['AI_BATCH_MAX_SIZE'],
+            max_wait=app.config['AI_BATCH_MAX_WAIT'],
+            max_concurrent_batches=app.config['AI_BATCH_CONCURRENCY'],
+            max_pending=app.config['AI_BATCH_MAX_PENDING']
+        )
+    return lazy('inference', create)
+
+def get_knowledge():
+    def create(app):
+        from knowledge import KnowledgeBase
+        return KnowledgeBase(min_confidence=app.config['KNOWLEDGE_MIN_CONFIDENCE'], logger=app.logger)
+    return lazy('knowledge', create)
+
+def generate_response(prompt):
+    """Reply to one prompt through the coalescing, batching dispatcher"""
+    from ai import CONNECT_TIMEOUT, READ_TIMEOUT
+    return get_inference().generate(prompt, timeout=CONNECT_TIMEOUT + READ_TIMEOUT + 1)
+
+def knowledge_documents(app):
+    from knowledge import load_quiz_file, meal_documents, quiz_documents
+
+    # Runs on the rebuild thread, so it brings its own app context
+    with app.app_context():
+        seen = set()
+        questions = load_quiz_file(os.path.join(app.root_path, 'js', 'quiz-data.json'))
+        for quiz in Quiz.query.with_entities(Quiz.questions):
+            questions.extend(json.loads(quiz.questions))
+        for item in questions:
+            if item.get('question') not in seen:
+                seen.add(item.get('question'))
+                yield from quiz_documents([item])
+        yield from meal_documents(Meal.query.yield_per(5000))
+
+def local_answer(prompt):
+    """Answer from the local knowledge base, or None if it isn't confident.
+
+    A quiz or meal change starts a rebuild in the background; until it lands the
+    previous index answers (and before the first build, everything goes remote).
+    """
+    knowledge = get_knowledge()
+    app = current_app._get_current_object()
+    version = (get_quiz_version().current(), *meal_catalog_version())
+    knowledge.refresh(version, lambda: knowledge_documents(app))
+    return knowledge.answer(prompt)
+
+def clean_prompt(data):
+    """Validate and sanitize a chatbot prompt; returns (prompt, error)"""
+    prompt = (data or {}).get('prompt', '')
+
+    # Input validation and sanitization
+    if not prompt or not isinstance(prompt, str):
+        return None, 'Valid prompt is required'
+
+    # Sanitize prompt (remove potentially harmful characters)
+    prompt = re.sub(r'[<>]', '', prompt.strip())
+    if len(prompt) > 1000:  # Limit prompt length
+        return None, 'Prompt too long'
+    return prompt, None
+
+@chatbot_bp.route('/api/chatbot', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+def chatbot():
+    import ai
+    from ai_dispatch import InferenceBusy
+
+    prompt, error = clean_prompt(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        answer = local_answer(prompt)
+        if answer is not None:
+            return jsonify({'response': answer, 'source': 'local'})
+        response = get_response_cache().get_or_generate(prompt, generate_response, skip=(ai.FALLBACK_RESPONSE,))
+        return jsonify({'response': response})
+    except InferenceBusy:
+        # Shed the burst instead of queueing it behind the backend
+        response = jsonify({'error': 'The assistant is busy, please try again'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except Exception as e:
+        current_app.logger.error(f"Chatbot error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def sse_event(data, event=None):
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+@chatbot_bp.route('/api/chatbot/stream', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+def chatbot_stream():
+    """Stream the chatbot reply as Server-Sent Events while the backend generates it"""
+    import ai
+
+    prompt, error = clean_prompt(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        cached = local_answer(prompt)
+        response_cache = get_response_cache()
+        if cached is None:
+            cached = response_cache.get(prompt)
+    except Exception as e:
+        current_app.logger.error(f"Chatbot stream error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    if cached is not None:
+        body = sse_event({'token': cached}) + sse_event({'done': True}, event='done')
+        return Response(body, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    deadline = time.monotonic() + ai.STREAM_DEADLINE
+    logger = current_app.logger
+
+    def generate():
+        chunks = ai.stream_response(prompt, deadline=deadline)
+        reply = []
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            for chunk in chunks:
+                reply.append(chunk)
+                yield sse_event({'token': chunk})
+            outcome = 'ok'
+            yield sse_event({'done': True}, event='done')
+            response = ''.join(reply)
+            if response and response != ai.FALLBACK_RESPONSE:
+                response_cache.set(prompt, response)
+        except TimeoutError:
+            yield sse_event({'error': 'The assistant took too long to respond'}, event='error')
+        except Exception as e:
+            logger.error(f"Chatbot stream error: {str(e)}")
+            yield sse_event({'error': 'Internal server error'}, event='error')
+        finally:
+            # Runs on client disconnect too, releasing the upstream connection
+            chunks.close()
+            instrumentation.upstream.observe(time.perf_counter() - started, 'stream', outcome)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,53 @@
+"""Counter rows that many workers update at once.
+
+``increment()`` makes sure each keyed row exists (an insert that skips
+existing keys) and then adds to it with ``SET x = x + :n`` in one
+executemany, so concurrent writers never read-modify-write and lose counts.
+"""
+from sqlalchemy import bindparam, case, insert, update
+
+from extensions import db
+
+
+def greatest(*expressions):
+    """Portable GREATEST() (SQLite only has the two-argument max())"""
+    result = expressions[0]
+    for expression in expressions[1:]:
+        result = case((result >= expression, result), else_=expression)
+    return result
+
+
+def insert_missing(table, rows):
+    """Insert ``rows``, skipping any whose primary key already exists"""
+    dialect = db.session.get_bind().dialect.name
+    statement = insert(table)
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table).on_conflict_do_nothing()
+    elif dialect in ('mysql', 'mariadb'):
+        statement = statement.prefix_with('IGNORE')
+    db.session.execute(statement, rows)
+
+
+def increment(table, keys, rows):
+    """Add each row's non-key values to the row with its ``keys`` columns, creating it at zero.
+
+    Every row must carry the same columns; the caller commits.
+    """
+    if not rows:
+        return
+    insert_missing(table, [{key: row[key] for key in keys} for row in rows])
+    columns = [name for name in rows[0] if name not in keys]
+    statement = update(table).where(
+        *[table.c[key] == bindparam('key_' + key) for key in keys]
+    ).values({
+        name: table.c[name] + bindparam('add_' + name, type_=table.c[name].type)
+        for name in columns
+    })
+    db.session.execute(statement, [
+        {**{'key_' + key: row[key] for key in keys}, **{'add_' + name: row[name] for name in columns}}
+        for row in rows
+    ], execution_options={'synchronize_session': False})
@@ -0,0 +1,137 @@
+"""Connection pool tuning, primary/replica routing and pool metrics.
+
+Every engine except in-memory SQLite uses a QueuePool sized by the DB_POOL_*
+settings, pre-pings connections and recycles them before the server's idle
+timeout. When SQLALCHEMY_REPLICA_URI is set, SELECTs issued inside a
+``@read_only`` view go to the ``replica`` bind; flushes and any other
+statement always use the primary.
+"""
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+REPLICA_BIND = 'replica'
+READ_ONLY = 'read_only'
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=4096)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._lock:
+                self.checkouts += 1
+                self._waits.append(waited)
+                self.max_wait = max(self.max_wait, waited)
+                self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts, max_wait, peak = self.checkouts, self.timeouts, self.max_wait, self.peak_checked_out
+
+        def percentile(pct):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * pct / 100))] * 1000, 3)
+
+        capacity = self.size() + max(self._max_overflow, 0)
+        return {
+            'size': self.size(),
+            'max_overflow': self._max_overflow,
+            'checked_out': self.checkedout(),
+            'peak_checked_out': peak,
+            'saturation': round(self.checkedout() / capacity, 4) if capacity else 0.0,
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'wait_p50_ms': percentile(50),
+            'wait_p99_ms': percentile(99),
+            'wait_max_ms': round(max_wait * 1000, 3),
+        }
+
+
+def pool_options(url, config):
+    """Engine options for ``url`` from the DB_POOL_* settings"""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}  # Flask-SQLAlchemy keeps in-memory SQLite on a single static connection
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def configure_engines(app):
+    """Fill in engine options and the replica bind; call before db.init_app(app)"""
+    config = app.config
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **pool_options(config['SQLALCHEMY_DATABASE_URI'], config),
+        **config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+    replica = config.get('SQLALCHEMY_REPLICA_URI')
+    if replica:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, {'url': replica, **pool_options(replica, config)})
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+class RoutingSession(Session):
+    """Sends reads to the replica while ``info['read_only']`` is set"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(READ_ONLY) and not self._flushing:
+            if clause is None or getattr(clause, 'is_select', False):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """Route the view's queries to the replica bind (if one is configured)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        session = current_app.extensions['sqlalchemy'].session()
+        session.info[READ_ONLY] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            session.info.pop(READ_ONLY, None)
+    return wrapper
+
+
+def pool_stats(engines):
+    """TimedQueuePool stats keyed by bind name ('primary', 'replica', ...)"""
+    stats = {}
+    for key, engine in engines.items():
+        if isinstance(engine.pool, TimedQueuePool):
+            stats[key or 'primary'] = engine.pool.stats()
+    return stats
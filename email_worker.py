@@ -0,0 +1,294 @@
+"""Background delivery of the email outbox.
+
+Endpoints never talk to the mail server: they insert an EmailOutbox row and
+return. A password reset request is queued whether or not an account has
+the address, so the response takes the same time either way; this worker
+looks the account up, renders the reset link and skips unknown addresses.
+
+Each worker claims a batch of due rows with a conditional UPDATE (as
+recipe_worker does, so two workers never send the same row and a crashed
+worker's claims are retried after ``claim_timeout``), sends the batch in
+parallel over a small pool of SMTP connections that stay open between
+batches, and records the outcome. Temporary failures are retried with
+exponential backoff up to MAX_ATTEMPTS; permanent (5xx) refusals are not.
+
+Usage:
+    python email_worker.py                          # MAIL_SERVER from config
+    python email_worker.py --connections 8 --batch-size 200
+    python stub_smtp.py --port 8025 &
+    python email_worker.py --smtp 127.0.0.1:8025 --once
+"""
+import argparse
+import os
+import random
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import and_, or_
+
+from extensions import db, get_serializer
+from models import EmailOutbox, User
+
+MAX_ATTEMPTS = 6
+RETRY_BASE = 30  # seconds before the first retry, doubled for each one after
+RETRY_MAX = 3600
+
+
+def retry_delay(attempts):
+    """Seconds before attempt ``attempts + 1``, with jitter so a failed batch doesn't retry in lockstep"""
+    delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def is_permanent(error):
+    """True for 5xx refusals, which retrying won't fix"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class SMTPPool:
+    """Up to ``size`` SMTP connections, each reused for up to ``max_messages`` messages"""
+
+    def __init__(self, host, port, use_tls=False, username=None, password=None, size=4, timeout=10,
+                 max_messages=100):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+        self.sent = 0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.opened += 1
+        return [smtp, 0]
+
+    @contextmanager
+    def connection(self):
+        """A ``[smtp, messages sent]`` pair; it goes back to the pool unless the connection broke"""
+        with self._slots:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self._connect()
+            try:
+                yield connection
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # The server refused one message and smtplib has reset the session; keep it
+                with self._lock:
+                    self._idle.append(connection)
+                raise
+            except Exception:
+                self._close(connection)
+                raise
+            if connection[1] >= self.max_messages:
+                self._close(connection)
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+
+    def send(self, message):
+        with self.connection() as connection:
+            try:
+                connection[0].send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # The server closed an idle connection; once more on a new one
+                if connection[1] == 0:
+                    raise
+                connection[0].close()
+                connection[:] = self._connect()
+                connection[0].send_message(message)
+            connection[1] += 1
+        with self._lock:
+            self.sent += 1
+
+    def _close(self, connection):
+        try:
+            connection[0].quit()
+        except Exception:
+            connection[0].close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+
+
+def smtp_pool(config, size, smtp=None):
+    """A pool for the app's MAIL_* settings, or for a plain ``host:port`` such as the stub_smtp.py sink"""
+    if smtp:
+        host, _, port = smtp.rpartition(':')
+        return SMTPPool(host or '127.0.0.1', int(port), size=size)
+    return SMTPPool(config['MAIL_SERVER'], config['MAIL_PORT'], use_tls=config['MAIL_USE_TLS'],
+                    username=config['MAIL_USERNAME'], password=config['MAIL_PASSWORD'], size=size)
+
+
+def render(row, sender, accounts, reset_url):
+    """The EmailMessage for an outbox row, or None when it shouldn't be sent"""
+    if row.kind == 'password_reset':
+        if row.recipient not in accounts:
+            return None
+        token = get_serializer().dumps(row.recipient, salt='password-reset-salt')
+        subject = 'Password Reset Request'
+        body = f'Click the link to reset your password: {reset_url}?token={token}'
+    else:
+        subject, body = row.subject or '', row.body or ''
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = row.recipient
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
+
+
+class EmailWorker:
+    """Claims batches of due outbox rows and sends them; one per worker process"""
+
+    def __init__(self, app, pool, batch_size=50, claim_timeout=300):
+        self.app = app
+        self.pool = pool
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self._executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix='email-sender')
+        self.sent = 0
+        self.skipped = 0
+        self.retried = 0
+        self.failed = 0
+
+    def claimable(self, now):
+        stale = now - timedelta(seconds=self.claim_timeout)
+        return or_(
+            and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < stale),
+        )
+
+    def claim(self):
+        """Mark up to ``batch_size`` due rows as ours and return them"""
+        now = datetime.utcnow()
+        ids = [row_id for (row_id,) in db.session.query(EmailOutbox.id).filter(
+            self.claimable(now)
+        ).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(self.batch_size)]
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        # The status check is repeated in the UPDATE, so a row another worker got first is skipped
+        db.session.query(EmailOutbox).filter(EmailOutbox.id.in_(ids), self.claimable(now)).update({
+            'status': 'sending',
+            'claimed_by': token,
+            'claimed_at': now,
+            'attempts': EmailOutbox.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        return EmailOutbox.query.filter_by(claimed_by=token).order_by(EmailOutbox.id).all()
+
+    def deliver(self, message):
+        try:
+            self.pool.send(message)
+            return None
+        except (smtplib.SMTPException, OSError) as e:
+            return e
+
+    def run_once(self):
+        """Claim and send one batch; returns the number of rows handled"""
+        with self.app.app_context():
+            try:
+                rows = self.claim()
+                if not rows:
+                    return 0
+                resets = [row.recipient for row in rows if row.kind == 'password_reset']
+                accounts = {email for (email,) in db.session.query(User.email).filter(User.email.in_(resets))} \
+                    if resets else set()
+                config = self.app.config
+                messages = [render(row, config['MAIL_DEFAULT_SENDER'], accounts, config['PASSWORD_RESET_URL'])
+                            for row in rows]
+                claimed = [(row.id, row.attempts) for row in rows]
+                # End the read transaction so no connection is held while the mail server answers
+                db.session.commit()
+                errors = list(self._executor.map(
+                    lambda message: self.deliver(message) if message is not None else None, messages))
+
+                now = datetime.utcnow()
+                for row, (row_id, attempts), message, error in zip(rows, claimed, messages, errors):
+                    # Only assigned to: reading would reload each expired row
+                    row.claimed_by = None
+                    if message is None:
+                        row.status = 'skipped'
+                        self.skipped += 1
+                    elif error is None:
+                        row.status, row.sent_at, row.error = 'sent', now, None
+                        self.sent += 1
+                    elif is_permanent(error) or attempts >= MAX_ATTEMPTS:
+                        row.status, row.error = 'failed', str(error)[:500]
+                        self.failed += 1
+                        self.app.logger.error(f"Error sending email {row_id}: {str(error)}")
+                    else:
+                        row.status, row.error = 'pending', str(error)[:500]
+                        row.next_attempt_at = now + timedelta(seconds=retry_delay(attempts))
+                        self.retried += 1
+                db.session.commit()
+                return len(claimed)
+            except Exception as e:
+                # The claims time out and the batch is retried
+                db.session.rollback()
+                self.app.logger.error(f"Error processing email outbox: {str(e)}")
+                return 0
+
+    def run(self, poll_interval=1.0, once=False):
+        """Send batches until nothing is due (``once``) or forever, polling when idle"""
+        try:
+            while True:
+                if self.run_once():
+                    continue
+                if once:
+                    return
+                time.sleep(poll_interval)
+        finally:
+            self.pool.close()
+
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Send queued email from the outbox')
+    parser.add_argument('--connections', type=int, default=4, help='SMTP connections kept open')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='seconds between polls of an empty outbox')
+    parser.add_argument('--claim-timeout', type=int, default=300, help='seconds before an unfinished claim is retried')
+    parser.add_argument('--smtp', help='host:port to send through without TLS or login, e.g. stub_smtp.py')
+    parser.add_argument('--once', action='store_true', help='exit once nothing is due')
+    options = parser.parse_args()
+
+    app = create_app()
+    worker = EmailWorker(app, smtp_pool(app.config, options.connections, options.smtp), options.batch_size,
+                         options.claim_timeout)
+    worker.run(options.poll_interval, options.once)
+    print(f"[{os.getpid()}] {worker.sent} sent, {worker.skipped} skipped, {worker.retried} to retry, "
+          f"{worker.failed} failed")
+
+
+if __name__ == '__main__':
+    main()
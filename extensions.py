@@ -0,0 +1,64 @@
+"""Extension objects shared by the models and blueprints.
+
+They are created unbound and attached to an app by create_app(). Services
+that are expensive to import or start (the mailer, the AI client, the meal
+ranking engine, ...) are built per app on first use through ``lazy()``.
+"""
+import threading
+
+from flask import current_app
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from flask_sqlalchemy import SQLAlchemy
+from flask_talisman import Talisman
+from flask_wtf.csrf import CSRFProtect
+from itsdangerous import URLSafeTimedSerializer
+
+from database import RoutingSession
+from instrumentation import Instrumentation
+from password_hashing import PasswordHasher
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+jwt = JWTManager()
+csrf = CSRFProtect()
+cors = CORS()
+talisman = Talisman()
+hasher = PasswordHasher()
+instrumentation = Instrumentation()
+# The sqlite:// rate limit storage opens its database on the first check
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"]
+)
+
+_lazy_lock = threading.Lock()
+
+
+def lazy(name, factory):
+    """``current_app.extensions[name]``, created with ``factory(app)`` on first use"""
+    app = current_app._get_current_object()
+    service = app.extensions.get(name)
+    if service is None:
+        with _lazy_lock:
+            service = app.extensions.get(name)
+            if service is None:
+                service = factory(app)
+                app.extensions[name] = service
+    return service
+
+
+def get_mail():
+    def create(app):
+        from flask_mail import Mail
+        return Mail(app)
+    return lazy('mailer', create)
+
+
+def get_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+
+
+def get_audit():
+    return current_app.extensions['audit']
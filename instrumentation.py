@@ -0,0 +1,237 @@
+"""Request latency, SQL and upstream timings in Prometheus text format.
+
+Every request is timed into a histogram labelled by endpoint, method and
+status; SQL statements are counted and timed per request through engine
+events, and a request that repeats one statement METRICS_N_PLUS_ONE_THRESHOLD
+times or more is counted (and logged once per endpoint) as a likely N+1.
+Upstream assistant calls and bcrypt operations are timed too. ``render()``
+emits all of it, plus the stats the app's services already keep, for the
+``/metrics`` endpoint.
+
+Histograms keep fixed cumulative buckets behind a single lock, so recording
+costs a bisect and a few additions; nothing is sampled or stored per event.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in values:
+            lines.append(f'{self.name}{format_labels(self.labels, labels)} {format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = format_labels(self.labels, labels, f'le="{format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            label_text = format_labels(self.labels, labels)
+            lines.append(f'{self.name}_sum{label_text} {format_value(values[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+def gauges(prefix, documentation, rows, labels=()):
+    """Gauge lines for the numeric values of stats() dicts; ``rows`` is [(label values, stats)]"""
+    samples = {}
+    for values, stats in rows:
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                samples.setdefault(key, []).append(f'{format_labels(labels, values)} {format_value(value)}')
+    lines = []
+    for key in sorted(samples):
+        name = f'{prefix}_{key}'
+        lines += [f'# HELP {name} {documentation} ({key})', f'# TYPE {name} gauge']
+        lines += [name + sample for sample in samples[key]]
+    return lines
+
+
+class Instrumentation:
+    """Flask extension that owns the metrics and wires up the hooks"""
+
+    def __init__(self, prefix='nutrilearn'):
+        self.prefix = prefix
+        self.requests = Histogram(
+            f'{prefix}_http_request_duration_seconds', 'Time to produce a response',
+            labels=('endpoint', 'method', 'status'))
+        self.request_queries = Histogram(
+            f'{prefix}_http_request_sql_queries', 'SQL statements executed per request',
+            labels=('endpoint',), buckets=QUERY_COUNT_BUCKETS)
+        self.sql = Histogram(
+            f'{prefix}_sql_statement_duration_seconds', 'SQL statement execution time',
+            labels=('operation',), buckets=SQL_BUCKETS)
+        self.n_plus_one = Counter(
+            f'{prefix}_sql_n_plus_one_total', 'Requests that repeated one SQL statement past the threshold',
+            labels=('endpoint',))
+        self.upstream = Histogram(
+            f'{prefix}_upstream_duration_seconds', 'Calls to the upstream inference API',
+            labels=('operation', 'outcome'), buckets=UPSTREAM_BUCKETS)
+        self.bcrypt = Histogram(
+            f'{prefix}_bcrypt_duration_seconds', 'bcrypt hash/verify time, including queueing',
+            labels=('operation',), buckets=LATENCY_BUCKETS)
+        self._reported = set()
+
+    def init_app(self, app):
+        """Hook request timing and SQL events; call after db.init_app(app)"""
+        from extensions import db, hasher
+
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        hasher.observer = self.bcrypt.observe
+
+    def _start_request(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_statements = {}
+
+    def _finish_request(self, response):
+        started = g.pop('_metrics_started', None)
+        statements = g.pop('_metrics_statements', None)
+        if started is None:
+            return response
+        # Unmatched requests share one series so 404/405 scans can't add label values
+        endpoint = request.endpoint or 'unmatched'
+        method = request.method if request.endpoint else 'other'
+        self.requests.observe(time.perf_counter() - started, endpoint, method, str(response.status_code))
+        self.request_queries.observe(sum(statements.values()), endpoint)
+        repeated = max(statements.values(), default=0)
+        if repeated >= current_app.config['METRICS_N_PLUS_ONE_THRESHOLD']:
+            self.n_plus_one.inc(endpoint)
+            if endpoint not in self._reported:
+                self._reported.add(endpoint)
+                statement = max(statements, key=statements.get)
+                current_app.logger.warning(
+                    f"Possible N+1 in {endpoint}: statement ran {repeated} times: {statement[:200]}")
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_started'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('metrics_started', None)
+        if started is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        self.sql.observe(time.perf_counter() - started, operation)
+        if has_request_context():
+            statements = g.get('_metrics_statements')
+            if statements is not None:
+                statements[statement] = statements.get(statement, 0) + 1
+
+    @contextmanager
+    def time_upstream(self, operation):
+        """Time a call to the inference API, labelled ok or error"""
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            self.upstream.observe(time.perf_counter() - started, operation, outcome)
+
+    def timed_upstream(self, operation, fn):
+        def wrapper(*args, **kwargs):
+            with self.time_upstream(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def render(self, app):
+        """Prometheus text exposition of every metric and service stat"""
+        from database import pool_stats
+        from extensions import db, hasher
+
+        lines = []
+        for metric in (self.requests, self.request_queries, self.sql, self.n_plus_one, self.upstream, self.bcrypt):
+            lines += metric.render()
+        lines += gauges(f'{self.prefix}_bcrypt', 'Password hashing pool', [((), {'rejected': hasher.rejected})])
+        # Services that haven't been used yet are skipped rather than built for a scrape
+        for name, documentation in (
+            ('audit', 'Audit pipeline'),
+            ('response_cache', 'Assistant response cache'),
+            ('knowledge', 'Local knowledge base'),
+            ('inference', 'Inference dispatcher'),
+            ('assets', 'Static asset manifest'),
+            ('quiz_attempts', 'Quiz attempt writer'),
+            ('search', 'Search index'),
+            ('user_profiles', 'User profile cache'),
+        ):
+            service = app.extensions.get(name)
+            if service is not None:
+                lines += gauges(f'{self.prefix}_{name}', documentation, [((), service.stats())])
+        lines += gauges(f'{self.prefix}_db_pool', 'Database connection pool',
+                        [((bind,), stats) for bind, stats in pool_stats(db.engines).items()], labels=('bind',))
+        return '\n'.join(lines) + '\n'
+
@@ -0,0 +1,113 @@
+document.addEventListener('DOMContentLoaded', function() {
+  const toggle = document.getElementById('chatbotToggle');
+  const chatWindow = document.getElementById('chatbotWindow');
+  const closeButton = document.getElementById('chatbotClose');
+  const messages = document.getElementById('chatMessages');
+  const form = document.getElementById('chatForm');
+  const input = document.getElementById('chatInput');
+  let activeRequest = null;
+
+  if (!toggle || !chatWindow || !form) {
+    return;
+  }
+
+  function setOpen(open) {
+    chatWindow.classList.toggle('hidden', !open);
+    chatWindow.setAttribute('aria-hidden', open ? 'false' : 'true');
+    if (open) {
+      input.focus();
+    } else if (activeRequest) {
+      // Closing the widget cancels the reply; the server stops the upstream call
+      activeRequest.abort();
+    }
+  }
+
+  toggle.addEventListener('click', () => setOpen(chatWindow.classList.contains('hidden')));
+  closeButton.addEventListener('click', () => setOpen(false));
+
+  function addMessage(text, sender) {
+    const message = document.createElement('div');
+    message.className = 'message ' + sender;
+    message.textContent = text;
+    messages.appendChild(message);
+    messages.scrollTop = messages.scrollHeight;
+    return message;
+  }
+
+  // Parse "event:"/"data:" blocks out of the Server-Sent Events stream
+  function parseEvents(buffer, onEvent) {
+    const blocks = buffer.split('\n\n');
+    const rest = blocks.pop();
+    blocks.forEach(block => {
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          data += line.slice(5).trim();
+        }
+      });
+      if (data) {
+        onEvent(event, JSON.parse(data));
+      }
+    });
+    return rest;
+  }
+
+  form.addEventListener('submit', async function(e) {
+    e.preventDefault();
+    const prompt = input.value.trim();
+    if (!prompt || activeRequest) {
+      return;
+    }
+    input.value = '';
+    addMessage(prompt, 'user');
+    const reply = addMessage('…', 'ai');
+    let text = '';
+
+    activeRequest = new AbortController();
+    try {
+      const response = await fetch('/api/chatbot/stream', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': 'Bearer ' + localStorage.getItem('access_token')
+        },
+        body: JSON.stringify({ prompt }),
+        signal: activeRequest.signal
+      });
+
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        reply.textContent = data.error || data.msg || 'Sorry, something went wrong.';
+        return;
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffer = parseEvents(buffer + decoder.decode(value, { stream: true }), (event, data) => {
+          if (event === 'error') {
+            reply.textContent = data.error;
+          } else if (data.token) {
+            text += data.token;
+            reply.textContent = text;
+            messages.scrollTop = messages.scrollHeight;
+          }
+        });
+      }
+    } catch (error) {
+      if (error.name !== 'AbortError') {
+        reply.textContent = 'An error occurred. Please try again.';
+      }
+    } finally {
+      activeRequest = null;
+    }
+  });
+});
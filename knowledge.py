@@ -0,0 +1,201 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from ai_cache import QUESTION_WORDS, STOP_WORDS
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOP_WORDS or word in QUESTION_WORDS:
+            continue
+        # Light stemming so "vitamins"/"vitamin" and "servings"/"serving" match
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def quiz_documents(questions):
+    """Knowledge documents for quiz questions (dicts with question/options/answerIndex)"""
+    for item in questions:
+        try:
+            answer = item['options'][item['answerIndex']]
+        except (KeyError, IndexError, TypeError):
+            continue
+        text = f"{item['question']} {answer}"
+        yield text, f"{item['question']} Answer: {answer}."
+
+
+def meal_documents(meals):
+    """Knowledge documents for Meal rows"""
+    for meal in meals:
+        macros = ', '.join(f"{value:g} g {field}" for field, value in meal.nutrient_dict().items())
+        text = f"{meal.name} {meal.category} {meal.description or ''}"
+        answer = f"{meal.name} ({meal.category}, {meal.calories} kcal"
+        answer += f"; {macros})" if macros else ")"
+        if meal.description:
+            answer += f": {meal.description}"
+        yield text, answer
+
+
+class KnowledgeIndex:
+    """One built BM25 index; never changed after construction, so searches need no lock"""
+
+    __slots__ = ('postings', 'idf', 'answers', 'lengths', 'average_length', 'version')
+
+    def __init__(self, postings, idf, answers, lengths, version=None):
+        self.postings = postings
+        self.idf = idf
+        self.answers = answers
+        self.lengths = lengths
+        self.average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        self.version = version
+
+
+class KnowledgeBase:
+    """BM25 index over the app's own nutrition content.
+
+    ``answer(prompt)`` returns a stored answer when the best match covers at
+    least ``min_confidence`` of the query's IDF weight, otherwise None so the
+    caller can fall back to remote inference. ``refresh`` rebuilds the index
+    on a background thread; the previous index keeps answering until the new
+    one replaces it in a single swap.
+    """
+
+    # Seconds before a rebuild that failed is tried again for the same version
+    RETRY_INTERVAL = 30.0
+
+    def __init__(self, min_confidence=0.75, k1=1.2, b=0.75, logger=None):
+        self.min_confidence = min_confidence
+        self.k1 = k1
+        self.b = b
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._index = KnowledgeIndex({}, {}, [], [])
+        self._worker = None
+        self._failed = (None, 0.0)  # (version, monotonic time) of the last failed rebuild
+        self.rebuilds = 0
+        self.lookups = 0
+        self.served = 0
+        self._latencies = deque(maxlen=2048)
+
+    def __len__(self):
+        return len(self._index.answers)
+
+    @property
+    def version(self):
+        return self._index.version
+
+    def build(self, documents, version=None):
+        """Replace the index with ``documents``, an iterable of (text, answer) pairs"""
+        postings = defaultdict(list)
+        answers, lengths = [], []
+        for text, answer in documents:
+            doc = len(answers)
+            tokens = tokenize(text)
+            for term, count in Counter(tokens).items():
+                postings[term].append((doc, count))
+            answers.append(answer)
+            lengths.append(len(tokens))
+        total = len(answers)
+        idf = {term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in postings.items()}
+        index = KnowledgeIndex(dict(postings), idf, answers, lengths, version)
+        with self._lock:
+            self._index = index
+            self.rebuilds += 1
+
+    def refresh(self, version, documents):
+        """Rebuild from ``documents()`` in the background unless the index is already at ``version``"""
+        with self._lock:
+            if self._index.version == version or self._worker is not None:
+                return
+            failed_version, failed_at = self._failed
+            if failed_version == version and time.monotonic() - failed_at < self.RETRY_INTERVAL:
+                return
+            self._worker = threading.Thread(target=self._rebuild, args=(version, documents),
+                                            name='knowledge-rebuild', daemon=True)
+            self._worker.start()
+
+    def _rebuild(self, version, documents):
+        try:
+            self.build(documents(), version=version)
+        except Exception as e:
+            with self._lock:
+                self._failed = (version, time.monotonic())
+            if self.logger is not None:
+                self.logger.error(f"Error rebuilding knowledge base: {str(e)}")
+        finally:
+            with self._lock:
+                self._worker = None
+
+    def search(self, prompt):
+        """Best (confidence, answer) for ``prompt``, or (0.0, None)"""
+        index = self._index  # one snapshot for the whole search, however often build() swaps it
+        terms = set(tokenize(prompt))
+        if not terms or not index.answers:
+            return 0.0, None
+        unseen_idf = math.log(1 + (len(index.answers) + 0.5) / 0.5)
+        scores = defaultdict(float)
+        matched = defaultdict(float)
+        query_weight = 0.0
+        for term in terms:
+            idf = index.idf.get(term)
+            if idf is None:
+                query_weight += unseen_idf
+                continue
+            query_weight += idf
+            for doc, tf in index.postings[term]:
+                norm = tf + self.k1 * (1 - self.b + self.b * index.lengths[doc] / index.average_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / norm
+                matched[doc] += idf
+        if not scores:
+            return 0.0, None
+        best = max(scores, key=scores.get)
+        return matched[best] / query_weight, index.answers[best]
+
+    def answer(self, prompt):
+        started = time.perf_counter()
+        confidence, answer = self.search(prompt)
+        local = answer is not None and confidence >= self.min_confidence
+        with self._lock:
+            self.lookups += 1
+            if local:
+                self.served += 1
+            self._latencies.append(time.perf_counter() - started)
+        return answer if local else None
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            lookups, served = self.lookups, self.served
+
+        def percentile(pct):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000, 3)
+
+        return {
+            'documents': len(self),
+            'rebuilds': self.rebuilds,
+            'rebuilding': self._worker is not None,
+            'lookups': lookups,
+            'served_locally': served,
+            'local_fraction': round(served / lookups, 4) if lookups else 0.0,
+            'p50_ms': percentile(50),
+            'p99_ms': percentile(99),
+        }
+
+
+def load_quiz_file(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
@@ -0,0 +1,144 @@
+"""SQLite-backed rate limit storage shared by every worker on a host.
+
+Importing this module registers the ``sqlite://`` scheme with the ``limits``
+library, so Flask-Limiter can use it through RATELIMIT_STORAGE_URI, e.g.
+``sqlite:///instance/ratelimit.db`` (relative) or ``sqlite:////var/run/app/ratelimit.db``.
+Each sliding-window check is a single short IMMEDIATE transaction, which
+makes check-and-increment atomic across processes.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+
+CLEANUP_EVERY = 1000  # writes between purges of expired counters
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport):
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        path = uri.split('://', 1)[1]
+        self.path = path[1:] if path.startswith('/') else path
+        self.timeout = float(options.get('timeout', 5.0))
+        self._local = threading.local()
+        self._writes = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # One connection per thread and per process (connections must not cross a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Opened on first use, so creating the app touches no files
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _get(self, conn, key, now):
+        row = conn.execute('SELECT count, expires_at FROM rate_limit WHERE key = ?', (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return 0, now
+        return row
+
+    def _incr(self, conn, key, expiry, amount, now):
+        conn.execute(
+            'INSERT INTO rate_limit (key, count, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            'count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, '
+            'expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END',
+            (key, amount, now + expiry, now, now),
+        )
+        self._writes += 1
+        if self._writes % CLEANUP_EVERY == 0:
+            conn.execute('DELETE FROM rate_limit WHERE expires_at <= ?', (now,))
+        return self._get(conn, key, now)[0]
+
+    # Fixed window
+
+    def incr(self, key, expiry, amount=1):
+        with self._transaction() as conn:
+            return self._incr(conn, key, expiry, amount, time.time())
+
+    def get(self, key):
+        return self._get(self._connection(), key, time.time())[0]
+
+    def get_expiry(self, key):
+        now = time.time()
+        return self._get(self._connection(), key, now)[1]
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            return conn.execute('DELETE FROM rate_limit').rowcount
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM rate_limit WHERE key = ?', (key,))
+
+    # Sliding window counter
+
+    def _window_keys(self, key, expiry, now):
+        window = int(now // expiry)
+        return f'{key}/{window - 1}', f'{key}/{window}'
+
+    def _window(self, conn, key, expiry, now):
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)[0]
+        current_count = self._get(conn, current_key, now)[0]
+        # Share of the previous window still inside the sliding interval, in seconds
+        previous_ttl = (1 - (now / expiry) % 1) * expiry if previous_count else 0.0
+        current_ttl = (1 - (now / expiry) % 1) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            previous_count, previous_ttl, current_count, _ = self._window(conn, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            self._incr(conn, self._window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._window(self._connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self._window_keys(key, expiry, time.time())
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM rate_limit WHERE key IN (?, ?)', (previous_key, current_key))
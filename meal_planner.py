@@ -0,0 +1,152 @@
+"""Multi-day meal plans that hit daily calorie and macro targets.
+
+Targets come from the user's weight, age and dietary goals (see
+RankingRequest for the calorie estimate). The engine shortlists the meals
+that best fit one slot's share of those targets in each category, after the
+usual preference, allergy and bound filters, so the solver only looks at a
+few hundred candidates however large the catalog is. Each day is then filled
+greedily, slot by slot, and improved by swapping single meals while any swap
+lowers the day's weighted squared deviation from target. A meal appears at
+most once a day, not on consecutive days when the shortlist allows it, and at
+most ``max_repeats`` times in the whole plan. Those two limits are never
+relaxed: when the shortlist runs out, the remaining slots stay empty and the
+day has fewer meals.
+"""
+import numpy as np
+
+from meal_ranking import CALORIES, CARBS, FAT, MEALS_PER_DAY, PROTEIN, RankingRequest
+
+# (keywords, share of calories from protein, carbs, fat), first match wins
+MACRO_SPLITS = [
+    (('keto',), (0.25, 0.05, 0.70)),
+    (('low-carb',), (0.30, 0.20, 0.50)),
+    (('muscle', 'gain', 'protein'), (0.30, 0.45, 0.25)),
+    (('weight-loss', 'lose'), (0.30, 0.40, 0.30)),
+]
+DEFAULT_SPLIT = (0.20, 0.50, 0.30)
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])  # protein, carbs, fat
+
+TARGET_COLUMNS = [CALORIES, PROTEIN, CARBS, FAT]
+# Calories matter most; macros are allowed to drift a little more
+TARGET_WEIGHTS = np.array([1.0, 0.6, 0.3, 0.3])
+LOCAL_SEARCH_PASSES = 8
+
+
+def plan_targets(profile=None, preferences='', calories=None):
+    """Daily ``{'calories', 'protein', 'carbs', 'fat'}`` targets (kcal and grams)"""
+    request = RankingRequest(profile, preferences)
+    daily = float(calories) if calories else request.daily_calories
+    wanted = f"{getattr(profile, 'dietary_goals', None) or ''} {preferences or ''}".lower()
+    split = DEFAULT_SPLIT
+    for keywords, candidate in MACRO_SPLITS:
+        if any(keyword in wanted for keyword in keywords):
+            split = candidate
+            break
+    grams = np.array(split) * daily / KCAL_PER_GRAM
+    # Never below the weight-based protein floor; carbs and fat share what's left
+    protein = max(grams[0], request.protein_target * MEALS_PER_DAY)
+    remaining = max(daily - protein * 4.0, 0.0)
+    carb_share = split[1] / (split[1] + split[2])
+    return {
+        'calories': round(daily, 1),
+        'protein': round(protein, 1),
+        'carbs': round(remaining * carb_share / 4.0, 1),
+        'fat': round(remaining * (1 - carb_share) / 9.0, 1),
+    }
+
+
+class MealPlanner:
+    """Plans over one engine's catalog; cheap to create per request"""
+
+    def __init__(self, engine, per_category=40):
+        self.engine = engine
+        self.per_category = per_category
+
+    def plan(self, profile=None, days=7, meals_per_day=3, preferences='', calories=None, max_repeats=2,
+             bounds=None):
+        """``(targets, plan)``: plan is a list of days, each a list of up to ``meals_per_day`` ``(meal_id, nutrients)``"""
+        targets = plan_targets(profile, preferences, calories)
+        target = np.array([targets['calories'], targets['protein'], targets['carbs'], targets['fat']])
+        scale = np.maximum(target, 1.0)
+        slot = target / meals_per_day
+
+        def slot_fit(nutrients):
+            deviation = (nutrients[TARGET_COLUMNS].T - slot) / np.maximum(slot, 1.0)
+            return -(deviation ** 2) @ TARGET_WEIGHTS
+
+        ids, nutrients = self.engine.candidates(
+            slot_fit, profile, preferences=preferences, bounds=bounds, per_category=self.per_category
+        )
+        if len(ids) == 0:
+            return targets, []
+        values = nutrients[:, TARGET_COLUMNS]
+
+        def cost(totals):
+            return (((totals - target) / scale) ** 2) @ TARGET_WEIGHTS
+
+        uses = np.zeros(len(ids), dtype=np.int64)
+        plan = []
+        previous = []
+        for _ in range(days):
+            day = self._fill_day(values, slot, meals_per_day, uses, max_repeats, previous, cost)
+            day = self._improve_day(values, day, uses, max_repeats, previous, cost)
+            plan.append(day)
+            previous = day
+        return targets, [[(int(ids[i]), nutrients[i]) for i in day] for day in plan]
+
+    def _allowed(self, uses, max_repeats, day, previous, keep=None):
+        """Candidate masks from strictest to loosest; the first with any meal left is used.
+
+        Only the consecutive-day rule is ever dropped; every mask keeps meals
+        under ``max_repeats`` and out of ``day``.
+        """
+        in_day = np.zeros(len(uses), dtype=bool)
+        in_day[[i for i in day if i != keep]] = True
+        recent = np.zeros(len(uses), dtype=bool)
+        recent[previous] = True
+        fresh = uses < max_repeats
+        if keep is not None:
+            fresh[keep] = True
+        return (fresh & ~in_day & ~recent, fresh & ~in_day)
+
+    def _fill_day(self, values, slot, meals_per_day, uses, max_repeats, previous, cost):
+        day = []
+        total = np.zeros(len(slot))
+        for position in range(meals_per_day):
+            # Judge each candidate as if the remaining slots will land on target
+            projected = total + values + slot * (meals_per_day - position - 1)
+            costs = cost(projected)
+            choice = None
+            for allowed in self._allowed(uses, max_repeats, day, previous):
+                if allowed.any():
+                    choice = int(np.argmin(np.where(allowed, costs, np.inf)))
+                    break
+            if choice is None:
+                break  # every candidate is in this day or used max_repeats times
+            day.append(choice)
+            uses[choice] += 1
+            total += values[choice]
+        return day
+
+    def _improve_day(self, values, day, uses, max_repeats, previous, cost):
+        total = values[day].sum(axis=0)
+        current = cost(total)
+        for _ in range(LOCAL_SEARCH_PASSES):
+            improved = False
+            for position, meal in enumerate(day):
+                costs = cost(total - values[meal] + values)
+                allowed = self._allowed(uses, max_repeats, day, previous, keep=meal)[0]
+                allowed[meal] = False
+                if not allowed.any():
+                    continue
+                best = int(np.argmin(np.where(allowed, costs, np.inf)))
+                if costs[best] < current - 1e-9:
+                    uses[meal] -= 1
+                    uses[best] += 1
+                    total = total - values[meal] + values[best]
+                    current = costs[best]
+                    day[position] = best
+                    improved = True
+            if not improved:
+                break
+        return day
@@ -0,0 +1,366 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from allergens import parse_allergies
+
+# Column order of the nutrient matrix
+CALORIES, PROTEIN, CARBS, FAT, FIBER = range(5)
+NUTRIENT_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+
+# Preference keywords mapped to the meal categories they allow (checked in order)
+PREFERENCE_CATEGORIES = [
+    ('vegetarian', ('vegetarian', 'vegan', 'salad')),
+    ('vegan', ('vegan',)),
+    ('low-carb', ('low-carb',)),
+    ('high-protein', ('high-protein',)),
+]
+
+# Masks kept for allergy terms outside the allergen vocabulary; the least recently used goes first
+TERM_MASK_CACHE_SIZE = 64
+
+DEFAULT_DAILY_CALORIES = 2000.0
+MEALS_PER_DAY = 3
+
+
+def nutrient_bounds(args):
+    """Read ``min_<field>``/``max_<field>`` query arguments into ``{field: (minimum, maximum)}``"""
+    bounds = {}
+    for field in NUTRIENT_FIELDS:
+        minimum = args.get('min_' + field, type=float)
+        maximum = args.get('max_' + field, type=float)
+        if minimum is not None or maximum is not None:
+            bounds[field] = (minimum, maximum)
+    return bounds
+
+
+class RankingRequest:
+    """Per-request scoring targets derived from a user profile and query parameters"""
+
+    def __init__(self, profile=None, preferences='', calories=None, bounds=None, category=None):
+        goals = (getattr(profile, 'dietary_goals', None) or '').lower()
+        preferences = (preferences or '').lower()
+        wanted = goals + ' ' + preferences
+        weight = getattr(profile, 'weight', None)
+        age = getattr(profile, 'age', None)
+
+        # Rough maintenance estimate: 30 kcal per kg, tapering slowly after 30
+        daily = weight * 30.0 if weight else DEFAULT_DAILY_CALORIES
+        if age and age > 30:
+            daily -= min(age - 30, 40) * 5.0
+        if 'weight-loss' in wanted or 'lose' in wanted:
+            daily *= 0.8
+        elif 'muscle' in wanted or 'gain' in wanted:
+            daily *= 1.1
+        self.daily_calories = daily
+
+        self.calorie_limit = None
+        if calories:
+            # Same cutoff the endpoint has always applied
+            if 'weight-loss' in preferences or calories < 500:
+                self.calorie_limit = calories
+            else:
+                self.calorie_limit = calories + 200
+            self.calorie_target = float(calories)
+        else:
+            self.calorie_target = max(daily / MEALS_PER_DAY, 150.0)
+
+        high_protein = 'protein' in wanted or 'muscle' in wanted
+        protein_per_kg = 1.6 if high_protein else 0.8
+        self.protein_target = max((weight or 70.0) * protein_per_kg / MEALS_PER_DAY, 10.0)
+
+        self.categories = None
+        for keyword, categories in PREFERENCE_CATEGORIES:
+            if keyword in preferences:
+                self.categories = categories
+                break
+        if category:
+            # An explicit category filter narrows whatever the preferences allow
+            if self.categories is None or category in self.categories:
+                self.categories = (category,)
+            else:
+                self.categories = ()
+
+        # Allergies in the allergen vocabulary become one bitmask; anything else is matched as text
+        self.allergen_mask, self.allergies = parse_allergies(getattr(profile, 'allergies', None) or '')
+        self.bounds = bounds or {}
+
+        # Goal-dependent weights for the linear score
+        self.w_protein = 1.0 if high_protein else 0.4
+        self.w_fiber = 0.6 if 'weight-loss' in wanted or 'fiber' in wanted else 0.3
+        self.w_carbs = 1.0 if 'low-carb' in wanted or 'keto' in wanted else 0.2
+        self.w_fat = 0.8 if 'heart' in wanted or 'low-fat' in wanted else 0.2
+
+
+class MealRankingEngine:
+    """Columnar, in-memory copy of the Meal catalog that scores every meal in one pass.
+
+    The catalog is loaded once through ``loader`` (an iterable of
+    ``(id, calories, protein, carbs, fat, fiber, allergen_mask, category, name,
+    description)`` rows) and kept current with ``upsert``/``remove`` as meals are committed.
+    """
+
+    def __init__(self, loader=None, capacity=1024):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.version = None  # catalog version the caller last loaded, see invalidate()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self._size = 0
+        self._dead = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._nutrients = np.zeros((len(NUTRIENT_FIELDS), capacity), dtype=np.float32)
+        self._category = np.zeros(capacity, dtype=np.int32)
+        self._allergens = np.zeros(capacity, dtype=np.uint32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._texts = [None] * capacity
+        self._row_of = {}
+        self._category_codes = {}
+        self._term_masks = OrderedDict()
+
+    def __len__(self):
+        return self._size - self._dead
+
+    # Loading and incremental maintenance
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load(self._loader() if self._loader else [])
+
+    def load(self, rows):
+        """Rebuild the whole catalog from ``rows``"""
+        with self._lock:
+            self._allocate(1024)
+            for row in rows:
+                self._put(row)
+            self._loaded = True
+
+    def invalidate(self):
+        """Force a full reload on the next ranking call"""
+        with self._lock:
+            self._loaded = False
+
+    def upsert(self, row):
+        with self._lock:
+            if self._loaded:
+                self._put(row)
+
+    def remove(self, meal_id):
+        with self._lock:
+            row = self._row_of.pop(meal_id, None)
+            if row is None:
+                return
+            self._alive[row] = False
+            self._texts[row] = None
+            self._dead += 1
+            if self._dead > 1024 and self._dead * 2 > self._size:
+                self._compact()
+
+    def _code(self, category):
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self._category_codes)
+        return code
+
+    def _put(self, row):
+        meal_id = row[0]
+        category, name, description = row[-3:]
+
+        index = self._row_of.get(meal_id)
+        if index is None:
+            if self._size == len(self._ids):
+                self._grow(len(self._ids) * 2)
+            index = self._size
+            self._size += 1
+            self._row_of[meal_id] = index
+
+        self._ids[index] = meal_id
+        self._nutrients[:, index] = [value or 0 for value in row[1:1 + len(NUTRIENT_FIELDS)]]
+        self._allergens[index] = row[1 + len(NUTRIENT_FIELDS)] or 0
+        self._category[index] = self._code((category or '').lower())
+        self._alive[index] = True
+        text = f"{name or ''} {description or ''}".lower()
+        self._texts[index] = text
+        for term, mask in self._term_masks.items():
+            mask[index] = term in text
+
+    def _grow(self, capacity):
+        size = len(self._ids)
+        self._ids = np.concatenate([self._ids, np.zeros(capacity - size, dtype=np.int64)])
+        self._nutrients = np.concatenate(
+            [self._nutrients, np.zeros((len(NUTRIENT_FIELDS), capacity - size), dtype=np.float32)], axis=1)
+        self._category = np.concatenate([self._category, np.zeros(capacity - size, dtype=np.int32)])
+        self._allergens = np.concatenate([self._allergens, np.zeros(capacity - size, dtype=np.uint32)])
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - size, dtype=bool)])
+        self._texts.extend([None] * (capacity - size))
+        for term, mask in list(self._term_masks.items()):
+            self._term_masks[term] = np.concatenate([mask, np.zeros(capacity - size, dtype=bool)])
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._ids = self._ids[keep].copy()
+        self._nutrients = self._nutrients[:, keep].copy()
+        self._category = self._category[keep].copy()
+        self._allergens = self._allergens[keep].copy()
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._texts = [self._texts[i] for i in keep]
+        self._term_masks = OrderedDict((term, mask[keep].copy()) for term, mask in self._term_masks.items())
+        self._row_of = {int(meal_id): i for i, meal_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._dead = 0
+        if self._size == 0:
+            self._grow(1024)
+
+    def _term_mask(self, term):
+        # Built for an allergy term outside the allergen vocabulary, then maintained by _put while it
+        # stays among the TERM_MASK_CACHE_SIZE most recently used, so arbitrary terms can't grow memory
+        mask = self._term_masks.get(term)
+        if mask is not None:
+            self._term_masks.move_to_end(term)
+            return mask
+        mask = np.zeros(len(self._ids), dtype=bool)
+        for i in range(self._size):
+            text = self._texts[i]
+            if text is not None and term in text:
+                mask[i] = True
+        self._term_masks[term] = mask
+        while len(self._term_masks) > TERM_MASK_CACHE_SIZE:
+            self._term_masks.popitem(last=False)
+        return mask
+
+    # Ranking
+
+    def rank(self, profile=None, preferences='', calories=None, limit=10, bounds=None, category=None, after=None):
+        """Return the ``limit`` best ``(meal_id, score)`` pairs for a profile.
+
+        Results are ordered by score, then id. ``after`` is the ``(score, id)``
+        of the last meal on the previous page; only meals ranked below it are
+        returned, so every page costs one scoring pass however deep it is.
+        """
+        self.ensure_loaded()
+        request = RankingRequest(profile, preferences, calories, bounds, category)
+        with self._lock:
+            n = self._size
+            if n == 0 or limit <= 0:
+                return []
+            mask = self._mask(request, n)
+            if not mask.any():
+                return []
+            scores = self._score(request, n)
+            ids = self._ids[:n].copy()
+            if after is not None:
+                last_score, last_id = after
+                mask &= (scores < last_score) | ((scores == last_score) & (ids > last_id))
+                if not mask.any():
+                    return []
+            scores[~mask] = -np.inf
+            matched = int(np.count_nonzero(mask))
+
+        limit = min(limit, matched)
+        if limit < n:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            # Take every meal tied with the cut-off too, so ties break by id rather
+            # than by partition order and pages line up with their cursors
+            top = np.flatnonzero(scores >= scores[top].min())
+        else:
+            top = np.flatnonzero(mask)
+        top = top[np.lexsort((ids[top], -scores[top]))][:limit]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def candidates(self, score, profile=None, preferences='', bounds=None, per_category=40):
+        """The ``per_category`` best meals of each category by ``score(nutrients)``.
+
+        ``score`` gets the nutrient matrix (one column per meal, rows in
+        NUTRIENT_FIELDS order) and returns one value per meal; preferences,
+        allergies and bounds filter as in rank(). Returns ``(ids, nutrients)``
+        with one float64 nutrient row per candidate.
+        """
+        self.ensure_loaded()
+        request = RankingRequest(profile, preferences, None, bounds)
+        with self._lock:
+            n = self._size
+            mask = self._mask(request, n) if n else np.zeros(0, dtype=bool)
+            if not mask.any():
+                return np.zeros(0, dtype=np.int64), np.zeros((0, len(NUTRIENT_FIELDS)))
+            scores = np.asarray(score(self._nutrients[:, :n]), dtype=np.float64)
+            categories = self._category[:n]
+            picked = []
+            for code in np.unique(categories[mask]):
+                rows = np.flatnonzero(mask & (categories == code))
+                if len(rows) > per_category:
+                    rows = rows[np.argpartition(-scores[rows], per_category - 1)[:per_category]]
+                picked.append(rows)
+            rows = np.sort(np.concatenate(picked))
+            return self._ids[rows].copy(), self._nutrients[:, rows].T.astype(np.float64)
+
+    def _mask(self, request, n):
+        """Meals ``request`` allows; call with the lock held"""
+        mask = self._alive[:n].copy()
+        if request.categories is not None:
+            codes = [self._category_codes[c] for c in request.categories if c in self._category_codes]
+            mask &= np.isin(self._category[:n], codes)
+        cal = self._nutrients[CALORIES, :n]
+        if request.calorie_limit is not None:
+            mask &= cal <= request.calorie_limit
+        for field, (minimum, maximum) in request.bounds.items():
+            column = self._nutrients[NUTRIENT_FIELDS.index(field), :n]
+            if minimum is not None:
+                mask &= column >= minimum
+            if maximum is not None:
+                mask &= column <= maximum
+        if request.allergen_mask:
+            mask &= (self._allergens[:n] & np.uint32(request.allergen_mask)) == 0
+        for term in request.allergies:
+            mask &= ~self._term_mask(term)[:n]
+        return mask
+
+    def _score(self, request, n):
+        # Contiguous column slices; cheaper than gathering the candidate rows
+        nutrients = self._nutrients[:, :n]
+        cal = nutrients[CALORIES]
+        energy = np.maximum(cal, 1.0)
+        score = np.abs(cal - request.calorie_target)
+        score *= -1.0 / request.calorie_target
+        score += request.w_protein * np.minimum(nutrients[PROTEIN] / request.protein_target, 1.5)
+        score += request.w_fiber * np.minimum(nutrients[FIBER] / 10.0, 1.5)
+        score -= request.w_carbs * np.minimum(nutrients[CARBS] * 4.0 / energy, 1.0)
+        score -= request.w_fat * np.minimum(nutrients[FAT] * 9.0 / energy, 1.0)
+        return score
+
+
+def meal_row(meal):
+    """Engine row for a Meal instance"""
+    return (meal.id, meal.calories, meal.protein, meal.carbs, meal.fat, meal.fiber, meal.allergen_mask,
+            meal.category, meal.name, meal.description)
+
+
+def track_meal_changes(session, model, engine):
+    """Keep ``engine`` in sync with committed inserts, updates and deletes of ``model``"""
+    from sqlalchemy import event
+
+    @event.listens_for(session, 'after_flush')
+    def collect_meal_changes(session, flush_context):
+        pending = session.info.setdefault('meal_ranking_changes', [])
+        for obj in session.new.union(session.dirty):
+            if isinstance(obj, model):
+                pending.append(('upsert', meal_row(obj)))
+        for obj in session.deleted:
+            if isinstance(obj, model):
+                pending.append(('remove', obj.id))
+
+    @event.listens_for(session, 'after_commit')
+    def apply_meal_changes(session):
+        for action, payload in session.info.pop('meal_ranking_changes', []):
+            if action == 'upsert':
+                engine.upsert(payload)
+            else:
+                engine.remove(payload)
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_meal_changes(session):
+        session.info.pop('meal_ranking_changes', None)
@@ -0,0 +1,190 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+import os
+from allergens import names_of
+from database import read_only
+from extensions import db, csrf, lazy
+from models import Meal
+from pagination import InvalidQuery, decode_cursor, page_limit, parse_fields, split_page
+from profile_routes import current_profile
+from version_stamp import VersionStamp, track_changes
+
+meal_bp = Blueprint('meals', __name__)
+
+MEAL_FIELDS = ('id', 'name', 'calories', 'nutrients', 'category', 'description', 'allergens')
+MEAL_COLUMNS = {
+    'id': (Meal.id,),
+    'name': (Meal.name,),
+    'calories': (Meal.calories,),
+    'nutrients': tuple(getattr(Meal, field) for field in Meal.MACRO_FIELDS),
+    'category': (Meal.category,),
+    'description': (Meal.description,),
+    'allergens': (Meal.allergen_mask,),
+}
+
+@meal_bp.record_once
+def setup(state):
+    # Bulk writes (catalog imports, Query.update()/delete()) bump the catalog
+    # stamp, which also rebuilds the search index; row-level commits, which
+    # search already journals, bump only the row stamp
+    app = state.app
+    meal_version = VersionStamp(os.path.join(app.instance_path, 'meal_catalog.version'))
+    app.extensions['meal_version'] = meal_version
+    track_changes(db.session, Meal, meal_version, flushes=False)
+    meal_row_version = VersionStamp(os.path.join(app.instance_path, 'meal_rows.version'))
+    app.extensions['meal_row_version'] = meal_row_version
+    track_changes(db.session, Meal, meal_row_version)
+
+def get_meal_version():
+    return current_app.extensions['meal_version']
+
+def meal_catalog_version():
+    """Both meal stamps; a change in either means this worker's in-memory copy of the catalog is stale"""
+    return get_meal_version().current(), current_app.extensions['meal_row_version'].current()
+
+def load_meal_rows():
+    return db.session.query(
+        Meal.id, Meal.calories, Meal.protein, Meal.carbs, Meal.fat, Meal.fiber, Meal.allergen_mask,
+        Meal.category, Meal.name, Meal.description
+    ).yield_per(5000)
+
+def get_meal_engine():
+    """In-memory meal ranking engine, kept in sync with committed Meal changes"""
+    def create(app):
+        # numpy is only imported once meals are first ranked
+        from meal_ranking import MealRankingEngine, track_meal_changes
+        engine = MealRankingEngine(load_meal_rows)
+        track_meal_changes(db.session, Meal, engine)
+        return engine
+    engine = lazy('meal_engine', create)
+    # Other workers' commits only reach this engine through the stamps (the
+    # committing worker applies them directly, and then reloads once as well)
+    version = meal_catalog_version()
+    if engine.version != version:
+        engine.invalidate()
+        engine.version = version
+    return engine
+
+@meal_bp.route('/api/meals', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_meals():
+    """Meals for the authenticated user, best-ranked first (``sort=score``) or by id (``sort=id``)"""
+    from meal_ranking import nutrient_bounds
+
+    sort = request.args.get('sort', 'score')
+    try:
+        if sort not in ('score', 'id'):
+            raise InvalidQuery("sort must be 'score' or 'id'")
+        after = decode_cursor(request.args.get('cursor'), ((int, float), int) if sort == 'score' else (int,))
+        limit = page_limit(request.args, 10, 50)
+        fields = parse_fields(request.args, MEAL_FIELDS)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        category = request.args.get('category')
+        bounds = nutrient_bounds(request.args)
+        user = current_profile()
+        if sort == 'id':
+            return jsonify(browse_meals(fields, limit, after, category, bounds, user.allergies if user else None))
+
+        preferences = request.args.get('preferences', '').lower()
+        calories = request.args.get('calories', type=int)
+        ranked = get_meal_engine().rank(user, preferences=preferences, calories=calories, limit=limit + 1,
+                                        bounds=bounds, category=category, after=after)
+        ranked, next_cursor = split_page(ranked, limit, lambda item: (item[1], item[0]))
+
+        query = db.session.query(*meal_columns(fields)).filter(Meal.id.in_([meal_id for meal_id, _ in ranked]))
+        rows = {row.id: row for row in query}
+        meal_list = []
+        for meal_id, score in ranked:
+            row = rows.get(meal_id)
+            if row is None:
+                continue
+            meal = meal_fields(row, fields)
+            meal['score'] = round(score, 4)
+            meal_list.append(meal)
+
+        return jsonify({'meals': meal_list, 'next_cursor': next_cursor})
+    except Exception as e:
+        current_app.logger.error(f"Error fetching meals: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def browse_meals(fields, limit, after, category, bounds, allergies=None):
+    """One page of the catalog in id order, filtered in SQL"""
+    query = Meal.filter_nutrients(db.session.query(*meal_columns(fields)), category, bounds)
+    query = Meal.exclude_allergies(query, allergies).order_by(Meal.id)
+    if after is not None:
+        query = query.filter(Meal.id > after[0])
+    rows, next_cursor = split_page(query.limit(limit + 1).all(), limit, lambda row: (row.id,))
+    return {'meals': [meal_fields(row, fields) for row in rows], 'next_cursor': next_cursor}
+
+def meal_columns(fields):
+    """Only the columns behind the requested fields, so e.g. descriptions aren't loaded unless asked for"""
+    return [column for field in fields for column in MEAL_COLUMNS[field]]
+
+def meal_fields(row, fields):
+    meal = {}
+    for field in fields:
+        if field == 'nutrients':
+            meal['nutrients'] = {
+                name: getattr(row, name) for name in Meal.MACRO_FIELDS if getattr(row, name) is not None
+            }
+        elif field == 'allergens':
+            meal['allergens'] = names_of(row.allergen_mask or 0)
+        else:
+            meal[field] = getattr(row, field)
+    return meal
+
+@meal_bp.route('/api/meal-plan', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def create_meal_plan():
+    """Plan ``days`` (1-14) days of meals around the user's calorie and macro targets"""
+    from meal_planner import MealPlanner
+
+    data = request.get_json() or {}
+    try:
+        days = int(data.get('days', 7))
+        meals_per_day = int(data.get('meals_per_day', 3))
+        max_repeats = int(data.get('max_repeats', 2))
+        calories = float(data['calories']) if data.get('calories') is not None else None
+        preferences = str(data.get('preferences') or '').lower()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'days, meals_per_day, max_repeats and calories must be numbers'}), 400
+    if not 1 <= days <= 14 or not 1 <= meals_per_day <= 6 or max_repeats < 1:
+        return jsonify({'error': 'days must be 1-14, meals_per_day 1-6 and max_repeats at least 1'}), 400
+    if calories is not None and not 800 <= calories <= 6000:
+        return jsonify({'error': 'calories must be between 800 and 6000'}), 400
+
+    try:
+        user = current_profile()
+        planner = MealPlanner(get_meal_engine(), per_category=current_app.config['MEAL_PLAN_CANDIDATES'])
+        targets, plan = planner.plan(user, days=days, meals_per_day=meals_per_day, preferences=preferences,
+                                     calories=calories, max_repeats=max_repeats)
+        if not plan:
+            return jsonify({'error': 'No meals match these preferences'}), 404
+
+        meal_ids = {meal_id for day in plan for meal_id, _ in day}
+        names = dict(db.session.query(Meal.id, Meal.name).filter(Meal.id.in_(meal_ids)))
+        plan_days = []
+        for number, day in enumerate(plan, start=1):
+            meals = [{
+                'id': meal_id,
+                'name': names.get(meal_id),
+                'calories': round(float(values[0]), 1),
+                'nutrients': {field: round(float(value), 1) for field, value in zip(Meal.MACRO_FIELDS, values[1:])},
+            } for meal_id, values in day]
+            totals = {'calories': round(sum(meal['calories'] for meal in meals), 1)}
+            for field in Meal.MACRO_FIELDS:
+                totals[field] = round(sum(meal['nutrients'][field] for meal in meals), 1)
+            plan_days.append({'day': number, 'meals': meals, 'totals': totals})
+        # max_repeats is never relaxed; slots left without an eligible meal are reported instead
+        unfilled = days * meals_per_day - sum(len(day['meals']) for day in plan_days)
+        return jsonify({'targets': targets, 'days': plan_days, 'unfilled_slots': unfilled})
+    except Exception as e:
+        current_app.logger.error(f"Error creating meal plan: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -0,0 +1,107 @@
+import hmac
+import ipaddress
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from attempt_routes import get_attempt_recorder
+from chatbot_routes import get_inference, get_knowledge, get_response_cache
+from database import pool_stats
+from extensions import db, get_audit, instrumentation, limiter
+from models import EmailOutbox, Recipe
+from profile_routes import get_profile_cache
+from search_routes import get_search_service
+from static_routes import get_assets
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.record_once
+def setup(state):
+    state.app.extensions['metrics_networks'] = tuple(
+        ipaddress.ip_network(network) for network in state.app.config['METRICS_ALLOWED_NETWORKS'])
+
+def is_metrics_client():
+    """True for a request from an allowed network or carrying METRICS_TOKEN"""
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(supplied.encode(), token.encode()):
+            return True
+    if 'X-Forwarded-For' in request.headers:
+        # Relayed by a proxy on an allowed address; the real client is somewhere else
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in current_app.extensions['metrics_networks'])
+
+@metrics_bp.before_request
+def require_metrics_client():
+    # Queue sizes and audit counters are operational data; hide the endpoints from the public
+    if not is_metrics_client():
+        abort(404)
+
+@metrics_bp.route('/api/metrics/chatbot-cache', methods=['GET'])
+def chatbot_cache_metrics():
+    """Hit/miss counters for the assistant response cache"""
+    return jsonify(get_response_cache().stats())
+
+@metrics_bp.route('/api/metrics/knowledge', methods=['GET'])
+def knowledge_metrics():
+    """Share of chatbot traffic answered locally, with lookup latency"""
+    return jsonify(get_knowledge().stats())
+
+@metrics_bp.route('/api/metrics/audit', methods=['GET'])
+def audit_metrics():
+    """Audit pipeline throughput and dropped-record counts"""
+    return jsonify(get_audit().stats())
+
+@metrics_bp.route('/api/metrics/inference', methods=['GET'])
+def inference_metrics():
+    """Coalescing and batching counters for upstream inference calls"""
+    return jsonify(get_inference().stats())
+
+@metrics_bp.route('/api/metrics/assets', methods=['GET'])
+def asset_metrics():
+    """Size of the in-memory static asset manifest"""
+    return jsonify(get_assets().stats())
+
+@metrics_bp.route('/api/metrics/db-pool', methods=['GET'])
+def db_pool_metrics():
+    """Connection checkout wait times and pool saturation per bind"""
+    return jsonify(pool_stats(db.engines))
+
+@metrics_bp.route('/api/metrics/quiz-attempts', methods=['GET'])
+def quiz_attempt_metrics():
+    """Buffered quiz attempt writes: queued, written and failed counts"""
+    return jsonify(get_attempt_recorder().stats())
+
+@metrics_bp.route('/api/metrics/recipes', methods=['GET'])
+def recipe_metrics():
+    """Community recipe submissions by status; a growing 'pending' count means recipe_worker.py is behind"""
+    counts = dict.fromkeys(Recipe.STATUSES, 0)
+    counts.update(db.session.query(Recipe.status, db.func.count()).group_by(Recipe.status).all())
+    return jsonify(counts)
+
+@metrics_bp.route('/api/metrics/email-outbox', methods=['GET'])
+def email_outbox_metrics():
+    """Outbox rows by status; a growing 'pending' count means email_worker.py is behind or failing"""
+    counts = dict.fromkeys(EmailOutbox.STATUSES, 0)
+    counts.update(db.session.query(EmailOutbox.status, db.func.count()).group_by(EmailOutbox.status).all())
+    return jsonify(counts)
+
+@metrics_bp.route('/api/metrics/search', methods=['GET'])
+def search_metrics():
+    """Search index size, pending delta, merges, rebuilds and query latency"""
+    return jsonify(get_search_service().stats())
+
+@metrics_bp.route('/api/metrics/user-profiles', methods=['GET'])
+def user_profile_metrics():
+    """Profile cache hit ratio; misses are user-row reads"""
+    return jsonify(get_profile_cache().stats())
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@limiter.exempt
+def prometheus_metrics():
+    """Everything above plus request, SQL, upstream and bcrypt timings, for Prometheus"""
+    body = instrumentation.render(current_app)
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,173 @@
+"""Schema migrations for existing databases.
+
+db.create_all() only creates missing tables. The numbered steps below add
+columns and indexes to tables that already exist and backfill them. Each step
+is idempotent and recorded in the schema_migrations table.
+
+Usage:
+    python migrate.py
+"""
+import json
+
+from sqlalchemy import inspect, text
+
+from allergens import text_mask
+
+from app import app, db, Meal, Quiz, User
+from catalog_import import natural_key
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def add_missing_columns(table, columns):
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    for column in columns:
+        if column.name not in existing:
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    db.session.commit()
+
+
+def create_missing_indexes(table):
+    existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+    columns = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    for index in table.indexes:
+        # Indexes on columns added by a later migration are created by that migration
+        if index.name not in existing and all(column.name in columns for column in index.columns):
+            index.create(db.engine)
+
+
+def meal_nutrient_columns():
+    """Promote the Meal.nutrients JSON blob to typed, indexed macro columns"""
+    table = Meal.__table__
+    add_missing_columns(table, [table.c[field] for field in Meal.MACRO_FIELDS])
+    create_missing_indexes(table)
+
+    # Backfill in primary-key order so each batch is a bounded range scan
+    last_id = 0
+    while True:
+        rows = db.session.query(Meal.id, Meal.nutrients).filter(
+            Meal.id > last_id,
+            Meal.nutrients.isnot(None),
+            Meal.protein.is_(None),
+        ).order_by(Meal.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not rows:
+            break
+        updates = []
+        for meal_id, nutrients in rows:
+            try:
+                values = json.loads(nutrients)
+            except ValueError:
+                values = None
+            if not isinstance(values, dict):
+                values = {}  # a list, string or null blob has no macros to promote
+            update = {'id': meal_id}
+            for field in Meal.MACRO_FIELDS:
+                value = values.get(field)
+                update[field] = float(value) if isinstance(value, (int, float)) else 0.0
+            updates.append(update)
+        db.session.bulk_update_mappings(Meal, updates)
+        db.session.commit()
+        last_id = rows[-1][0]
+
+
+def backfill_natural_keys(model, source):
+    """Derive external_id from ``source`` for existing rows; the oldest row keeps a repeated key"""
+    taken = {key for (key,) in db.session.query(model.external_id).filter(model.external_id.isnot(None))}
+    last_id = 0
+    while True:
+        rows = db.session.query(model.id, source).filter(
+            model.id > last_id,
+            model.external_id.is_(None),
+        ).order_by(model.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not rows:
+            break
+        updates = []
+        for row_id, text_value in rows:
+            key = natural_key(text_value or '')
+            if key and key not in taken:
+                taken.add(key)
+                updates.append({'id': row_id, 'external_id': key})
+        if updates:
+            db.session.bulk_update_mappings(model, updates)
+            db.session.commit()
+        last_id = rows[-1][0]
+
+
+def catalog_natural_keys():
+    """Add the external_id natural key that catalog_import.py upserts on"""
+    for model, source in ((Quiz, Quiz.title), (Meal, Meal.name)):
+        add_missing_columns(model.__table__, [model.__table__.c.external_id])
+        backfill_natural_keys(model, source)
+        create_missing_indexes(model.__table__)
+
+
+def analytics_rollups():
+    """Build the analytics rollups and community counters from existing quiz attempts and users"""
+    import analytics
+    analytics.rebuild(batch_size=BACKFILL_BATCH_SIZE)
+
+
+def meal_allergen_masks():
+    """Add Meal.allergen_mask and compute it from each meal's name and description"""
+    table = Meal.__table__
+    add_missing_columns(table, [table.c.allergen_mask])
+    last_id = 0
+    while True:
+        rows = db.session.query(Meal.id, Meal.name, Meal.description).filter(
+            Meal.id > last_id,
+            Meal.allergen_mask.is_(None),
+        ).order_by(Meal.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not rows:
+            break
+        db.session.bulk_update_mappings(Meal, [
+            {'id': meal_id, 'allergen_mask': text_mask(name, description)} for meal_id, name, description in rows
+        ])
+        db.session.commit()
+        last_id = rows[-1][0]
+    # Bulk writes skip track_meal_changes; make every worker reload its ranking engine
+    from meal_routes import get_meal_version
+    get_meal_version().bump()
+
+
+def user_profile_versions():
+    """Add User.profile_version, which access tokens carry to key the profile cache"""
+    table = User.__table__
+    add_missing_columns(table, [table.c.profile_version])
+    db.session.query(User).filter(User.profile_version.is_(None)).update(
+        {'profile_version': 1}, synchronize_session=False)
+    db.session.commit()
+
+
+MIGRATIONS = [
+    (1, 'meal nutrient columns', meal_nutrient_columns),
+    (2, 'catalog natural keys', catalog_natural_keys),
+    (3, 'analytics rollups', analytics_rollups),
+    (4, 'meal allergen masks', meal_allergen_masks),
+    (5, 'user profile versions', user_profile_versions),
+]
+
+
+def run_migrations():
+    with app.app_context():
+        db.create_all()
+        db.session.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, name VARCHAR(200))'
+        ))
+        db.session.commit()
+        applied = {row[0] for row in db.session.execute(text('SELECT version FROM schema_migrations'))}
+        for version, name, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"Applying migration {version}: {name}")
+            migration()
+            db.session.execute(
+                text('INSERT INTO schema_migrations (version, name) VALUES (:version, :name)'),
+                {'version': version, 'name': name},
+            )
+            db.session.commit()
+        print("Database schema is up to date")
+
+
+if __name__ == '__main__':
+    run_migrations()
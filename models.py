@@ -0,0 +1,303 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import event
+
+from allergens import parse_allergies, text_mask
+from extensions import db, hasher
+
+# Define User model
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
+    age = db.Column(db.Integer)
+    weight = db.Column(db.Float)
+    dietary_goals = db.Column(db.Text)
+    allergies = db.Column(db.Text)
+    # Bumped by every profile update; access tokens carry it, see user_context
+    profile_version = db.Column(db.Integer, nullable=False, default=1)
+
+    def set_password(self, password):
+        self.password_hash = hasher.hash(password)
+
+    def check_password(self, password):
+        return hasher.verify(password, self.password_hash)
+
+    def rehash_password_if_needed(self, password):
+        """Re-hash a just-verified password when BCRYPT_LOG_ROUNDS has changed; returns True if it did"""
+        if hasher.needs_rehash(self.password_hash):
+            self.set_password(password)
+            return True
+        return False
+
+# Define Quiz model
+class Quiz(db.Model):
+    __table_args__ = (
+        db.Index('ux_quiz_external_id', 'external_id', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    external_id = db.Column(db.String(100))  # Natural key used by catalog_import.py upserts
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    questions = db.Column(db.Text, nullable=False)  # JSON string of questions
+
+# Define Meal model
+class Meal(db.Model):
+    __table_args__ = (
+        db.Index('ix_meal_category_calories', 'category', 'calories'),
+        db.Index('ix_meal_category_protein', 'category', 'protein'),
+        db.Index('ix_meal_protein_calories', 'protein', 'calories'),
+        db.Index('ix_meal_carbs_calories', 'carbs', 'calories'),
+        db.Index('ix_meal_fat_calories', 'fat', 'calories'),
+        db.Index('ux_meal_external_id', 'external_id', unique=True),
+    )
+
+    MACRO_FIELDS = ('protein', 'carbs', 'fat', 'fiber')
+
+    id = db.Column(db.Integer, primary_key=True)
+    external_id = db.Column(db.String(100))  # Natural key used by catalog_import.py upserts
+    name = db.Column(db.String(200), nullable=False)
+    calories = db.Column(db.Integer, nullable=False)
+    protein = db.Column(db.Float)  # grams
+    carbs = db.Column(db.Float)  # grams
+    fat = db.Column(db.Float)  # grams
+    fiber = db.Column(db.Float)  # grams
+    nutrients = db.Column(db.Text)  # Legacy JSON string of nutrients, backfilled into the columns above by migrate.py
+    category = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    # allergens.ALLERGENS bits; filtered with a bitwise AND, so deliberately not indexed
+    allergen_mask = db.Column(db.Integer, nullable=False, default=0)
+
+    def nutrient_dict(self):
+        return {field: getattr(self, field) for field in self.MACRO_FIELDS if getattr(self, field) is not None}
+
+    @classmethod
+    def filter_nutrients(cls, query, category=None, bounds=None):
+        """Apply a category and ``{field: (minimum, maximum)}`` bounds as indexable predicates"""
+        if category:
+            query = query.filter(cls.category == category)
+        for field, (minimum, maximum) in (bounds or {}).items():
+            column = getattr(cls, field)
+            if minimum is not None:
+                query = query.filter(column >= minimum)
+            if maximum is not None:
+                query = query.filter(column <= maximum)
+        return query
+
+    @classmethod
+    def exclude_allergies(cls, query, allergies):
+        """Leave out meals unsafe for a user's free-text ``allergies``"""
+        mask, terms = parse_allergies(allergies or '')
+        if mask:
+            query = query.filter(cls.allergen_mask.op('&')(mask) == 0)
+        for term in terms:
+            query = query.filter(~cls.name.icontains(term, autoescape=True),
+                                 ~db.func.coalesce(cls.description, '').icontains(term, autoescape=True))
+        return query
+
+@event.listens_for(Meal, 'before_insert')
+@event.listens_for(Meal, 'before_update')
+def set_allergen_mask(mapper, connection, meal):
+    # Bulk imports compute the mask themselves, see catalog_import.meal_record
+    meal.allergen_mask = text_mask(meal.name, meal.description)
+
+# Define QuizAttempt model
+class QuizAttempt(db.Model):
+    """One graded submission; written in batches by quiz_attempts.AttemptRecorder"""
+    __table_args__ = (
+        db.Index('ix_quiz_attempt_user_created', 'user_id', 'created_at'),
+        db.Index('ix_quiz_attempt_quiz', 'quiz_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    correct = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Integer, nullable=False)
+    percent = db.Column(db.Float, nullable=False)
+    answers = db.Column(db.Text, nullable=False)  # JSON list of chosen option indexes
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Running per-user, per-quiz score aggregates, updated with each attempt batch
+class QuizScore(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    best_percent = db.Column(db.Float, nullable=False, default=0.0)
+    total_percent = db.Column(db.Float, nullable=False, default=0.0)  # sum, for the average
+    last_percent = db.Column(db.Float, nullable=False, default=0.0)
+    streak = db.Column(db.Integer, nullable=False, default=0)  # consecutive passing attempts
+    best_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_attempt_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'quiz_id': self.quiz_id,
+            'attempts': self.attempts,
+            'best_percent': self.best_percent,
+            'average_percent': round(self.total_percent / self.attempts, 2) if self.attempts else 0.0,
+            'last_percent': self.last_percent,
+            'streak': self.streak,
+            'best_streak': self.best_streak,
+            'last_attempt_at': self.last_attempt_at.isoformat() if self.last_attempt_at else None,
+        }
+
+# Running per-quiz aggregates across all users
+class QuizStats(db.Model):
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    participants = db.Column(db.Integer, nullable=False, default=0)
+    passed = db.Column(db.Integer, nullable=False, default=0)
+    best_percent = db.Column(db.Float, nullable=False, default=0.0)
+    total_percent = db.Column(db.Float, nullable=False, default=0.0)
+
+    def to_dict(self):
+        return {
+            'quiz_id': self.quiz_id,
+            'attempts': self.attempts,
+            'participants': self.participants,
+            'pass_rate': round(self.passed / self.attempts, 4) if self.attempts else 0.0,
+            'best_percent': self.best_percent,
+            'average_percent': round(self.total_percent / self.attempts, 2) if self.attempts else 0.0,
+        }
+
+# Define MealLog model
+class MealLog(db.Model):
+    """A meal a user ate; nutrients are copied in so later catalog edits don't rewrite history"""
+    __table_args__ = (
+        db.Index('ix_meal_log_user_day', 'user_id', 'logged_on'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'))  # None for free-form entries
+    name = db.Column(db.String(200), nullable=False)
+    servings = db.Column(db.Float, nullable=False, default=1.0)
+    calories = db.Column(db.Float, nullable=False)
+    protein = db.Column(db.Float, nullable=False, default=0.0)
+    carbs = db.Column(db.Float, nullable=False, default=0.0)
+    fat = db.Column(db.Float, nullable=False, default=0.0)
+    fiber = db.Column(db.Float, nullable=False, default=0.0)
+    logged_on = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'meal_id': self.meal_id,
+            'name': self.name,
+            'servings': self.servings,
+            'calories': self.calories,
+            'nutrients': {field: getattr(self, field) for field in Meal.MACRO_FIELDS},
+            'date': self.logged_on.isoformat(),
+        }
+
+# Per-user totals for one day or one week (``period`` 'day'/'week', ``start`` its first day)
+class UserRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    period = db.Column(db.String(4), primary_key=True)
+    start = db.Column(db.Date, primary_key=True)
+    calories = db.Column(db.Float, nullable=False, default=0.0)
+    protein = db.Column(db.Float, nullable=False, default=0.0)
+    carbs = db.Column(db.Float, nullable=False, default=0.0)
+    fat = db.Column(db.Float, nullable=False, default=0.0)
+    fiber = db.Column(db.Float, nullable=False, default=0.0)
+    meals_logged = db.Column(db.Integer, nullable=False, default=0)
+    quiz_attempts = db.Column(db.Integer, nullable=False, default=0)
+    quiz_percent_total = db.Column(db.Float, nullable=False, default=0.0)
+
+# Site-wide counters, split across shards so concurrent increments don't queue on one row
+class CommunityCounter(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+# Community recipe; the row is also the analysis queue entry, see recipe_worker.py
+class Recipe(db.Model):
+    __table_args__ = (
+        db.Index('ix_recipe_status_id', 'status', 'id'),
+        db.Index('ix_recipe_user_id', 'user_id', 'id'),
+        # recipe_analysis simhash bands, for near-duplicate lookups
+        db.Index('ix_recipe_band0', 'band0'),
+        db.Index('ix_recipe_band1', 'band1'),
+        db.Index('ix_recipe_band2', 'band2'),
+        db.Index('ix_recipe_band3', 'band3'),
+    )
+
+    STATUSES = ('pending', 'analysing', 'published', 'duplicate', 'failed')
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    ingredients = db.Column(db.Text)  # JSON list of ingredient lines as submitted
+    servings = db.Column(db.Integer, nullable=False, default=1)
+    category = db.Column(db.String(100), nullable=False, default='community')
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    # Per serving, filled in by analysis
+    calories = db.Column(db.Float)
+    protein = db.Column(db.Float)
+    carbs = db.Column(db.Float)
+    fat = db.Column(db.Float)
+    fiber = db.Column(db.Float)
+    unmatched = db.Column(db.Text)  # JSON list of ingredients the estimate had to leave out
+    band0 = db.Column(db.Integer)
+    band1 = db.Column(db.Integer)
+    band2 = db.Column(db.Integer)
+    band3 = db.Column(db.Integer)
+    duplicate_of = db.Column(db.Integer, db.ForeignKey('recipe.id'))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    published_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        recipe = {
+            'id': self.id,
+            'user_id': self.user_id,
+            'title': self.title,
+            'description': self.description,
+            'ingredients': json.loads(self.ingredients) if self.ingredients else [],
+            'servings': self.servings,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+        if self.status == 'published':
+            recipe['category'] = self.category
+            recipe['calories'] = round(self.calories or 0.0)
+            recipe['nutrients'] = {field: round(getattr(self, field) or 0.0, 1) for field in Meal.MACRO_FIELDS}
+            recipe['unmatched_ingredients'] = json.loads(self.unmatched) if self.unmatched else []
+            recipe['published_at'] = self.published_at.isoformat() if self.published_at else None
+        elif self.status == 'duplicate':
+            recipe['duplicate_of'] = self.duplicate_of
+        return recipe
+
+# Outgoing email, delivered by email_worker.py; the row is also its queue entry
+class EmailOutbox(db.Model):
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+
+    KINDS = ('password_reset', 'message')
+    STATUSES = ('pending', 'sending', 'sent', 'skipped', 'failed')
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 'password_reset' is rendered at send time (and skipped when no account has the address);
+    # 'message' sends subject and body as given
+    kind = db.Column(db.String(20), nullable=False, default='message')
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200))
+    body = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
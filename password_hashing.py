@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool is saturated and the request should be shed"""
+
+
+class PasswordHasher:
+    """Caps concurrent bcrypt calls and sheds the excess with HasherBusy.
+
+    This is a concurrency limit, not a way to free the request worker: the
+    calling thread still runs bcrypt itself and is busy for the whole call.
+    bcrypt releases the GIL, so ``max_workers`` concurrent calls (one per core
+    by default) keep every core busy without oversubscribing them. At most
+    ``max_pending`` further callers may wait their turn; past that, callers
+    wait up to ``queue_timeout`` seconds to get in line and then get
+    HasherBusy (a 503) instead of piling up behind a login storm. When set,
+    ``observer`` is called with (seconds, operation) for every completed hash
+    or verify.
+    """
+
+    def __init__(self, rounds=12, max_workers=None, max_pending=None, queue_timeout=0.5):
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.observer = None
+        self.configure(rounds, max_workers, max_pending)
+
+    def configure(self, rounds=12, max_workers=None, max_pending=None):
+        """Set the work factor and concurrency bounds; call before the first hash"""
+        self.rounds = rounds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = self.max_workers * 4 if max_pending is None else max_pending
+        self._admitted = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._running = threading.BoundedSemaphore(self.max_workers)
+
+    def init_app(self, app):
+        self.configure(
+            rounds=app.config['BCRYPT_LOG_ROUNDS'],
+            max_workers=app.config['BCRYPT_POOL_SIZE'],
+            max_pending=app.config['BCRYPT_MAX_PENDING']
+        )
+
+    def _run(self, operation, fn, *args):
+        started = time.perf_counter()
+        if not self._admitted.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy('Password hashing is saturated')
+        try:
+            with self._running:
+                result = fn(*args)
+        finally:
+            self._admitted.release()
+        if self.observer is not None:
+            self.observer(time.perf_counter() - started, operation)
+        return result
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(self.rounds)
+        return self._run('hash', bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, password, password_hash):
+        return self._run('verify', bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """True when ``password_hash`` was made with a different work factor"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
@@ -0,0 +1,89 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token
+from database import read_only
+from extensions import db, csrf, lazy
+from models import User
+from user_context import ProfileCache, UserProfile, token_claims
+
+profile_bp = Blueprint('profile', __name__)
+
+def get_profile_cache():
+    def create(app):
+        return ProfileCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+    return lazy('user_profiles', create)
+
+def current_profile():
+    """The authenticated user's UserProfile, from the cache unless the token is newer; None if deleted"""
+    user_id = int(get_jwt_identity())
+    cache = get_profile_cache()
+    profile = cache.get(user_id, get_jwt().get('pv', 0))
+    if profile is None:
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        profile = cache.put(UserProfile.from_user(user))
+    return profile
+
+def profile_token(profile):
+    return create_access_token(identity=str(profile.id), additional_claims=token_claims(profile))
+
+@profile_bp.route('/api/profile', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_profile():
+    """Get user profile information"""
+    try:
+        profile = current_profile()
+        if not profile:
+            return jsonify({'error': 'User not found'}), 404
+
+        return jsonify({'user': profile.to_dict()})
+    except Exception as e:
+        current_app.logger.error(f"Error fetching profile: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@profile_bp.route('/api/profile', methods=['PUT'])
+@csrf.exempt
+@jwt_required()
+def update_profile():
+    """Update user profile information"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        data = request.get_json()
+
+        # Update allowed fields with validation
+        if 'age' in data:
+            if not isinstance(data['age'], int) or data['age'] < 0 or data['age'] > 150:
+                return jsonify({'error': 'Invalid age'}), 400
+            user.age = data['age']
+
+        if 'weight' in data:
+            if not isinstance(data['weight'], (int, float)) or data['weight'] <= 0:
+                return jsonify({'error': 'Invalid weight'}), 400
+            user.weight = data['weight']
+
+        if 'dietary_goals' in data:
+            if not isinstance(data['dietary_goals'], str) or len(data['dietary_goals']) > 1000:
+                return jsonify({'error': 'Invalid dietary goals'}), 400
+            user.dietary_goals = data['dietary_goals']
+
+        if 'allergies' in data:
+            if not isinstance(data['allergies'], str) or len(data['allergies']) > 1000:
+                return jsonify({'error': 'Invalid allergies'}), 400
+            user.allergies = data['allergies']
+
+        user.profile_version = db.func.coalesce(User.profile_version, 0) + 1
+        db.session.commit()
+
+        # Write-through: this process serves the new profile at once, and the
+        # new token's version makes every other process reload it
+        profile = get_profile_cache().put(UserProfile.from_user(user))
+        return jsonify({'message': 'Profile updated successfully', 'access_token': profile_token(profile)})
+    except Exception as e:
+        current_app.logger.error(f"Error updating profile: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -0,0 +1,276 @@
+"""Server-side quiz grading and write-batched attempt recording.
+
+Submissions are graded in the request against the stored answer key, then
+queued. A background writer inserts each batch of attempts with one
+executemany and folds it into the QuizScore (per user and quiz) and QuizStats
+(per quiz) aggregates with atomic ``SET x = x + ...`` updates, so readers get
+best/average/count/streak from a single row and concurrent workers don't
+overwrite each other's counts. Aggregates trail submissions by at most
+``flush_interval`` seconds.
+"""
+import atexit
+import json
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import Boolean, Float, Integer, bindparam, case, insert, tuple_, update
+
+from analytics import record_quiz_attempts
+from counters import greatest, insert_missing
+from extensions import db
+from models import QuizAttempt, QuizScore, QuizStats
+
+
+def grade(answer_key, answers):
+    """Per-question correctness of ``answers`` (option indexes, None if skipped)"""
+    if not isinstance(answers, list) or len(answers) != len(answer_key):
+        raise ValueError(f'Expected {len(answer_key)} answers')
+    results = []
+    for answer, expected in zip(answers, answer_key):
+        if answer is not None and (isinstance(answer, bool) or not isinstance(answer, int)):
+            raise ValueError('Answers must be option indexes')
+        results.append(answer is not None and answer == expected)
+    return results
+
+
+class AnswerKeys:
+    """quiz_id -> list of correct option indexes, dropped when the quiz stamp changes"""
+
+    def __init__(self, stamp):
+        self.stamp = stamp
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._version = None
+
+    def get(self, quiz_id, load):
+        """Answer key for ``quiz_id``; ``load(quiz_id)`` returns its questions or None"""
+        version = self.stamp.current()
+        with self._lock:
+            if version != self._version:
+                self._keys = {}
+                self._version = version
+            key = self._keys.get(quiz_id)
+        if key is not None:
+            return key
+        questions = load(quiz_id)
+        if questions is None:
+            return None
+        key = [question.get('answerIndex') for question in questions]
+        with self._lock:
+            if self._version == version:
+                self._keys[quiz_id] = key
+        return key
+
+
+def make_attempt(user_id, quiz_id, answers, results):
+    """QuizAttempt row values for a graded submission"""
+    correct = sum(results)
+    return {
+        'user_id': user_id,
+        'quiz_id': quiz_id,
+        'correct': correct,
+        'total': len(results),
+        'percent': round(100.0 * correct / len(results), 2) if results else 0.0,
+        'answers': json.dumps(answers),
+        'created_at': datetime.utcnow(),
+    }
+
+
+def pass_runs(passed):
+    """(leading, longest, trailing) runs of passing attempts"""
+    leading = 0
+    while leading < len(passed) and passed[leading]:
+        leading += 1
+    longest = run = 0
+    for ok in passed:
+        run = run + 1 if ok else 0
+        longest = max(longest, run)
+    return leading, longest, run
+
+
+def score_update():
+    """Executemany UPDATE that folds one batch per (user, quiz) into its QuizScore row"""
+    c = QuizScore.__table__.c
+    # best_streak comes first and reads the streak from before this batch: MySQL
+    # evaluates SET left to right, so after ``streak = ...`` it would see the new one.
+    # The streak continues across the batch only if every attempt in it passed.
+    return update(QuizScore.__table__).where(
+        c.user_id == bindparam('key_user'), c.quiz_id == bindparam('key_quiz')
+    ).ordered_values(
+        (c.best_streak, greatest(c.best_streak, c.streak + bindparam('leading', type_=Integer),
+                                 bindparam('longest', type_=Integer))),
+        (c.streak, case((bindparam('reset', type_=Boolean), bindparam('trailing', type_=Integer)),
+                        else_=c.streak + bindparam('n', type_=Integer))),
+        (c.attempts, c.attempts + bindparam('n', type_=Integer)),
+        (c.best_percent, greatest(c.best_percent, bindparam('best', type_=Float))),
+        (c.total_percent, c.total_percent + bindparam('sum', type_=Float)),
+        (c.last_percent, bindparam('last', type_=Float)),
+        (c.last_attempt_at, bindparam('at')),
+    )
+
+
+class AttemptRecorder:
+    """Buffers graded attempts and writes them, with their aggregates, in batches.
+
+    ``record()`` only enqueues. When the queue is full the attempt is written
+    synchronously instead, so a backlog slows submissions down rather than
+    losing them.
+    """
+
+    def __init__(self, app, pass_percent=70.0, max_queue=10000, batch_size=500, flush_interval=0.5):
+        self.app = app
+        self.pass_percent = pass_percent
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+        self.synchronous = 0
+        self.failed = 0
+
+    def record(self, user_id, quiz_id, answers, results):
+        """Queue a graded attempt; returns its summary"""
+        attempt = make_attempt(user_id, quiz_id, answers, results)
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(attempt)
+        except queue.Full:
+            with self._lock:
+                self.synchronous += 1
+            self.write([attempt])
+        with self._lock:
+            self.recorded += 1
+        return {
+            'correct': attempt['correct'],
+            'total': attempt['total'],
+            'percent': attempt['percent'],
+            'passed': attempt['percent'] >= self.pass_percent,
+        }
+
+    def _start(self):
+        # Started lazily so the thread is created in the worker, not a pre-fork parent
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='quiz-attempt-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if None in batch:
+                batch = [attempt for attempt in batch if attempt is not None]
+                stopping = True
+            if batch:
+                self.write(batch)
+
+    def write(self, batch):
+        """Insert ``batch`` and apply it to the aggregates in one transaction"""
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(QuizAttempt.__table__), batch)
+                new_participants = self._apply_scores(batch)
+                self._apply_stats(batch, new_participants)
+                record_quiz_attempts(batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                with self._lock:
+                    self.failed += len(batch)
+                self.app.logger.error(f"Error writing quiz attempts: {str(e)}")
+                return
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+
+    def _apply_scores(self, batch):
+        """Update QuizScore rows; returns {quiz_id: users attempting it for the first time}"""
+        by_key = defaultdict(list)
+        for attempt in batch:
+            by_key[(attempt['user_id'], attempt['quiz_id'])].append(attempt)
+        table = QuizScore.__table__
+        c = table.c
+        existing = {
+            tuple(row) for row in db.session.query(c.user_id, c.quiz_id).filter(tuple_(c.user_id, c.quiz_id).in_(list(by_key)))
+        }
+        new_participants = defaultdict(int)
+        missing = [key for key in by_key if key not in existing]
+        if missing:
+            insert_missing(table, [{'user_id': user_id, 'quiz_id': quiz_id} for user_id, quiz_id in missing])
+            for _, quiz_id in missing:
+                new_participants[quiz_id] += 1
+
+        params = []
+        for (user_id, quiz_id), attempts in by_key.items():
+            percents = [attempt['percent'] for attempt in attempts]
+            passed = [percent >= self.pass_percent for percent in percents]
+            leading, longest, trailing = pass_runs(passed)
+            params.append({
+                'key_user': user_id, 'key_quiz': quiz_id,
+                'n': len(attempts), 'best': max(percents), 'sum': sum(percents), 'last': percents[-1],
+                'reset': not all(passed), 'leading': leading, 'longest': longest, 'trailing': trailing,
+                'at': attempts[-1]['created_at'],
+            })
+        db.session.execute(score_update(), params, execution_options={'synchronize_session': False})
+        return new_participants
+
+    def _apply_stats(self, batch, new_participants):
+        by_quiz = defaultdict(list)
+        for attempt in batch:
+            by_quiz[attempt['quiz_id']].append(attempt['percent'])
+        table = QuizStats.__table__
+        c = table.c
+        existing = {quiz_id for (quiz_id,) in db.session.query(c.quiz_id).filter(c.quiz_id.in_(list(by_quiz)))}
+        missing = [quiz_id for quiz_id in by_quiz if quiz_id not in existing]
+        if missing:
+            insert_missing(table, [{'quiz_id': quiz_id} for quiz_id in missing])
+        statement = update(table).where(c.quiz_id == bindparam('key_quiz')).values(
+            attempts=c.attempts + bindparam('n', type_=Integer),
+            participants=c.participants + bindparam('new', type_=Integer),
+            passed=c.passed + bindparam('passed_n', type_=Integer),
+            best_percent=greatest(c.best_percent, bindparam('best', type_=Float)),
+            total_percent=c.total_percent + bindparam('sum', type_=Float),
+        )
+        db.session.execute(statement, [{
+            'key_quiz': quiz_id,
+            'n': len(percents),
+            'new': new_participants.get(quiz_id, 0),
+            'passed_n': sum(1 for percent in percents if percent >= self.pass_percent),
+            'best': max(percents),
+            'sum': sum(percents),
+        } for quiz_id, percents in by_quiz.items()], execution_options={'synchronize_session': False})
+
+    def shutdown(self, timeout=5.0):
+        """Write queued attempts and stop the writer"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'recorded': self.recorded,
+                'written': self.written,
+                'batches': self.batches,
+                'synchronous': self.synchronous,
+                'failed': self.failed,
+                'queued': self._queue.qsize(),
+            }
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import threading
+
+from flask import Response, request
+
+
+class CachedPayload:
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+
+
+def make_payload(payload):
+    """Serialize ``payload`` once into a body with a strong ETag"""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return CachedPayload(body, hashlib.sha256(body).hexdigest()[:32])
+
+
+class PayloadCache:
+    """Process-level cache of ready-to-send JSON response bodies with strong ETags.
+
+    Entries are dropped wholesale whenever ``stamp`` (a VersionStamp) changes.
+    """
+
+    def __init__(self, stamp):
+        self.stamp = stamp
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+
+    def get(self, key, build):
+        """Return the cached payload for ``key``, calling ``build()`` on a miss.
+
+        ``build`` returns a JSON-serializable object, or None when there is
+        nothing to cache (for example a missing quiz).
+        """
+        version = self.stamp.current()
+        with self._lock:
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        payload = build()
+        if payload is None:
+            return None
+        entry = make_payload(payload)
+        with self._lock:
+            # Don't store a payload built from data older than the current version
+            if self._version == version:
+                self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+def payload_response(entry):
+    """Serve a cached payload, answering If-None-Match with 304 Not Modified"""
+    response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
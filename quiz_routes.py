@@ -0,0 +1,88 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+import json
+import os
+from database import read_only
+from extensions import db, csrf
+from models import Quiz
+from pagination import InvalidQuery, decode_cursor, page_limit, parse_fields, split_page
+from quiz_cache import PayloadCache, make_payload, payload_response
+from version_stamp import VersionStamp, track_changes
+
+quiz_bp = Blueprint('quizzes', __name__)
+
+QUIZ_FIELDS = ('id', 'title', 'description')
+
+@quiz_bp.record_once
+def setup(state):
+    # Registered with the app (not lazily) so writes from every process bump the stamp
+    app = state.app
+    quiz_version = VersionStamp(os.path.join(app.instance_path, 'quiz_cache.version'))
+    app.extensions['quiz_version'] = quiz_version
+    app.extensions['quiz_cache'] = PayloadCache(quiz_version)
+    track_changes(db.session, Quiz, quiz_version)
+
+def get_quiz_version():
+    """Stamp bumped by every committed Quiz write, in any process"""
+    return current_app.extensions['quiz_version']
+
+def get_quiz_cache():
+    """Ready-to-send quiz payloads, invalidated whenever the quiz stamp changes"""
+    return current_app.extensions['quiz_cache']
+
+@quiz_bp.route('/api/quizzes', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_quizzes():
+    """Get available quizzes for authenticated user, ordered by id, ``limit`` at a time"""
+    try:
+        after = decode_cursor(request.args.get('cursor'), (int,))
+        limit = page_limit(request.args, 20, 100)
+        fields = parse_fields(request.args, QUIZ_FIELDS)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        build = lambda: build_quiz_list(fields, limit, after)
+        if after is None:
+            # Only first pages are cached, so cursors can't grow the cache without bound
+            return payload_response(get_quiz_cache().get(('quizzes', fields, limit), build))
+        return payload_response(make_payload(build()))
+    except Exception as e:
+        current_app.logger.error(f"Error fetching quizzes: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def build_quiz_list(fields=QUIZ_FIELDS, limit=20, after=None):
+    query = Quiz.query.with_entities(*[getattr(Quiz, field) for field in fields]).order_by(Quiz.id)
+    if after is not None:
+        query = query.filter(Quiz.id > after[0])
+    quiz_list = [dict(zip(fields, row)) for row in query.limit(limit + 1)]
+    quiz_list, next_cursor = split_page(quiz_list, limit, lambda quiz: (quiz['id'],))
+    return {'quizzes': quiz_list, 'next_cursor': next_cursor}
+
+@quiz_bp.route('/api/quizzes/<int:quiz_id>/questions', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_quiz_questions(quiz_id):
+    """Get questions for a specific quiz"""
+    try:
+        payload = get_quiz_cache().get(('questions', quiz_id), lambda: build_quiz_questions(quiz_id))
+        if payload is None:
+            return jsonify({'error': 'Quiz not found'}), 404
+        return payload_response(payload)
+    except Exception as e:
+        current_app.logger.error(f"Error fetching quiz questions: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def build_quiz_questions(quiz_id):
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return None
+    # Answers stay on the server; POST /api/quizzes/<id>/attempts grades them
+    questions = [
+        {key: value for key, value in question.items() if key != 'answerIndex'}
+        for question in json.loads(quiz.questions)
+    ]
+    return {'questions': questions}
@@ -0,0 +1,226 @@
+"""Ingredient parsing, nutrient estimates and near-duplicate fingerprints for community recipes.
+
+Each ingredient line ("200 g chicken breast", "1 1/2 cups rice", "2 eggs")
+is split into an amount in grams and a food name. Foods in the small
+per-100 g reference table below are matched by keyword (longest first, so
+"sweet potato" is not a potato); anything else is looked up among catalog
+meals by natural key and counted as ``MEAL_SERVING_GRAMS`` a serving. Totals
+are divided by the recipe's servings.
+
+Near-identical submissions are found with a 64-bit simhash of the title,
+ingredient names and description: two recipes whose hashes differ in at
+most ``DUPLICATE_DISTANCE`` bits are duplicates. The hash is stored as four
+16-bit bands; by pigeonhole any such pair shares a band, so candidates are
+an indexed equality lookup on the bands rather than a scan.
+"""
+import hashlib
+import re
+from collections import Counter
+
+from knowledge import tokenize
+
+# name: (kcal, protein, carbs, fat, fiber) per 100 g, grams per piece
+FOODS = {
+    'chicken': ((165, 31.0, 0.0, 3.6, 0.0), 150),
+    'turkey': ((135, 30.0, 0.0, 1.0, 0.0), 150),
+    'beef': ((250, 26.0, 0.0, 15.0, 0.0), 150),
+    'pork': ((242, 27.0, 0.0, 14.0, 0.0), 150),
+    'salmon': ((208, 20.0, 0.0, 13.0, 0.0), 150),
+    'tuna': ((132, 28.0, 0.0, 1.0, 0.0), 150),
+    'shrimp': ((99, 24.0, 0.2, 0.3, 0.0), 15),
+    'egg': ((143, 13.0, 0.7, 9.5, 0.0), 50),
+    'tofu': ((76, 8.0, 1.9, 4.8, 0.3), 120),
+    'lentil': ((116, 9.0, 20.0, 0.4, 8.0), 100),
+    'chickpea': ((164, 8.9, 27.0, 2.6, 7.6), 100),
+    'bean': ((127, 8.7, 22.8, 0.5, 6.4), 100),
+    'rice': ((130, 2.7, 28.0, 0.3, 0.4), 150),
+    'quinoa': ((120, 4.4, 21.0, 1.9, 2.8), 150),
+    'oat': ((389, 16.9, 66.0, 6.9, 10.6), 40),
+    'pasta': ((131, 5.0, 25.0, 1.1, 1.8), 150),
+    'noodle': ((138, 4.5, 25.0, 2.1, 1.2), 150),
+    'bread': ((265, 9.0, 49.0, 3.2, 2.7), 30),
+    'tortilla': ((218, 5.7, 36.0, 5.3, 3.0), 45),
+    'flour': ((364, 10.0, 76.0, 1.0, 2.7), 120),
+    'potato': ((77, 2.0, 17.0, 0.1, 2.2), 170),
+    'sweet potato': ((86, 1.6, 20.0, 0.1, 3.0), 130),
+    'spinach': ((23, 2.9, 3.6, 0.4, 2.2), 30),
+    'kale': ((49, 4.3, 8.8, 0.9, 3.6), 30),
+    'lettuce': ((15, 1.4, 2.9, 0.2, 1.3), 30),
+    'broccoli': ((34, 2.8, 7.0, 0.4, 2.6), 150),
+    'cauliflower': ((25, 1.9, 5.0, 0.3, 2.0), 150),
+    'carrot': ((41, 0.9, 10.0, 0.2, 2.8), 60),
+    'tomato': ((18, 0.9, 3.9, 0.2, 1.2), 120),
+    'cucumber': ((15, 0.7, 3.6, 0.1, 0.5), 200),
+    'onion': ((40, 1.1, 9.3, 0.1, 1.7), 110),
+    'garlic': ((149, 6.4, 33.0, 0.5, 2.1), 5),
+    'pepper': ((31, 1.0, 6.0, 0.3, 2.1), 120),
+    'mushroom': ((22, 3.1, 3.3, 0.3, 1.0), 20),
+    'zucchini': ((17, 1.2, 3.1, 0.3, 1.0), 200),
+    'pea': ((81, 5.4, 14.0, 0.4, 5.1), 100),
+    'corn': ((86, 3.3, 19.0, 1.4, 2.0), 100),
+    'avocado': ((160, 2.0, 8.5, 14.7, 6.7), 150),
+    'banana': ((89, 1.1, 23.0, 0.3, 2.6), 120),
+    'apple': ((52, 0.3, 14.0, 0.2, 2.4), 180),
+    'berry': ((57, 0.7, 14.0, 0.3, 2.4), 5),
+    'orange': ((47, 0.9, 12.0, 0.1, 2.4), 130),
+    'lemon': ((29, 1.1, 9.3, 0.3, 2.8), 60),
+    'milk': ((42, 3.4, 5.0, 1.0, 0.0), 240),
+    'yogurt': ((59, 10.0, 3.6, 0.4, 0.0), 170),
+    'cheese': ((402, 25.0, 1.3, 33.0, 0.0), 30),
+    'butter': ((717, 0.9, 0.1, 81.0, 0.0), 14),
+    'cream': ((340, 2.8, 2.7, 36.0, 0.0), 15),
+    'oil': ((884, 0.0, 0.0, 100.0, 0.0), 14),
+    'sugar': ((387, 0.0, 100.0, 0.0, 0.0), 4),
+    'honey': ((304, 0.3, 82.0, 0.0, 0.2), 21),
+    'almond': ((579, 21.0, 22.0, 50.0, 12.5), 1),
+    'walnut': ((654, 15.0, 14.0, 65.0, 6.7), 4),
+    'peanut': ((567, 26.0, 16.0, 49.0, 8.5), 1),
+    'peanut butter': ((588, 25.0, 20.0, 50.0, 6.0), 16),
+    'coconut milk': ((230, 2.3, 6.0, 24.0, 2.2), 240),
+    'almond milk': ((17, 0.6, 0.6, 1.1, 0.2), 240),
+    'seed': ((534, 18.0, 29.0, 42.0, 27.0), 10),
+}
+# Plurals that aren't the name plus s/es
+FOOD_ALIASES = {'berries': 'berry', 'cherries': 'berry'}
+# Weights and volumes in grams (volumes as water)
+UNITS = {
+    'g': 1, 'gram': 1, 'grams': 1, 'kg': 1000, 'mg': 0.001,
+    'oz': 28.35, 'ounce': 28.35, 'ounces': 28.35, 'lb': 453.6, 'lbs': 453.6, 'pound': 453.6, 'pounds': 453.6,
+    'ml': 1, 'l': 1000, 'litre': 1000, 'liter': 1000, 'litres': 1000, 'liters': 1000,
+    'cup': 240, 'cups': 240, 'tbsp': 15, 'tablespoon': 15, 'tablespoons': 15, 'tsp': 5, 'teaspoon': 5,
+    'teaspoons': 5, 'pinch': 0.5, 'handful': 30, 'handfuls': 30, 'can': 400, 'cans': 400,
+}
+# Counted items whose name doesn't say what they weigh
+PIECE_UNITS = {'piece', 'pieces', 'slice', 'slices', 'clove', 'cloves', 'fillet', 'fillets', 'breast', 'breasts'}
+FRACTIONS = {'½': 0.5, '¼': 0.25, '¾': 0.75, '⅓': 1 / 3, '⅔': 2 / 3}
+MEAL_SERVING_GRAMS = 350
+MAX_INGREDIENT_GRAMS = 5000  # per line; anything larger is a typo, not a recipe
+
+DUPLICATE_DISTANCE = 3
+BANDS = 4
+NUTRIENT_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+
+# A comma between two digits is a decimal comma ("1,5 cups rice"), not a separator
+SEPARATORS = re.compile(r'[\n;]|(?<!\d),|,(?!\d)')
+QUANTITY = re.compile(r'^(\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?|[½¼¾⅓⅔])\s*')
+FOOD_NAMES = re.compile(r'\b(' + '|'.join(
+    re.escape(name) for name in sorted(list(FOODS) + list(FOOD_ALIASES), key=len, reverse=True)) + r')(?:es|s)?\b')
+
+
+def split_ingredients(value):
+    """Ingredient lines from a list or from text with one per line (or separated by ; or ,)"""
+    if isinstance(value, (list, tuple)):
+        lines = [str(item) for item in value]
+    else:
+        lines = SEPARATORS.split(value or '')
+    return [line.strip(' \t-*•') for line in lines if line.strip(' \t-*•')]
+
+
+def parse_quantity(text):
+    if text in FRACTIONS:
+        return FRACTIONS[text]
+    if ' ' in text:
+        whole, fraction = text.split()
+        return int(whole) + parse_quantity(fraction)
+    if '/' in text:
+        numerator, denominator = text.split('/')
+        return int(numerator) / int(denominator) if int(denominator) else 0.0
+    return float(text.replace(',', '.'))
+
+
+def parse_ingredient(line):
+    """``(quantity, grams per unit or None for pieces, food name)`` for one ingredient line"""
+    text = line.lower().strip()
+    quantity = 1.0
+    match = QUANTITY.match(text)
+    if match:
+        quantity = parse_quantity(match.group(1).strip())
+        text = text[match.end():]
+    elif text.startswith(('a ', 'an ')):
+        text = text.partition(' ')[2]
+    unit = None
+    word, _, rest = text.partition(' ')
+    word = word.rstrip('.')
+    if word in UNITS:
+        unit, text = UNITS[word], rest
+    elif word in PIECE_UNITS:
+        text = rest
+    if text.startswith('of '):
+        text = text[3:]
+    return quantity, unit, text.strip()
+
+
+def food_of(name):
+    """The reference food a name mentions, or None"""
+    match = FOOD_NAMES.search(name)
+    if match is None:
+        return None
+    return FOOD_ALIASES.get(match.group(1), match.group(1))
+
+
+def analyse_ingredients(lines, catalog_meals):
+    """``(nutrient totals, unmatched names)``.
+
+    ``catalog_meals(names)`` returns ``{name: {nutrient field: per-serving value}}``
+    for the names it can find in the meal catalog.
+    """
+    totals = dict.fromkeys(NUTRIENT_FIELDS, 0.0)
+    unknown = []
+    for line in lines:
+        quantity, unit, name = parse_ingredient(line)
+        if not name:
+            continue
+        food = food_of(name)
+        if food is None:
+            unknown.append((quantity, unit, name))
+            continue
+        per_100g, piece = FOODS[food]
+        grams = min(quantity * (unit if unit is not None else piece), MAX_INGREDIENT_GRAMS)
+        for field, value in zip(NUTRIENT_FIELDS, per_100g):
+            totals[field] += value * grams / 100
+    meals = catalog_meals([name for _, _, name in unknown]) if unknown else {}
+    unmatched = []
+    for quantity, unit, name in unknown:
+        meal = meals.get(name)
+        if meal is None:
+            unmatched.append(name)
+            continue
+        grams = min(quantity * (unit if unit is not None else MEAL_SERVING_GRAMS), MAX_INGREDIENT_GRAMS)
+        for field in NUTRIENT_FIELDS:
+            totals[field] += (meal.get(field) or 0.0) * grams / MEAL_SERVING_GRAMS
+    return totals, unmatched
+
+
+def simhash(features):
+    """64-bit simhash of ``{feature: weight}``"""
+    weights = [0.0] * 64
+    for feature, weight in features.items():
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def recipe_fingerprint(title, ingredient_names, description):
+    """Simhash over a recipe's words; quantities and word order don't change it"""
+    features = Counter()
+    for token in tokenize(title or ''):
+        features[token] += 3.0
+    for name in ingredient_names:
+        for token in tokenize(name):
+            features[token] += 2.0
+    for token in tokenize(description or ''):
+        features[token] += 1.0
+    return simhash(features)
+
+
+def bands(fingerprint):
+    return [fingerprint >> (16 * band) & 0xFFFF for band in range(BANDS)]
+
+
+def from_bands(values):
+    return sum(value << (16 * band) for band, value in enumerate(values))
+
+
+def distance(a, b):
+    return bin(a ^ b).count('1')
@@ -0,0 +1,104 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
+from database import read_only
+from extensions import db, csrf
+from models import Recipe
+from pagination import InvalidQuery, decode_cursor, page_limit, split_page
+
+recipe_bp = Blueprint('recipes', __name__)
+
+def parse_recipe(data):
+    """Validated Recipe column values from a submission; raises ValueError"""
+    from recipe_analysis import split_ingredients
+
+    config = current_app.config
+    title = data.get('title')
+    description = data.get('description')
+    if not isinstance(title, str) or not title.strip() or len(title) > 200:
+        raise ValueError('title is required (at most 200 characters)')
+    max_description = config['RECIPE_MAX_DESCRIPTION']
+    if not isinstance(description, str) or not description.strip() or len(description) > max_description:
+        raise ValueError(f"description is required (at most {max_description} characters)")
+    ingredients = data.get('ingredients')
+    if ingredients is not None:
+        if not (isinstance(ingredients, str)
+                or isinstance(ingredients, list) and all(isinstance(line, str) for line in ingredients)):
+            raise ValueError('ingredients must be a list of strings, or text with one per line')
+        ingredients = split_ingredients(ingredients)
+        if len(ingredients) > config['RECIPE_MAX_INGREDIENTS'] or any(len(line) > 200 for line in ingredients):
+            raise ValueError(f"At most {config['RECIPE_MAX_INGREDIENTS']} ingredients of 200 characters each")
+    servings = data.get('servings', 1)
+    if isinstance(servings, bool) or not isinstance(servings, int) or not 1 <= servings <= 50:
+        raise ValueError('servings must be a whole number from 1 to 50')
+    category = data.get('category') or 'community'
+    if not isinstance(category, str) or len(category) > 100:
+        raise ValueError('Invalid category')
+    return {
+        'title': title.strip(),
+        'description': description.strip(),
+        'ingredients': json.dumps(ingredients) if ingredients else None,
+        'servings': servings,
+        'category': category.strip().lower(),
+    }
+
+@recipe_bp.route('/api/recipes', methods=['POST'])
+@csrf.exempt
+@jwt_required()
+def submit_recipe():
+    """Queue a recipe for analysis; recipe_worker.py publishes it"""
+    try:
+        values = parse_recipe(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        recipe = Recipe(user_id=int(get_jwt_identity()), status='pending', **values)
+        db.session.add(recipe)
+        db.session.commit()
+        return jsonify({'id': recipe.id, 'status': recipe.status}), 202
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error submitting recipe: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@recipe_bp.route('/api/recipes', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_recipes():
+    """Published recipes, newest first; ``mine=1`` lists the user's own submissions in any status"""
+    try:
+        after = decode_cursor(request.args.get('cursor'), (int,))
+        limit = page_limit(request.args, 20, 100)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        query = Recipe.query.order_by(Recipe.id.desc())
+        if request.args.get('mine') in ('1', 'true'):
+            query = query.filter(Recipe.user_id == int(get_jwt_identity()))
+        else:
+            query = query.filter(Recipe.status == 'published')
+        if after is not None:
+            query = query.filter(Recipe.id < after[0])
+        recipes, next_cursor = split_page(query.limit(limit + 1).all(), limit, lambda recipe: (recipe.id,))
+        return jsonify({'recipes': [recipe.to_dict() for recipe in recipes], 'next_cursor': next_cursor})
+    except Exception as e:
+        current_app.logger.error(f"Error fetching recipes: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@recipe_bp.route('/api/recipes/<int:recipe_id>', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def get_recipe(recipe_id):
+    """A published recipe, or the user's own submission with its analysis status"""
+    try:
+        recipe = Recipe.query.get(recipe_id)
+        if recipe is None or (recipe.status != 'published' and recipe.user_id != int(get_jwt_identity())):
+            return jsonify({'error': 'Recipe not found'}), 404
+        return jsonify(recipe.to_dict())
+    except Exception as e:
+        current_app.logger.error(f"Error fetching recipe: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
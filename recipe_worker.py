@@ -0,0 +1,235 @@
+"""Background analysis and publishing of community recipe submissions.
+
+POST /api/recipes only inserts a 'pending' Recipe row, so a submission costs
+one INSERT however heavy the analysis is. The recipe table is the queue:
+each worker claims a batch of pending rows with a conditional UPDATE (two
+workers never get the same row, and a claim older than ``claim_timeout`` is
+taken over, so a crashed worker's batch is retried), estimates per-serving
+nutrients from the ingredients (see recipe_analysis), marks near-duplicates
+of published recipes and publishes the rest. After the commit a second pass
+demotes any recipe that another worker published alongside a near-identical
+one, keeping the oldest. Publishing adds to the
+'recipes_shared' community counter and, through the session hooks in
+search_routes, puts the recipe into /api/search.
+
+Usage:
+    python recipe_worker.py                    # one worker process per CPU core
+    python recipe_worker.py --workers 2 --batch-size 50
+    python recipe_worker.py --once             # drain the queue and exit
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+import analytics
+from catalog_import import natural_key
+from extensions import db
+from models import Meal, Recipe
+from recipe_analysis import (
+    BANDS, DUPLICATE_DISTANCE, NUTRIENT_FIELDS, analyse_ingredients, bands, distance, from_bands,
+    parse_ingredient, recipe_fingerprint, split_ingredients,
+)
+
+MAX_ATTEMPTS = 3
+DUPLICATE_CANDIDATES = 200
+
+
+def catalog_meals(names):
+    """Per-serving nutrients of the catalog meals whose natural key matches an ingredient name"""
+    keys = {natural_key(name): name for name in names}
+    columns = [Meal.calories] + [getattr(Meal, field) for field in Meal.MACRO_FIELDS]
+    rows = db.session.query(Meal.external_id, *columns).filter(Meal.external_id.in_([key for key in keys if key]))
+    return {keys[row.external_id]: row._asdict() for row in rows}
+
+
+def near_duplicates(recipe_id, fingerprint):
+    """Ids, oldest first, of other published recipes within DUPLICATE_DISTANCE bits of ``fingerprint``"""
+    columns = [getattr(Recipe, f'band{band}') for band in range(BANDS)]
+    candidates = db.session.query(Recipe.id, *columns).filter(
+        Recipe.status == 'published',
+        Recipe.id != recipe_id,
+        or_(*(column == value for column, value in zip(columns, bands(fingerprint)))),
+    ).order_by(Recipe.id).limit(DUPLICATE_CANDIDATES)
+    return [candidate_id for candidate_id, *values in candidates
+            if distance(from_bands(values), fingerprint) <= DUPLICATE_DISTANCE]
+
+
+def find_duplicate(recipe_id, fingerprint):
+    """Id of the oldest published recipe within DUPLICATE_DISTANCE bits of ``fingerprint``, or None"""
+    matches = near_duplicates(recipe_id, fingerprint)
+    return matches[0] if matches else None
+
+
+def analyse(recipe):
+    """Column values for an analysed recipe; reads the database but changes nothing"""
+    submitted = json.loads(recipe.ingredients) if recipe.ingredients else None
+    # Without an ingredient list, any ingredients named in the description still count
+    lines = submitted if submitted is not None else split_ingredients(recipe.description)
+    totals, unmatched = analyse_ingredients(lines, catalog_meals)
+    fingerprint = recipe_fingerprint(recipe.title, [parse_ingredient(line)[2] for line in lines], recipe.description)
+    values = {f'band{band}': value for band, value in enumerate(bands(fingerprint))}
+    duplicate_of = find_duplicate(recipe.id, fingerprint)
+    if duplicate_of is not None:
+        values.update(status='duplicate', duplicate_of=duplicate_of)
+        return values
+    servings = max(recipe.servings or 1, 1)
+    values.update({field: round(totals[field] / servings, 2) for field in NUTRIENT_FIELDS})
+    values.update(
+        status='published',
+        published_at=datetime.utcnow(),
+        unmatched=json.dumps(unmatched if submitted is not None else []),
+    )
+    return values
+
+
+class RecipeWorker:
+    """Claims batches of submissions and processes them; one per worker process"""
+
+    def __init__(self, app, batch_size=20, claim_timeout=300):
+        self.app = app
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self.processed = 0
+        self.published = 0
+        self.duplicates = 0
+        self.failed = 0
+
+    def claimable(self):
+        stale = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        return or_(Recipe.status == 'pending', and_(Recipe.status == 'analysing', Recipe.claimed_at < stale))
+
+    def claim(self):
+        """Mark up to ``batch_size`` claimable recipes as ours and return them"""
+        ids = [recipe_id for (recipe_id,) in db.session.query(Recipe.id).filter(
+            self.claimable()
+        ).order_by(Recipe.id).limit(self.batch_size)]
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        # The status check is repeated in the UPDATE, so a row another worker got first is skipped
+        db.session.query(Recipe).filter(Recipe.id.in_(ids), self.claimable()).update({
+            'status': 'analysing',
+            'claimed_by': token,
+            'claimed_at': datetime.utcnow(),
+            'attempts': Recipe.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        return Recipe.query.filter_by(claimed_by=token).order_by(Recipe.id).all()
+
+    def run_once(self):
+        """Claim and process one batch in one transaction; returns the number of recipes handled"""
+        with self.app.app_context():
+            try:
+                recipes = self.claim()
+                published = []
+                for recipe in recipes:
+                    try:
+                        values = analyse(recipe)
+                    except Exception as e:
+                        values = {'status': 'failed' if recipe.attempts >= MAX_ATTEMPTS else 'pending',
+                                  'error': str(e)[:500]}
+                        self.app.logger.error(f"Error analysing recipe {recipe.id}: {str(e)}")
+                    values['claimed_by'] = None
+                    for name, value in values.items():
+                        setattr(recipe, name, value)
+                    if values['status'] == 'published':
+                        published.append((recipe.id, from_bands([values[f'band{band}'] for band in range(BANDS)])))
+                statuses = [recipe.status for recipe in recipes]
+                analytics.count({'recipes_shared': statuses.count('published')})
+                db.session.commit()
+            except Exception as e:
+                # The claims time out and the batch is retried
+                db.session.rollback()
+                self.app.logger.error(f"Error processing recipes: {str(e)}")
+                return 0
+            demoted = self.demote_duplicates(published)
+        self.processed += len(statuses)
+        self.published += statuses.count('published') - demoted
+        self.duplicates += statuses.count('duplicate') + demoted
+        self.failed += statuses.count('failed')
+        return len(statuses)
+
+    def demote_duplicates(self, published):
+        """Second pass over ``(recipe id, fingerprint)`` pairs just published; returns how many were demoted.
+
+        analyse() only sees recipes committed before it ran, so two workers can
+        publish near-identical submissions side by side. This runs after the
+        publishing commit: whichever worker commits second sees both, keeps
+        the oldest published recipe and marks the newer ones as its duplicates.
+        The rows are re-read with FOR UPDATE so two workers never demote (and
+        uncount) the same recipe twice.
+        """
+        if not published:
+            return 0
+        try:
+            demoted = 0
+            for recipe_id, fingerprint in published:
+                matches = near_duplicates(recipe_id, fingerprint)
+                if not matches:
+                    continue
+                original, *newer = sorted(matches + [recipe_id])
+                rows = Recipe.query.filter(Recipe.id.in_(newer), Recipe.status == 'published').with_for_update()
+                for recipe in rows:
+                    recipe.status, recipe.duplicate_of = 'duplicate', original
+                    demoted += 1
+            if demoted:
+                analytics.count({'recipes_shared': -demoted})
+            db.session.commit()
+            return demoted
+        except Exception as e:
+            # The recipes stay published, as they would have been without this pass
+            db.session.rollback()
+            self.app.logger.error(f"Error checking published recipes for duplicates: {str(e)}")
+            return 0
+
+    def run(self, poll_interval=1.0, once=False):
+        """Process batches until the queue is empty (``once``) or forever, polling when idle"""
+        while True:
+            if self.run_once():
+                continue
+            if once:
+                return
+            time.sleep(poll_interval)
+
+
+def work(options):
+    from app import create_app
+
+    worker = RecipeWorker(create_app(), options.batch_size, options.claim_timeout)
+    worker.run(options.poll_interval, options.once)
+    print(f"[{os.getpid()}] processed {worker.processed}: {worker.published} published, "
+          f"{worker.duplicates} duplicates, {worker.failed} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyse and publish community recipe submissions')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='seconds between polls of an empty queue')
+    parser.add_argument('--claim-timeout', type=int, default=300, help='seconds before an unfinished claim is retried')
+    parser.add_argument('--once', action='store_true', help='exit once the queue is empty')
+    options = parser.parse_args()
+
+    if options.workers <= 1:
+        work(options)
+        return
+    processes = [multiprocessing.Process(target=work, args=(options,), name=f'recipe-worker-{i}')
+                 for i in range(options.workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
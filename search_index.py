@@ -0,0 +1,881 @@
+"""Incrementally maintained full-text index behind /api/search.
+
+Documents are ``{'kind', 'id', 'title', 'body', 'category'}`` dicts (meals
+and published community recipes). Postings live in numpy arrays: a
+base segment in CSR form (one run of document slots and weights per term)
+plus a small in-memory delta of postings added since. Updating a document
+retires its old slot and appends a new one, so writes never touch the base;
+the delta is merged into a new base in the background once it grows past a
+threshold, and the whole index is rebuilt from the database when most slots
+are dead or the catalog changed in bulk.
+
+The last query term also matches as a prefix (search-as-you-type), and terms
+of four or more characters that aren't in the vocabulary match words one
+edit away. Matches are scored with BM25 over field-weighted term
+frequencies and must contain every query term, falling back to any term
+when nothing does. Category facet counts are one bincount over the matches.
+
+``SearchService`` persists the index as ``index.npz`` in its directory and
+appends committed row changes to ``journal.jsonl``. Startup loads the
+snapshot in the background and replays the journal from the offset the
+snapshot was taken at, instead of reindexing, and every worker tails the
+journal so a write in one process reaches the others' searches. Saving a
+snapshot drops the journal entries it covers.
+
+Usage:
+    python search_index.py    # rebuild the snapshot from the database before starting the app
+"""
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict, deque
+
+import numpy as np
+
+from knowledge import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: without a lock, run a single app process
+    fcntl = None
+
+KINDS = ('meal', 'recipe')
+FIELD_WEIGHTS = (('title', 3.0), ('category', 2.0), ('body', 1.0))
+PREFIX_MIN_LENGTH = 2
+PREFIX_SCAN = 2000  # vocabulary words considered for one prefix
+PREFIX_EXPANSIONS = 30  # of which the most frequent are searched
+PREFIX_FACTOR = 0.8
+JOURNAL_HEADER_MAX = 64  # bytes; the {"base": N} line of a compacted journal
+FUZZY_MIN_LENGTH = 4
+FUZZY_FACTOR = 0.6
+FACET_LIMIT = 20
+RESULT_CACHE_MIN_MATCHES = 20000  # queries matching fewer are cheap enough to rerun
+RESULT_CACHE_DEPTH = 500
+RESULT_CACHE_SIZE = 256
+TOP_SAMPLE_STRIDE = 64
+SPARSE_FRACTION = 4  # match by merging postings when they cover under 1/4 of the slots
+BM25_K1 = 1.2
+BM25_B = 0.75
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def document_terms(document):
+    """``{term: weighted frequency}`` for a document; title words count most"""
+    terms = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS:
+        for term in tokenize(document.get(field) or ''):
+            terms[term] += weight
+    return terms
+
+
+def edits1(word):
+    """Every string one insert, delete, substitution or transposition from ``word``"""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    edits = {left + right[1:] for left, right in splits if right}
+    edits.update(left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1)
+    edits.update(left + c + right[1:] for left, right in splits if right for c in ALPHABET)
+    edits.update(left + c + right for left, right in splits for c in ALPHABET)
+    edits.discard(word)
+    return edits
+
+
+def impact(tf, length, average_length):
+    """BM25 term-frequency component, stored per posting so queries only multiply by idf"""
+    return tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+
+
+def sum_by_slot(postings):
+    """Merge ``[(slots, scores)]`` into sorted unique slots with summed scores"""
+    if len(postings) == 1:
+        return postings[0]
+    docs = np.concatenate([docs for docs, _ in postings])
+    scores = np.concatenate([scores for _, scores in postings])
+    order = np.argsort(docs, kind='stable')
+    docs, scores = docs[order], scores[order]
+    starts = np.flatnonzero(np.concatenate(([True], docs[1:] != docs[:-1])))
+    return docs[starts], np.add.reduceat(scores, starts)
+
+
+def posting_count(postings):
+    return sum(len(docs) for docs, _ in postings)
+
+
+def top_slots(scores, key_of, limit):
+    """Indexes of the ``limit`` best ``scores``, ordered by score and then key.
+
+    ``key_of(indexes)`` returns the keys for some of the indexes, so only the
+    winners and the matches tied with the cut-off are looked up.
+    """
+    if len(scores) > limit * TOP_SAMPLE_STRIDE * 4:
+        # The limit-th best score of a sample is a floor for the limit-th best overall
+        sample = scores[::TOP_SAMPLE_STRIDE]
+        top = np.flatnonzero(scores >= np.partition(sample, len(sample) - limit)[len(sample) - limit])
+    else:
+        top = np.arange(len(scores))
+    if len(scores) > limit:
+        candidates = scores[top]
+        cutoff = candidates[np.argpartition(-candidates, limit - 1)[limit - 1]]
+        above = top[candidates > cutoff]
+        # Ties at the cut-off are broken by key, so pages line up with their cursors
+        tied = top[candidates == cutoff]
+        wanted = limit - len(above)
+        if len(tied) > wanted:
+            tied = tied[np.argpartition(key_of(tied), wanted - 1)[:wanted]]
+        top = np.concatenate([above, tied])
+    return top[np.lexsort((key_of(top), -scores[top]))]
+
+
+def result_page(total, facets, scores, keys):
+    hits = [(KINDS[key % len(KINDS)], key // len(KINDS), score) for score, key in zip(scores.tolist(), keys.tolist())]
+    last = (hits[-1][2], int(keys[-1])) if hits else None
+    return {'total': total, 'facets': facets, 'hits': hits, 'last': last}
+
+
+def cached_page(cached, limit, after):
+    """The page after ``after`` from a cached ``(total, facets, scores, keys)`` head, or None past its end"""
+    total, facets, scores, keys = cached
+    start = 0
+    if after is not None:
+        last_score, last_key = after
+        # The head is sorted by descending score, then ascending key
+        lo = int(np.searchsorted(-scores, -last_score, side='left'))
+        hi = int(np.searchsorted(-scores, -last_score, side='right'))
+        start = lo + int(np.searchsorted(keys[lo:hi], last_key, side='right'))
+    if start + limit > len(keys) and len(keys) < total:
+        return None
+    return result_page(total, facets, scores[start:start + limit], keys[start:start + limit])
+
+
+def document_key(kind, doc_id):
+    return int(doc_id) * len(KINDS) + KINDS.index(kind)
+
+
+def grown(array, capacity):
+    bigger = np.zeros(capacity, dtype=array.dtype)
+    bigger[:len(array)] = array
+    return bigger
+
+
+def csr(term_ids, docs, weights, vocabulary_size):
+    """``(offsets, docs, weights)`` with each term's postings in one run, in slot order"""
+    order = np.argsort(term_ids, kind='stable')
+    offsets = np.zeros(vocabulary_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=vocabulary_size), out=offsets[1:])
+    return offsets, docs[order], weights[order]
+
+
+def merged_postings(offsets, docs, weights, alive, deltas, vocabulary_size):
+    """CSR postings of a base segment's live documents plus ``deltas``"""
+    keep = alive[docs]
+    term_ids = [np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))[keep]]
+    all_docs, all_weights = [docs[keep].astype(np.int32)], [weights[keep]]
+    for delta in deltas:
+        for term_id, (delta_docs, delta_weights) in delta.items():
+            term_ids.append(np.full(len(delta_docs), term_id, dtype=np.int32))
+            all_docs.append(np.asarray(delta_docs, dtype=np.int32))
+            all_weights.append(np.asarray(delta_weights, dtype=np.float32))
+    return csr(np.concatenate(term_ids), np.concatenate(all_docs), np.concatenate(all_weights), vocabulary_size)
+
+
+class SearchIndex:
+    """In-memory inverted index; every public method is thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._allocate(1024)
+
+    def _allocate(self, capacity):
+        self._size = 0
+        self._dead = 0
+        self._kind_live = [0] * len(KINDS)
+        self._keys = np.zeros(capacity, dtype=np.int64)
+        self._category = np.zeros(capacity, dtype=np.int32)
+        self._length = np.zeros(capacity, dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._slot_of = {}
+        self._total_length = 0.0
+        self._categories = []
+        self._category_codes = {}
+        self._term_list = []
+        self._terms = {}
+        self._vocabulary = []  # sorted, for prefix ranges
+        self._df = np.zeros(1024, dtype=np.int32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._delta = {}
+        self._frozen = {}
+        self._results = OrderedDict()  # broad query -> cached head of its results
+        self.delta_postings = 0
+
+    def __len__(self):
+        return self._size - self._dead
+
+    @property
+    def dead(self):
+        return self._dead
+
+    def clear_cache(self):
+        with self._lock:
+            self._results.clear()
+
+    # Writes
+
+    def build(self, documents):
+        """Replace the contents with ``documents`` in one pass"""
+        with self._lock:
+            self._allocate(1024)
+            # Flat typed arrays; per-term lists would cost ~70 bytes a posting
+            term_ids, docs, weights = array('i'), array('i'), array('f')
+            for document in documents:
+                slot, terms = self._place(document)
+                for term, weight in terms.items():
+                    term_ids.append(self._term_id(term, sort=False))
+                    docs.append(slot)
+                    weights.append(weight)
+            self._vocabulary = sorted(self._term_list)
+            docs = np.frombuffer(docs, dtype=np.int32)
+            weights = impact(np.frombuffer(weights, dtype=np.float32), self._length[docs], self._average_length())
+            self._offsets, self._docs, self._weights = csr(
+                np.frombuffer(term_ids, dtype=np.int32), docs, weights.astype(np.float32), len(self._term_list))
+            self._df = grown(np.diff(self._offsets).astype(np.int32), max(1024, len(self._term_list) * 2))
+
+    def add(self, documents):
+        """Insert or replace documents"""
+        with self._lock:
+            for document in documents:
+                self._add(document)
+
+    def remove(self, kind, doc_id):
+        with self._lock:
+            self._retire(document_key(kind, doc_id))
+
+    def _retire(self, key):
+        self._results.clear()
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            self._alive[slot] = False
+            self._total_length -= float(self._length[slot])
+            self._dead += 1
+            self._kind_live[key % len(KINDS)] -= 1
+
+    def _average_length(self):
+        live = self._size - self._dead
+        return max(self._total_length / live, 1e-6) if live else 1.0
+
+    def _add(self, document):
+        slot, terms = self._place(document)
+        length, average_length = float(self._length[slot]), self._average_length()
+        for term, tf in terms.items():
+            term_id = self._term_id(term)
+            postings = self._delta.get(term_id)
+            if postings is None:
+                postings = self._delta[term_id] = ([], [])
+            postings[0].append(slot)
+            postings[1].append(impact(tf, length, average_length))
+            self._df[term_id] += 1
+        self.delta_postings += len(terms)
+
+    def _place(self, document):
+        """Give ``document`` a new slot, retiring any old one; returns ``(slot, terms)``"""
+        key = document_key(document['kind'], document['id'])
+        self._retire(key)
+        if self._size == len(self._keys):
+            capacity = len(self._keys) * 2
+            self._keys = grown(self._keys, capacity)
+            self._category = grown(self._category, capacity)
+            self._length = grown(self._length, capacity)
+            self._alive = grown(self._alive, capacity)
+        slot = self._size
+        self._size += 1
+        self._slot_of[key] = slot
+        self._results.clear()
+
+        terms = document_terms(document)
+        length = sum(terms.values())
+        self._keys[slot] = key
+        self._category[slot] = self._category_code((document.get('category') or '').strip().lower())
+        self._length[slot] = length
+        self._alive[slot] = True
+        self._total_length += length
+        self._kind_live[key % len(KINDS)] += 1
+        return slot, terms
+
+    def _category_code(self, category):
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self._categories)
+            self._categories.append(category)
+        return code
+
+    def _term_id(self, term, sort=True):
+        term_id = self._terms.get(term)
+        if term_id is None:
+            term_id = self._terms[term] = len(self._term_list)
+            self._term_list.append(term)
+            if sort:
+                insort(self._vocabulary, term)
+            if term_id == len(self._df):
+                self._df = grown(self._df, term_id * 2)
+        return term_id
+
+    # Merging the delta into the base
+
+    def freeze(self):
+        """Set the current delta aside for merge(); returns False if a merge is already pending"""
+        with self._lock:
+            if self._frozen:
+                return False
+            self._frozen, self._delta = self._delta, {}
+            return True
+
+    def merge(self):
+        """Fold the frozen delta into a new base; searches and writes continue meanwhile"""
+        with self._lock:
+            base = (self._offsets, self._docs, self._weights)
+            alive = self._alive.copy()
+            frozen = self._frozen
+            vocabulary_size = len(self._term_list)
+        offsets, docs, weights = merged_postings(*base, alive, [frozen], vocabulary_size)
+        with self._lock:
+            self._offsets, self._docs, self._weights = offsets, docs, weights
+            self._frozen = {}
+            # Document frequencies now count live postings again
+            self._df[:vocabulary_size] = np.diff(offsets)
+            self._df[vocabulary_size:] = 0
+            self.delta_postings = 0
+            for term_id, (delta_docs, _) in self._delta.items():
+                self._df[term_id] += len(delta_docs)
+                self.delta_postings += len(delta_docs)
+
+    # Snapshots
+
+    def save(self, path, **meta):
+        """Write the index to ``path`` (an .npz file) atomically, with ``meta`` values alongside"""
+        with self._lock:
+            n = self._size
+            arrays = {
+                'keys': self._keys[:n].copy(),
+                'category': self._category[:n].copy(),
+                'length': self._length[:n].copy(),
+                'alive': self._alive[:n].copy(),
+                'categories': np.array(self._categories or [''], dtype=str),
+                'terms': np.array(self._term_list or [''], dtype=str),
+                'category_count': np.array(len(self._categories)),
+                'term_count': np.array(len(self._term_list)),
+                'meta': np.array(json.dumps(meta)),
+            }
+            base = (self._offsets, self._docs, self._weights)
+            deltas = [self._frozen, self._delta]
+            vocabulary_size = len(self._term_list)
+        arrays['offsets'], arrays['docs'], arrays['weights'] = merged_postings(
+            *base, arrays['alive'], deltas, vocabulary_size)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """``(index, meta)`` from a file written by save()"""
+        index = cls()
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            term_count = int(data['term_count'])
+            index._keys = data['keys']
+            index._category = data['category']
+            index._length = data['length']
+            index._alive = data['alive']
+            index._categories = data['categories'].tolist()[:int(data['category_count'])]
+            index._term_list = data['terms'].tolist()[:term_count]
+            index._offsets, index._docs, index._weights = data['offsets'], data['docs'], data['weights']
+        if not len(index._keys):
+            return cls(), meta
+        index._size = len(index._keys)
+        index._dead = int(index._size - np.count_nonzero(index._alive))
+        live = np.flatnonzero(index._alive)
+        index._slot_of = dict(zip(index._keys[live].tolist(), live.tolist()))
+        index._total_length = float(index._length[live].sum())
+        index._kind_live = np.bincount(index._keys[live] % len(KINDS), minlength=len(KINDS)).tolist()
+        index._category_codes = {category: code for code, category in enumerate(index._categories)}
+        index._terms = {term: term_id for term_id, term in enumerate(index._term_list)}
+        index._vocabulary = sorted(index._term_list)
+        index._df = grown(np.diff(index._offsets).astype(np.int32), max(1024, term_count * 2))
+        return index, meta
+
+    # Queries
+
+    def search(self, query, kind=None, category=None, limit=10, after=None):
+        """Best matches for ``query`` as ``{'total', 'facets', 'hits': [(kind, id, score)], 'last'}``.
+
+        ``after`` is the ``(score, key)`` cursor of the last hit on the previous
+        page, as returned in ``last``. Facets count matches in every category,
+        before the ``category`` filter.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        prefix = bool(terms) and not query[-1:].isspace()
+        category = category.strip().lower() if category else None
+        with self._lock:
+            n = self._size
+            live = n - self._dead
+            if not terms or not live:
+                return {'total': 0, 'facets': {}, 'hits': [], 'last': None}
+            cache_key = (tuple(terms), prefix, kind, category)
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                page = cached_page(cached, limit, after)
+                if page is not None:
+                    return page
+
+            # Per query word, the (slots, scores) of every vocabulary word it matches
+            per_term = []
+            for position, term in enumerate(terms):
+                postings = []
+                for term_id, factor in self._expand(term, prefix and position == len(terms) - 1):
+                    docs, impacts = self._postings(term_id)
+                    df = max(int(self._df[term_id]), len(docs))
+                    postings.append((docs, impacts * np.float32(factor * math.log(1 + (live - df + 0.5) / (df + 0.5)))))
+                if postings:
+                    per_term.append(postings)
+            if not per_term:
+                return {'total': 0, 'facets': {}, 'hits': [], 'last': None}
+
+            matched = scores = None
+            if len(per_term) == 1 and len(per_term[0]) == 1:
+                # One word, no expansions: its postings are the matches, each slot once
+                matched, scores = per_term[0][0]
+            else:
+                per_term.sort(key=posting_count)
+                # Words in most documents narrow nothing down; like stop words they only
+                # add to the score, unless the query has nothing rarer
+                required = [postings for postings in per_term if posting_count(postings) * 2 <= live] or per_term
+                if len(per_term) < len(terms):
+                    required = []  # a word matched nothing, so no document has them all
+                elif len(per_term) > 1 and posting_count(required[0]) * SPARSE_FRACTION < n:
+                    matched, scores = self._intersect(required, per_term[len(required):])
+                if matched is None or not len(matched):
+                    matched, scores = self._accumulate(per_term, n, required)
+
+            if self._dead:
+                live_matches = self._alive[matched]
+                matched, scores = matched[live_matches], scores[live_matches]
+            if kind is not None and self._kind_live[KINDS.index(kind)] < live:
+                wanted = self._keys[matched] % len(KINDS) == KINDS.index(kind)
+                matched, scores = matched[wanted], scores[wanted]
+            categories = self._category[matched]
+            counts = np.bincount(categories, minlength=len(self._categories))
+            if category is not None:
+                wanted = categories == self._category_codes.get(category, -1)
+                matched, scores = matched[wanted], scores[wanted]
+            facets = {self._categories[code]: int(counts[code])
+                      for code in np.argsort(-counts, kind='stable')[:FACET_LIMIT] if counts[code]}
+            total = len(matched)
+
+            def key_of(indexes):
+                return self._keys[matched[indexes]]
+
+            if total >= RESULT_CACHE_MIN_MATCHES:
+                # Broad queries are the expensive ones; keep their best results sorted for the next pages
+                top = top_slots(scores, key_of, RESULT_CACHE_DEPTH)
+                cached = (total, facets, scores[top], key_of(top))
+                self._results[cache_key] = cached
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+                page = cached_page(cached, limit, after)
+                if page is not None:
+                    return page
+            if after is not None:
+                last_score, last_key = after
+                page = (scores < last_score) | ((scores == last_score) & (self._keys[matched] > last_key))
+                matched, scores = matched[page], scores[page]
+            top = top_slots(scores, key_of, limit)
+            return result_page(total, facets, scores[top], key_of(top))
+
+    def _intersect(self, required, optional):
+        """Slots matching every ``required`` word, found by probing the rarest word's slots in the
+        other words' runs; ``optional`` words only add to the scores"""
+        matched, scores = sum_by_slot(required[0])
+        for number, postings in enumerate(required[1:] + optional, start=1):
+            found = np.zeros(len(matched), dtype=bool)
+            extra = np.zeros(len(matched), dtype=np.float32)
+            for docs, term_scores in postings:
+                if not len(docs):
+                    continue
+                at = np.minimum(np.searchsorted(docs, matched), len(docs) - 1)
+                hit = docs[at] == matched
+                found |= hit
+                extra += np.where(hit, term_scores[at], 0)
+            if number < len(required):
+                matched, scores = matched[found], scores[found] + extra[found]
+                if not len(matched):
+                    break
+            else:
+                scores = scores + extra
+        return matched, scores
+
+    def _accumulate(self, per_term, n, required):
+        """Scores of the slots matching every ``required`` word, or else any word"""
+        if len(required) < 2 and sum(map(posting_count, per_term)) * SPARSE_FRACTION < n:
+            # Few postings: merging the slot-sorted runs beats a pass over every slot
+            union = sum_by_slot([posting for postings in per_term for posting in postings])
+            if len(required) == 1 and len(per_term) > 1:
+                matched, _ = sum_by_slot(required[0])
+                return matched, union[1][np.searchsorted(union[0], matched)]
+            return union
+        all_docs = np.concatenate([docs for postings in per_term for docs, _ in postings])
+        score = np.bincount(all_docs, weights=np.concatenate([s for postings in per_term for _, s in postings]),
+                            minlength=n)
+        matched = None
+        if len(required) > 1:
+            hits = np.zeros(n, dtype=np.uint8)
+            for postings in required:
+                if len(postings) == 1:
+                    hits[postings[0][0]] += 1
+                else:
+                    # A slot can match several expansions of one word but counts once
+                    seen = np.zeros(n, dtype=bool)
+                    for docs, _ in postings:
+                        seen[docs] = True
+                    hits += seen
+            matched = np.flatnonzero(hits == len(required))
+        elif len(required) == 1 and len(required) < len(per_term):
+            matched, _ = sum_by_slot(required[0])
+        if matched is None or not len(matched):
+            matched = np.flatnonzero(score)
+        return matched, score[matched]
+
+    def _expand(self, term, prefix):
+        """``[(term_id, factor)]`` that a query term matches; call with the lock held"""
+        expansions = {}
+        term_id = self._terms.get(term)
+        if term_id is not None:
+            expansions[term_id] = 1.0
+        if prefix and len(term) >= PREFIX_MIN_LENGTH:
+            start = bisect_left(self._vocabulary, term)
+            end = bisect_left(self._vocabulary, term + '\uffff', start, min(start + PREFIX_SCAN, len(self._vocabulary)))
+            candidates = np.array([self._terms[word] for word in self._vocabulary[start:end]], dtype=np.int64)
+            if len(candidates) > PREFIX_EXPANSIONS:
+                candidates = candidates[np.argsort(-self._df[candidates], kind='stable')[:PREFIX_EXPANSIONS]]
+            for candidate in candidates.tolist():
+                expansions.setdefault(candidate, PREFIX_FACTOR)
+        if not expansions and len(term) >= FUZZY_MIN_LENGTH:
+            for word in edits1(term):
+                candidate = self._terms.get(word)
+                if candidate is not None:
+                    expansions[candidate] = FUZZY_FACTOR
+        return list(expansions.items())
+
+    def _postings(self, term_id):
+        docs, weights = [], []
+        if term_id < len(self._offsets) - 1:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs.append(self._docs[start:end])
+            weights.append(self._weights[start:end])
+        for delta in (self._frozen, self._delta):
+            postings = delta.get(term_id)
+            if postings:
+                docs.append(np.asarray(postings[0], dtype=np.int64))
+                weights.append(np.asarray(postings[1], dtype=np.float32))
+        if len(docs) == 1:
+            return docs[0], weights[0]
+        return np.concatenate(docs).astype(np.int64), np.concatenate(weights)
+
+
+class SearchUnavailable(Exception):
+    """The index is still being loaded or built in the background"""
+
+
+class JournalGap(Exception):
+    """Entries after an offset are gone: the journal was reset or compacted past it"""
+
+
+class SearchService:
+    """A SearchIndex kept in sync with the journal and persisted under ``directory``.
+
+    ``source()`` yields every document, for full rebuilds; ``version()``
+    returns the catalog version, and a change means a bulk write the journal
+    didn't see, so the index is rebuilt in the background. Loading the
+    snapshot (or building the index when there is none) also happens in the
+    background: until it finishes, search() raises SearchUnavailable. Run
+    ``python search_index.py`` before starting the app to have a snapshot ready.
+    """
+
+    def __init__(self, directory, source, version, merge_threshold=50000):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, 'index.npz')
+        self.journal = SearchJournal(os.path.join(directory, 'journal.jsonl'))
+        self.source = source
+        self.version = version
+        self.merge_threshold = merge_threshold
+        self.index = None
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._catalog_version = None
+        self._worker = None
+        self._loaded = threading.Event()
+        self.rebuilds = 0
+        self.merges = 0
+        self.replayed = 0
+        self.searches = 0
+        self._latencies = deque(maxlen=2048)
+
+    def search(self, query, **options):
+        index = self.refresh()
+        if index is None:
+            raise SearchUnavailable('The search index is loading')
+        started = time.perf_counter()
+        result = index.search(query, **options)
+        with self._lock:
+            self.searches += 1
+            self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def ready(self, timeout=None):
+        """Start loading the index if needed and wait up to ``timeout`` seconds; True once it serves"""
+        self.refresh()
+        return self._loaded.wait(timeout)
+
+    def refresh(self):
+        """Apply journal entries written since the last call; returns the index, or None while it loads"""
+        with self._lock:
+            if self.index is None:
+                if self._worker is None:
+                    self._start(self._open)
+                return None
+            if self._worker is None and self.version() != self._catalog_version:
+                self._start(self._rebuild)
+            self._replay()
+            if self._worker is None:
+                if self.index.dead > max(len(self.index), 10000):
+                    self._start(self._rebuild)
+                elif self.index.delta_postings >= self.merge_threshold and self.index.freeze():
+                    self._start(self._merge, self._offset)
+            return self.index
+
+    def _open(self):
+        # Off the request path: the snapshot when it matches the catalog and the journal, else a build
+        try:
+            version = self.version()
+            try:
+                index, meta = SearchIndex.load(self.snapshot_path)
+            except (OSError, ValueError, KeyError):
+                index, meta = None, {}
+            start, end = self.journal.bounds()
+            if index is not None and meta.get('version') == version and start <= meta.get('offset', 0) <= end:
+                self._swap(index, meta.get('offset', 0), version)
+            else:
+                self._swap(*self._build(version), version)
+        finally:
+            self._worker = None
+
+    def _rebuild(self):
+        # Builds off to the side; the current index keeps serving until the swap
+        try:
+            version = self.version()
+            self._swap(*self._build(version), version)
+        finally:
+            self._worker = None
+
+    def _build(self, version):
+        """``(index, journal offset)`` built from ``source()``, saved as the snapshot"""
+        offset = self.journal.size()
+        index = SearchIndex()
+        index.build(self.source())
+        os.makedirs(self.directory, exist_ok=True)
+        index.save(self.snapshot_path, version=version, offset=offset)
+        self.journal.compact(offset)
+        with self._lock:
+            self.rebuilds += 1
+        return index, offset
+
+    def _swap(self, index, offset, version):
+        with self._lock:
+            self.index, self._offset, self._catalog_version = index, offset, version
+            self._replay()
+        self._loaded.set()
+
+    def _replay(self):
+        try:
+            entries, self._offset = self.journal.read(self._offset)
+        except JournalGap:
+            # Reset by a rebuild elsewhere, or compacted past what we have read: reload
+            # its snapshot in the background and keep serving this index meanwhile
+            if self._worker is None:
+                self._start(self._open)
+            return
+        for entry in entries:
+            if entry['op'] == 'upsert':
+                self.index.add([entry['document']])
+            else:
+                self.index.remove(entry['kind'], entry['id'])
+        self.replayed += len(entries)
+
+    def _start(self, target, *args):
+        self._worker = threading.Thread(target=target, args=args, name='search-index', daemon=True)
+        self._worker.start()
+
+    def _merge(self, offset):
+        # The snapshot may already hold entries past ``offset``; replaying them is
+        # harmless, since an upsert replaces its document and removals repeat cleanly
+        try:
+            self.index.merge()
+            self.index.save(self.snapshot_path, version=self._catalog_version, offset=offset)
+            self.journal.compact(offset)
+            self.merges += 1
+        finally:
+            self._worker = None
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            index = self.index
+            stats = {
+                'ready': index is not None,
+                'documents': len(index) if index is not None else 0,
+                'dead_slots': index.dead if index is not None else 0,
+                'delta_postings': index.delta_postings if index is not None else 0,
+                'searches': self.searches,
+                'journal_entries_applied': self.replayed,
+                'merges': self.merges,
+                'rebuilds': self.rebuilds,
+                'updating': self._worker is not None,
+            }
+
+        def percentile(pct):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000, 3)
+
+        stats['p50_ms'] = percentile(50)
+        stats['p99_ms'] = percentile(99)
+        return stats
+
+
+class SearchJournal:
+    """Append-only JSON-lines log of document changes, shared by every worker process.
+
+    Offsets are logical and keep counting when compact() drops the entries a
+    snapshot covers: the compacted file starts with a ``{"base": N}`` line
+    giving the offset of its first entry. Appends and compactions hold an
+    exclusive lock on ``<path>.lock`` so no append lands in a replaced file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._lock_file = None
+
+    def append(self, entries):
+        """Append entries in one write, so lines from concurrent processes don't interleave"""
+        if not entries:
+            return
+        data = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries).encode()
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._acquire()
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+            finally:
+                self._release()
+
+    def _acquire(self):
+        if fcntl is None:
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.path + '.lock', 'ab')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+
+    def _release(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _layout(self, f):
+        """``(offset of the first entry, header bytes, end offset)`` of an open journal file"""
+        first = f.readline(JOURNAL_HEADER_MAX)
+        size = os.fstat(f.fileno()).st_size
+        if first.startswith(b'{"base":') and first.endswith(b'\n'):
+            base = json.loads(first)['base']
+            return base, len(first), base + size - len(first)
+        return 0, 0, size
+
+    def bounds(self):
+        """``(start, end)``: the oldest offset still readable and the offset after the last entry"""
+        try:
+            with open(self.path, 'rb') as f:
+                start, _, end = self._layout(f)
+                return start, end
+        except OSError:
+            return 0, 0
+
+    def size(self):
+        return self.bounds()[1]
+
+    def read(self, offset):
+        """``(entries, new offset)`` for complete lines after ``offset``; JournalGap if they are gone"""
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            if offset:
+                raise JournalGap(offset)
+            return [], offset
+        with f:
+            start, header, end = self._layout(f)
+            if not start <= offset <= end:
+                raise JournalGap(offset)
+            if offset == end:
+                return [], offset
+            f.seek(header + offset - start)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        entries = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return entries, offset + end
+
+    def compact(self, offset):
+        """Drop the entries before ``offset``, which a saved snapshot already covers"""
+        with self._lock:
+            self._acquire()
+            try:
+                try:
+                    with open(self.path, 'rb') as f:
+                        start, header, end = self._layout(f)
+                        if not start < offset <= end:
+                            return  # already compacted past it, or the journal was reset since
+                        f.seek(header + offset - start)
+                        rest = f.read()
+                except OSError:
+                    return
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(json.dumps({'base': offset}, separators=(',', ':')).encode() + b'\n')
+                    f.write(rest)
+                os.replace(tmp_path, self.path)
+            finally:
+                self._release()
+
+
+def upsert_entry(document):
+    return {'op': 'upsert', 'document': document}
+
+
+def remove_entry(kind, doc_id):
+    return {'op': 'remove', 'kind': kind, 'id': doc_id}
+
+
+if __name__ == '__main__':
+    from app import app
+    from search_routes import create_search_service
+
+    with app.app_context():
+        service = create_search_service(app)
+        started = time.perf_counter()
+        index, _ = service._build(service.version())
+        print(f"Indexed {len(index)} documents in {time.perf_counter() - started:.1f}s")
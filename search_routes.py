@@ -0,0 +1,171 @@
+from flask import Blueprint, current_app, has_app_context, request, jsonify
+from flask_jwt_extended import jwt_required
+import os
+from database import read_only
+from extensions import db, csrf, lazy
+from models import Meal, Recipe
+from pagination import InvalidQuery, decode_cursor, page_limit, split_page
+
+search_bp = Blueprint('search', __name__)
+
+_tracking = False
+
+@search_bp.record_once
+def setup(state):
+    # db.session is shared by every app, so its hooks are registered once and
+    # write to the journal of whichever app is committing
+    global _tracking
+    if not _tracking:
+        track_search_changes(db.session)
+        _tracking = True
+
+def meal_document(meal):
+    return {
+        'kind': 'meal',
+        'id': meal.id,
+        'title': meal.name,
+        'body': meal.description or '',
+        'category': meal.category or '',
+    }
+
+def recipe_document(recipe):
+    return {
+        'kind': 'recipe',
+        'id': recipe.id,
+        'title': recipe.title,
+        'body': recipe.description or '',
+        'category': recipe.category or '',
+    }
+
+def search_directory(app):
+    return os.path.join(app.instance_path, 'search')
+
+def track_search_changes(session):
+    """Journal committed Meal and published Recipe changes; bulk Meal writes bump the meal stamp instead"""
+    from sqlalchemy import event
+
+    @event.listens_for(session, 'after_flush')
+    def collect_search_changes(session, flush_context):
+        pending = session.info.setdefault('search_changes', [])
+        for obj in session.new.union(session.dirty):
+            if isinstance(obj, Meal):
+                pending.append(('upsert', meal_document(obj)))
+            elif isinstance(obj, Recipe):
+                if obj.status == 'published':
+                    pending.append(('upsert', recipe_document(obj)))
+                elif obj not in session.new:
+                    pending.append(('remove', ('recipe', obj.id)))
+        for obj in session.deleted:
+            if isinstance(obj, Meal):
+                pending.append(('remove', ('meal', obj.id)))
+            elif isinstance(obj, Recipe):
+                pending.append(('remove', ('recipe', obj.id)))
+
+    @event.listens_for(session, 'after_commit')
+    def journal_search_changes(session):
+        pending = session.info.pop('search_changes', None)
+        if not pending or not has_app_context():
+            return
+        from search_index import remove_entry, upsert_entry
+        entries = [upsert_entry(payload) if action == 'upsert' else remove_entry(*payload)
+                   for action, payload in pending]
+        try:
+            get_search_journal().append(entries)
+        except OSError as e:
+            # The row is committed either way; the next rebuild picks it up
+            current_app.logger.error(f"Error journaling search changes: {str(e)}")
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_search_changes(session):
+        session.info.pop('search_changes', None)
+
+def get_search_journal():
+    def create(app):
+        from search_index import SearchJournal
+        return SearchJournal(os.path.join(search_directory(app), 'journal.jsonl'))
+    return lazy('search_journal', create)
+
+def create_search_service(app):
+    from search_index import SearchService
+
+    def documents():
+        # Runs on the rebuild thread too, so it brings its own app context
+        with app.app_context():
+            query = db.session.query(Meal.id, Meal.name, Meal.description, Meal.category).yield_per(5000)
+            for row in query:
+                yield meal_document(row)
+            query = db.session.query(Recipe.id, Recipe.title, Recipe.description, Recipe.category).filter(
+                Recipe.status == 'published').yield_per(5000)
+            for row in query:
+                yield recipe_document(row)
+
+    return SearchService(search_directory(app), documents, app.extensions['meal_version'].current,
+                         merge_threshold=app.config['SEARCH_MERGE_THRESHOLD'])
+
+def get_search_service():
+    """Search index loaded from its snapshot in the background on first use and kept current through the journal"""
+    return lazy('search', create_search_service)
+
+@search_bp.route('/api/search', methods=['GET'])
+@csrf.exempt
+@jwt_required()
+@read_only
+def search():
+    """Meals and recipes matching ``q``, best first, with category facet counts; filter by ``kind`` or ``category``"""
+    from search_index import KINDS, SearchUnavailable, document_key
+
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind') or None
+    category = (request.args.get('category') or '').strip().lower() or None
+    try:
+        if not query:
+            raise InvalidQuery('q is required')
+        if len(query) > current_app.config['SEARCH_MAX_QUERY_LENGTH']:
+            raise InvalidQuery(f"q must be at most {current_app.config['SEARCH_MAX_QUERY_LENGTH']} characters")
+        if kind is not None and kind not in KINDS:
+            raise InvalidQuery(f"kind must be one of: {', '.join(KINDS)}")
+        after = decode_cursor(request.args.get('cursor'), ((int, float), int))
+        limit = page_limit(request.args, 10, 50)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # A trailing space ends the last word, so it no longer matches as a prefix
+        text = query + ' ' if request.args['q'][-1:].isspace() else query
+        try:
+            found = get_search_service().search(text, kind=kind, category=category, limit=limit + 1, after=after)
+        except SearchUnavailable:
+            # Loaded or built in the background on first use; see search_index.py
+            response = jsonify({'error': 'Search is starting up, try again shortly'})
+            response.headers['Retry-After'] = '2'
+            return response, 503
+        hits, next_cursor = split_page(found['hits'], limit, lambda hit: (hit[2], document_key(hit[0], hit[1])))
+
+        rows = {}
+        meal_ids = [doc_id for doc_kind, doc_id, _ in hits if doc_kind == 'meal']
+        if meal_ids:
+            meals = db.session.query(Meal.id, Meal.name, Meal.category).filter(Meal.id.in_(meal_ids))
+            rows.update((('meal', row.id), row) for row in meals)
+        recipe_ids = [doc_id for doc_kind, doc_id, _ in hits if doc_kind == 'recipe']
+        if recipe_ids:
+            recipes = db.session.query(Recipe.id, Recipe.title.label('name'), Recipe.category).filter(
+                Recipe.id.in_(recipe_ids), Recipe.status == 'published')
+            rows.update((('recipe', row.id), row) for row in recipes)
+        results = []
+        for doc_kind, doc_id, score in hits:
+            row = rows.get((doc_kind, doc_id))
+            if row is None:
+                continue  # deleted since the index last caught up
+            results.append({'kind': doc_kind, 'id': doc_id, 'name': row.name, 'category': row.category,
+                            'score': round(score, 4)})
+
+        return jsonify({
+            'query': query,
+            'total': found['total'],
+            'results': results,
+            'facets': {'category': found['facets']},
+            'next_cursor': next_cursor,
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error searching: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -1,13 +1,9 @@
-from app import app, db, Quiz, Meal
+from app import app
+from catalog_import import import_catalog
 import json
 
 def seed_data():
     with app.app_context():
-        # Clear existing data
-        Quiz.query.delete()
-        Meal.query.delete()
-        db.session.commit()
-
         # Seed Quiz data
         quiz_data = [
             {
@@ -85,149 +81,134 @@ def seed_data():
             }
         ]
 
-        for quiz_item in quiz_data:
-            quiz = Quiz(
-                title=quiz_item["title"],
-                description=quiz_item["description"],
-                questions=quiz_item["questions"]
-            )
-            db.session.add(quiz)
+        # Upserted by natural key, so re-running the seed updates rows in place
+        import_catalog('quizzes', quiz_data)
 
         # Seed Meal data
         meal_data = [
             {
                 "name": "Grilled Chicken Salad",
                 "calories": 350,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 35,
                     "carbs": 15,
                     "fat": 12,
                     "fiber": 8
-                }),
+                },
                 "category": "high-protein",
                 "description": "Fresh mixed greens with grilled chicken breast, cherry tomatoes, cucumber, and light vinaigrette dressing."
             },
             {
                 "name": "Quinoa Buddha Bowl",
                 "calories": 420,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 18,
                     "carbs": 55,
                     "fat": 15,
                     "fiber": 12
-                }),
+                },
                 "category": "vegetarian",
                 "description": "Nutritious bowl with quinoa, roasted vegetables, chickpeas, avocado, and tahini dressing."
             },
             {
                 "name": "Salmon with Sweet Potato",
                 "calories": 480,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 32,
                     "carbs": 35,
                     "fat": 22,
                     "fiber": 6
-                }),
+                },
                 "category": "high-protein",
                 "description": "Omega-3 rich salmon fillet served with baked sweet potato and steamed broccoli."
             },
             {
                 "name": "Vegan Stir-Fry",
                 "calories": 320,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 15,
                     "carbs": 45,
                     "fat": 8,
                     "fiber": 10
-                }),
+                },
                 "category": "vegan",
                 "description": "Colorful vegetable stir-fry with tofu, brown rice, and ginger-soy sauce."
             },
             {
                 "name": "Greek Yogurt Parfait",
                 "calories": 280,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 20,
                     "carbs": 35,
                     "fat": 6,
                     "fiber": 4
-                }),
+                },
                 "category": "vegetarian",
                 "description": "Creamy Greek yogurt layered with fresh berries, granola, and honey."
             },
             {
                 "name": "Turkey Wrap",
                 "calories": 380,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 28,
                     "carbs": 40,
                     "fat": 12,
                     "fiber": 8
-                }),
+                },
                 "category": "high-protein",
                 "description": "Whole grain wrap with turkey, lettuce, tomato, avocado, and mustard."
             },
             {
                 "name": "Lentil Soup",
                 "calories": 250,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 18,
                     "carbs": 35,
                     "fat": 4,
                     "fiber": 15
-                }),
+                },
                 "category": "vegan",
                 "description": "Hearty lentil soup with vegetables, herbs, and whole grain bread."
             },
             {
                 "name": "Egg White Omelette",
                 "calories": 220,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 25,
                     "carbs": 8,
                     "fat": 8,
                     "fiber": 3
-                }),
+                },
                 "category": "low-carb",
                 "description": "Fluffy egg white omelette with spinach, mushrooms, and feta cheese."
             },
             {
                 "name": "Fruit Smoothie Bowl",
                 "calories": 320,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 12,
                     "carbs": 50,
                     "fat": 8,
                     "fiber": 8
-                }),
+                },
                 "category": "vegetarian",
                 "description": "Thick smoothie bowl with mixed berries, banana, yogurt, and granola topping."
             },
             {
                 "name": "Grilled Vegetable Skewers",
                 "calories": 180,
-                "nutrients": json.dumps({
+                "nutrients": {
                     "protein": 6,
                     "carbs": 25,
                     "fat": 8,
                     "fiber": 6
-                }),
+                },
                 "category": "vegan",
                 "description": "Colorful vegetable skewers with zucchini, bell peppers, mushrooms, and herbs."
             }
         ]
 
-        for meal_item in meal_data:
-            meal = Meal(
-                name=meal_item["name"],
-                calories=meal_item["calories"],
-                nutrients=meal_item["nutrients"],
-                category=meal_item["category"],
-                description=meal_item["description"]
-            )
-            db.session.add(meal)
-
-        db.session.commit()
+        import_catalog('meals', meal_data)
         print("Database seeded successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+from flask import Blueprint
+from assets import AssetManifest
+from extensions import lazy, limiter
+
+static_bp = Blueprint('frontend', __name__)
+
+def get_assets():
+    """Frontend files, fingerprinted and compressed into memory on the first static request"""
+    def create(app):
+        return AssetManifest(app.root_path, aliases={
+            '/': '/index.html',
+            '/style.css': '/css/style.css',
+            '/script.js': '/js/ui.js',
+        }).build()
+    return lazy('assets', create)
+
+def serve_asset(path):
+    response = get_assets().response(path)
+    if response is None:
+        return '', 404
+    return response
+
+@static_bp.route('/')
+@limiter.exempt
+def index():
+    return serve_asset('/')
+
+@static_bp.route('/style.css')
+@limiter.exempt
+def style():
+    return serve_asset('/style.css')
+
+@static_bp.route('/script.js')
+@limiter.exempt
+def script():
+    return serve_asset('/script.js')
+
+@static_bp.route('/assets/<path:filename>')
+@limiter.exempt
+def fingerprinted_asset(filename):
+    return serve_asset('/assets/' + filename)
+
+@static_bp.route('/css/<path:filename>')
+@limiter.exempt
+def serve_css(filename):
+    return serve_asset('/css/' + filename)
+
+@static_bp.route('/js/<path:filename>')
+@limiter.exempt
+def serve_js(filename):
+    return serve_asset('/js/' + filename)
+
+@static_bp.route('/favicon.ico')
+@limiter.exempt
+def favicon():
+    return serve_asset('/favicon.ico')
+
+@static_bp.route('/<page>.html')
+@limiter.exempt
+def page(page):
+    return serve_asset(f'/{page}.html')
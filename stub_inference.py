@@ -0,0 +1,94 @@
+"""Local stand-in for the inference backend used by ai.py.
+
+Speaks the subset of the Hugging Face Inference API the app relies on:
+  {"inputs": "..."}                  -> [{"generated_text": "..."}]
+  {"inputs": ["...", "..."]}         -> [[{"generated_text": "..."}], ...]
+  {"inputs": "...", "stream": true}  -> text/event-stream of token events
+
+Usage:
+    python stub_inference.py --port 8089 --delay 0.05
+    AI_API_URL=http://127.0.0.1:8089 python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_reply(prompt):
+    return f"Here is some nutrition advice about: {prompt}"
+
+
+class StubInferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.request_count += 1
+        inputs = payload.get('inputs', '')
+        time.sleep(self.server.delay)
+
+        if payload.get('stream') and isinstance(inputs, str):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for word in stub_reply(inputs).split(' '):
+                    time.sleep(self.server.token_delay)
+                    event = json.dumps({'token': {'text': word + ' ', 'special': False}})
+                    self._write_chunk(f'data:{event}\n\n'.encode('utf-8'))
+                self._write_chunk(b'')
+            except (BrokenPipeError, ConnectionResetError):
+                self.server.cancelled_streams += 1
+            return
+
+        if isinstance(inputs, list):
+            self.server.batch_sizes.append(len(inputs))
+            body = [[{'generated_text': stub_reply(prompt)}] for prompt in inputs]
+        else:
+            body = [{'generated_text': stub_reply(inputs)}]
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+def start_stub_server(port=0, delay=0.0, token_delay=0.0):
+    """Start the stub in a daemon thread; returns the server (its URL is ``server.url``)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubInferenceHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.token_delay = token_delay
+    server.request_count = 0
+    server.cancelled_streams = 0
+    server.batch_sizes = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stub inference server')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds before responding')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='seconds between streamed tokens')
+    args = parser.parse_args()
+    server = start_stub_server(args.port, args.delay, args.token_delay)
+    print(f"Stub inference server listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,115 @@
+"""Local SMTP sink for email_worker.py.
+
+Accepts every message without TLS or authentication and keeps it in memory
+(printing a one-line summary unless ``--quiet``). ``--fail-every N`` answers
+every Nth message with a temporary 451 error, to exercise retries.
+
+Usage:
+    python stub_smtp.py --port 8025
+    python email_worker.py --smtp 127.0.0.1:8025
+"""
+import argparse
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connection_count += 1
+        self.reply('220 stub-smtp ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if command == 'EHLO':
+                self.wfile.write(b'250-stub-smtp\r\n')
+                self.reply('250 8BITMIME')
+            elif command == 'HELO':
+                self.reply('250 stub-smtp')
+            elif command == 'MAIL':
+                sender, recipients = argument.partition(':')[2].strip(), []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(argument.partition(':')[2].strip().strip('<>'))
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                message = message_from_bytes(self.read_data(), policy=policy.default)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.received += 1
+                    fail = server.fail_every and server.received % server.fail_every == 0
+                    if not fail:
+                        server.messages.append((sender, recipients, message))
+                if fail:
+                    self.reply('451 Temporary failure, try again later')
+                else:
+                    if not server.quiet:
+                        print(f"[stub-smtp] {', '.join(recipients)}: {message['Subject']}")
+                    self.reply('250 OK: queued')
+                sender, recipients = None, []
+            elif command in ('RSET', 'NOOP'):
+                if command == 'RSET':
+                    sender, recipients = None, []
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                return b''.join(lines)
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b'.') else line)
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_stub_smtp(port=0, delay=0.0, fail_every=0, quiet=True):
+    """Start the sink in a daemon thread; returns the server (``server.messages``, ``server.port``)"""
+    server = StubSMTPServer(('127.0.0.1', port), StubSMTPHandler)
+    server.delay = delay
+    server.fail_every = fail_every
+    server.quiet = quiet
+    server.lock = threading.Lock()
+    server.messages = []
+    server.received = 0
+    server.connection_count = 0
+    server.port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local SMTP sink')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds before accepting each message')
+    parser.add_argument('--fail-every', type=int, default=0, help='answer every Nth message with 451')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+    server = start_stub_smtp(args.port, args.delay, args.fail_every, args.quiet)
+    print(f"Stub SMTP server listening on 127.0.0.1:{server.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
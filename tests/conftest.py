@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app
+    from extensions import db, limiter
+
+    app = create_app({
+        'TESTING': True,
+        'JWT_SECRET_KEY': 'test-jwt-secret-key-of-at-least-32-bytes',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATELIMIT_STORAGE_URI': 'memory://',
+        'BCRYPT_LOG_ROUNDS': 4,
+        'AUDIT_LOG_PATH': str(tmp_path / 'audit.log'),
+        'AI_CACHE_DISK_PATH': None,
+    }, instance_path=str(tmp_path / 'instance'))
+    limiter.enabled = False
+    with app.app_context():
+        db.create_all()
+    yield app
+    limiter.enabled = True
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register and log in a user; returns the Authorization header"""
+    client.post('/api/register', json={'username': 'tester', 'email': 'tester@example.com',
+                                       'password': 'Passw0rd!x'})
+    response = client.post('/api/login', json={'email': 'tester@example.com', 'password': 'Passw0rd!x'})
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
@@ -0,0 +1,25 @@
+import pytest
+
+from ai_cache import ResponseCache, normalize_prompt
+
+
+@pytest.mark.parametrize('first, second', [
+    ('how much protein', 'why protein'),
+    ('what is protein', 'when protein'),
+    ('which fruit', 'should fruit'),
+    ('can I eat eggs', 'should I eat eggs'),
+])
+def test_different_questions_get_different_keys(first, second):
+    assert normalize_prompt(first) != normalize_prompt(second)
+
+
+def test_rewordings_of_one_question_share_a_key():
+    assert normalize_prompt('How much water per day?') == normalize_prompt('how much WATER per day')
+    assert normalize_prompt('Tell me, how much water per day') == normalize_prompt('how much water per day please')
+
+
+def test_cache_does_not_answer_one_question_with_another():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.set('how much protein', 'About 0.8 g per kg of body weight.')
+    assert cache.get('why protein') is None
+    assert cache.get('How much protein?') == 'About 0.8 g per kg of body weight.'
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+import chatbot_routes
+from ai_dispatch import InferenceBusy, InferenceDispatcher
+
+
+class FakeBackend:
+    """batch_call that records each batch and holds it until ``release`` is set"""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def __call__(self, prompts):
+        self.batches.append(list(prompts))
+        assert self.release.wait(5)
+        return [f'reply to {prompt}' for prompt in prompts]
+
+
+def test_identical_concurrent_prompts_share_one_call():
+    backend = FakeBackend()
+    dispatcher = InferenceDispatcher(backend, max_wait=0.01)
+    futures = [dispatcher.submit(prompt) for prompt in ('How much protein?', 'how much protein', 'HOW MUCH PROTEIN')]
+    backend.release.set()
+    assert {future.result(5) for future in futures} == {'reply to How much protein?'}
+    assert backend.batches == [['How much protein?']]
+    assert dispatcher.stats()['coalesced'] == 2
+
+
+def test_burst_is_batched_up_to_the_batch_limit():
+    backend = FakeBackend()
+    backend.release.set()
+    dispatcher = InferenceDispatcher(backend, max_batch_size=4, max_wait=0.2)
+    futures = [dispatcher.submit(f'meal idea {i}') for i in range(10)]
+    assert [future.result(5) for future in futures] == [f'reply to meal idea {i}' for i in range(10)]
+    assert sorted(len(batch) for batch in backend.batches) == [2, 4, 4]
+
+
+def test_backlog_past_max_pending_is_rejected():
+    backend = FakeBackend()
+    dispatcher = InferenceDispatcher(backend, max_batch_size=2, max_wait=0.0, max_pending=3)
+    futures = [dispatcher.submit(f'question {i}') for i in range(3)]
+    with pytest.raises(InferenceBusy):
+        dispatcher.submit('one more question')
+    # A prompt already in flight still joins its call
+    assert dispatcher.submit('question 0') is futures[0]
+    backend.release.set()
+    for future in futures:
+        future.result(5)
+    assert dispatcher.submit('one more question').result(5) == 'reply to one more question'
+    assert dispatcher.stats()['rejected'] == 1
+
+
+def test_chatbot_sheds_load_when_the_dispatcher_is_full(client, auth_headers, monkeypatch):
+    def busy(prompt):
+        raise InferenceBusy('full')
+
+    monkeypatch.setattr(chatbot_routes, 'local_answer', lambda prompt: None)
+    monkeypatch.setattr(chatbot_routes, 'generate_response', busy)
+    response = client.post('/api/chatbot', json={'prompt': 'best snack for runners'}, headers=auth_headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+
+import pytest
+
+import analytics
+from extensions import db
+from models import Quiz, QuizScore, QuizStats, UserRollup
+from quiz_attempts import AttemptRecorder, make_attempt
+
+
+def log_meal(client, auth_headers, day, calories, protein, servings=1):
+    response = client.post('/api/meal-logs', headers=auth_headers, json={
+        'name': 'Oats', 'calories': calories, 'protein': protein, 'date': day, 'servings': servings})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def rollup_state():
+    rows = {(row.user_id, row.period, row.start): tuple(round(float(getattr(row, field)), 6)
+                                                        for field in analytics.ROLLUP_FIELDS)
+            for row in UserRollup.query}
+    return rows, analytics.community_totals()
+
+
+def test_rollups_follow_logs_and_deletes(client, auth_headers):
+    log_meal(client, auth_headers, '2026-10-12', 300, 10)  # Monday
+    deleted = log_meal(client, auth_headers, '2026-10-12', 500, 20)
+    log_meal(client, auth_headers, '2026-10-14', 200, 5, servings=2)
+    log_meal(client, auth_headers, '2026-10-19', 100, 1)  # the next Monday
+    assert client.delete(f'/api/meal-logs/{deleted}', headers=auth_headers).status_code == 200
+
+    days = client.get('/api/analytics?period=day&from=2026-10-12&to=2026-10-14', headers=auth_headers).get_json()
+    assert days['labels'] == ['2026-10-12', '2026-10-13', '2026-10-14']
+    assert days['series']['calories'] == [300.0, 0.0, 400.0]
+    assert days['series']['protein'] == [10.0, 0.0, 10.0]
+    assert days['series']['meals_logged'] == [1, 0, 1]
+
+    weeks = client.get('/api/analytics?period=week&from=2026-10-14&to=2026-10-20', headers=auth_headers).get_json()
+    assert weeks['labels'] == ['2026-10-12', '2026-10-19']
+    assert weeks['series']['calories'] == [700.0, 100.0]
+    assert weeks['series']['meals_logged'] == [2, 1]
+    assert weeks['community']['meals_logged'] == 3
+    assert weeks['community']['members'] == 1
+
+
+def test_rebuild_reproduces_incremental_rollups(app, client, auth_headers):
+    log_meal(client, auth_headers, '2026-10-12', 300, 10)
+    log_meal(client, auth_headers, '2026-10-13', 450, 30, servings=1.5)
+    removed = log_meal(client, auth_headers, '2026-10-13', 800, 40)
+    client.delete(f'/api/meal-logs/{removed}', headers=auth_headers)
+    with app.app_context():
+        quiz = Quiz(title='Fibre', questions='[]')
+        db.session.add(quiz)
+        db.session.commit()
+        quiz_id = quiz.id
+    batch = []
+    for day, results in ((12, [True, False]), (12, [True, True]), (18, [False, False])):
+        attempt = make_attempt(1, quiz_id, [0, 0], results)
+        attempt['created_at'] = datetime(2026, 10, day, 9, 30)
+        batch.append(attempt)
+    recorder = AttemptRecorder(app)
+    recorder.write(batch[:2])
+    recorder.write(batch[2:])
+    assert recorder.stats()['failed'] == 0
+
+    with app.app_context():
+        score = db.session.get(QuizScore, (1, quiz_id))
+        assert (score.attempts, score.best_percent, score.total_percent, score.last_percent) == (3, 100.0, 150.0, 0.0)
+        assert (score.streak, score.best_streak) == (0, 1)
+        stats = db.session.get(QuizStats, quiz_id)
+        assert (stats.attempts, stats.participants, stats.passed) == (3, 1, 1)
+
+        incremental = rollup_state()
+        analytics.rebuild(batch_size=2)
+        assert rollup_state() == incremental
+        week = db.session.get(UserRollup, (1, 'week', date(2026, 10, 12)))
+        assert (week.meals_logged, week.quiz_attempts) == (2, 3)
+        assert week.quiz_percent_total == pytest.approx(150.0)
@@ -0,0 +1,17 @@
+import gzip
+
+import pytest
+
+import assets
+
+
+@pytest.mark.parametrize('encoding', ['br', 'gzip'])
+def test_pages_are_served_precompressed(client, encoding):
+    if encoding == 'br' and assets.brotli is None:
+        pytest.skip('Brotli from requirements.txt is not installed')
+    plain = client.get('/', headers={'Accept-Encoding': 'identity'})
+    response = client.get('/', headers={'Accept-Encoding': f'{encoding}, identity'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == encoding
+    decompress = assets.brotli.decompress if encoding == 'br' else gzip.decompress
+    assert decompress(response.data) == plain.data
@@ -0,0 +1,51 @@
+import glob
+import json
+import multiprocessing
+
+import pytest
+
+from audit import AuditPipeline, fcntl
+
+WRITERS = 4
+EVENTS = 2000
+
+
+def write_events(path, writer):
+    pipeline = AuditPipeline(path, batch_size=16, flush_interval=0.01, max_bytes=20000, backup_count=1000)
+    for i in range(EVENTS):
+        pipeline.event('login_succeeded', writer=writer, sequence=i)
+    pipeline.shutdown(timeout=30)
+    assert pipeline.dropped == 0
+
+
+@pytest.mark.skipif(fcntl is None, reason='needs fcntl for the cross-process lock')
+def test_processes_sharing_a_log_rotate_without_losing_records(tmp_path):
+    path = str(tmp_path / 'audit.log')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=write_events, args=(path, writer)) for writer in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    files = glob.glob(path) + glob.glob(path + '.[0-9]*')
+    assert len(files) > 10  # rotated many times while all four were writing
+    records = []
+    for name in files:
+        with open(name) as f:
+            records += [json.loads(line) for line in f]
+    assert sorted((record['writer'], record['sequence']) for record in records) == \
+        [(writer, i) for writer in range(WRITERS) for i in range(EVENTS)]
+
+
+def test_rotation_keeps_backup_count_files(tmp_path):
+    path = str(tmp_path / 'audit.log')
+    pipeline = AuditPipeline(path, batch_size=1, flush_interval=0.01, max_bytes=200, backup_count=2)
+    for i in range(50):
+        pipeline._write([{'event': 'x', 'sequence': i}])
+    pipeline.shutdown()
+    assert sorted(name for name in glob.glob(path + '*') if not name.endswith('.lock')) == \
+        [path, path + '.1', path + '.2']
+    with open(path) as f:
+        assert json.loads(f.readlines()[-1])['sequence'] == 49
@@ -0,0 +1,16 @@
+from catalog_import import import_catalog
+from extensions import db
+from meal_routes import get_meal_version
+from models import Meal
+
+
+def test_import_bumps_meal_stamp_once(app, monkeypatch):
+    rows = [{'name': f'Meal {i}', 'calories': 100 + i, 'category': 'lunch'} for i in range(7)]
+    with app.app_context():
+        stamp = get_meal_version()
+        bumps = []
+        monkeypatch.setattr(stamp, 'bump', lambda: bumps.append(1))
+        imported, skipped, _ = import_catalog('meals', rows, batch_size=2, report=lambda message: None)
+        assert (imported, skipped) == (7, 0)
+        assert db.session.query(Meal).count() == 7
+        assert len(bumps) == 1
@@ -0,0 +1,65 @@
+import json
+import time
+
+import pytest
+
+import chatbot_routes
+from stub_inference import start_stub_server, stub_reply
+
+
+def test_stream_lookup_failure_is_a_json_error(client, auth_headers, monkeypatch):
+    def broken(prompt):
+        raise RuntimeError('knowledge base unavailable')
+
+    monkeypatch.setattr(chatbot_routes, 'local_answer', broken)
+    response = client.post('/api/chatbot/stream', json={'prompt': 'how much protein'}, headers=auth_headers)
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Internal server error'}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    import ai
+
+    server = start_stub_server(token_delay=0.02)
+    monkeypatch.setattr(ai, 'API_URL', server.url)
+    # Send every prompt upstream
+    monkeypatch.setattr(chatbot_routes, 'local_answer', lambda prompt: None)
+    yield server
+    server.shutdown()
+
+
+def frames(text):
+    """``(event, data)`` pairs from a Server-Sent Events body"""
+    parsed = []
+    for block in text.split('\n\n'):
+        if not block:
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        parsed.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return parsed
+
+
+def test_stream_relays_tokens_in_order_then_done(client, auth_headers, stub):
+    prompt = 'fibre in oats'
+    response = client.post('/api/chatbot/stream', json={'prompt': prompt}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = frames(response.get_data(as_text=True))
+    assert [event for event, _ in events[:-1]] == ['message'] * (len(events) - 1)
+    assert ''.join(data['token'] for _, data in events[:-1]).strip() == stub_reply(prompt)
+    assert events[-1] == ('done', {'done': True})
+
+
+def test_client_disconnect_closes_the_upstream_stream(client, auth_headers, stub):
+    stub.token_delay = 0.1
+    response = client.post('/api/chatbot/stream', json={'prompt': 'protein for breakfast ideas'},
+                           headers=auth_headers, buffered=False)
+    first = next(iter(response.response))
+    assert b'token' in first
+    response.close()  # what the server does when the client goes away
+
+    deadline = time.monotonic() + 5
+    while stub.cancelled_streams == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert stub.cancelled_streams == 1
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from knowledge import KnowledgeBase
+
+
+def documents(prefix, count):
+    return [(f'{prefix} topic{i} fiber protein', f'{prefix} answer {i}') for i in range(count)]
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_searches_during_rebuilds_see_one_consistent_index():
+    knowledge = KnowledgeBase()
+    knowledge.build(documents('small', 5))
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                knowledge.search('topic3 fiber protein')
+            except Exception as e:
+                errors.append(e)
+                return
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    for round_ in range(200):
+        knowledge.build(documents('large', 400) if round_ % 2 else documents('small', 5))
+    stop.set()
+    for thread in searchers:
+        thread.join()
+    assert errors == []
+
+
+def test_refresh_keeps_serving_the_old_index_until_the_new_one_is_built():
+    knowledge = KnowledgeBase(min_confidence=0.5)
+    knowledge.build([('vitamin c oranges', 'Oranges are rich in vitamin C.')], version=1)
+    release = threading.Event()
+
+    def slow_documents():
+        release.wait(5)
+        yield 'vitamin d sunlight', 'Sunlight helps the body make vitamin D.'
+
+    started = time.perf_counter()
+    knowledge.refresh(2, slow_documents)
+    knowledge.refresh(2, slow_documents)  # already rebuilding: no second thread
+    assert time.perf_counter() - started < 0.5
+    assert knowledge.answer('vitamin c oranges') == 'Oranges are rich in vitamin C.'
+    assert knowledge.version == 1
+
+    release.set()
+    wait_for(lambda: knowledge.version == 2)
+    assert knowledge.answer('vitamin d sunlight') == 'Sunlight helps the body make vitamin D.'
+    assert knowledge.rebuilds == 2
+
+
+def test_a_failed_rebuild_keeps_the_old_index_and_waits_before_retrying():
+    knowledge = KnowledgeBase(min_confidence=0.5)
+    knowledge.build([('iron spinach', 'Spinach contains iron.')], version=1)
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise RuntimeError('database unavailable')
+
+    knowledge.refresh(2, broken)
+    wait_for(lambda: not knowledge.stats()['rebuilding'])
+    knowledge.refresh(2, broken)
+    time.sleep(0.05)
+    assert len(calls) == 1
+    assert knowledge.version == 1
+    assert knowledge.answer('iron spinach') == 'Spinach contains iron.'
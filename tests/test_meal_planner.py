@@ -0,0 +1,39 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from meal_planner import MealPlanner
+from meal_ranking import MealRankingEngine
+
+PROFILE = SimpleNamespace(weight=70, age=30, dietary_goals='', allergies='')
+
+
+def meal_row(meal_id, calories):
+    return (meal_id, calories, 30.0, 60.0, 20.0, 5.0, 0, 'dinner', f'Meal {meal_id}', '')
+
+
+def test_max_repeats_holds_when_the_catalog_runs_short():
+    engine = MealRankingEngine()
+    engine.load([meal_row(meal_id, 500.0 + meal_id) for meal_id in range(1, 5)])
+
+    _, plan = MealPlanner(engine).plan(PROFILE, days=3, meals_per_day=3, max_repeats=2)
+    uses = Counter(meal_id for day in plan for meal_id, _ in day)
+    assert max(uses.values()) <= 2
+    assert all(len({meal_id for meal_id, _ in day}) == len(day) for day in plan)
+    # Four meals used at most twice fill 8 of the 9 slots
+    assert sum(len(day) for day in plan) == 8
+
+
+def test_meal_plan_reports_unfilled_slots(app, client, auth_headers):
+    from extensions import db
+    from models import Meal
+
+    with app.app_context():
+        db.session.add_all([Meal(name=f'Stew {i}', calories=600 + i, protein=30.0, carbs=60.0, fat=20.0,
+                                 fiber=5.0, category='dinner') for i in range(2)])
+        db.session.commit()
+    response = client.post('/api/meal-plan', headers=auth_headers,
+                           json={'days': 2, 'meals_per_day': 2, 'max_repeats': 1})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert sum(len(day['meals']) for day in body['days']) == 2
+    assert body['unfilled_slots'] == 2
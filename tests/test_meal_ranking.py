@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import meal_ranking
+from meal_ranking import MealRankingEngine
+
+
+def meal_row(meal_id, name, category='dinner', calories=500.0):
+    return (meal_id, calories, 30.0, 40.0, 15.0, 5.0, 0, category, name, '')
+
+
+def test_unknown_allergy_terms_are_excluded_and_their_masks_bounded():
+    engine = MealRankingEngine()
+    engine.load([meal_row(1, 'Strawberry salad'), meal_row(2, 'Chicken rice'), meal_row(3, 'Kiwi bowl')])
+
+    ranked = engine.rank(SimpleNamespace(allergies='strawberry, kiwi'), limit=10)
+    assert [meal_id for meal_id, _ in ranked] == [2]
+
+    for i in range(meal_ranking.TERM_MASK_CACHE_SIZE * 2):
+        engine.rank(SimpleNamespace(allergies=f'made-up-term-{i}'), limit=1)
+    assert len(engine._term_masks) == meal_ranking.TERM_MASK_CACHE_SIZE
+
+    # An evicted term is rebuilt, and a cached one stays current as meals change
+    engine.upsert(meal_row(4, 'Strawberry tart'))
+    ranked = engine.rank(SimpleNamespace(allergies='strawberry'), limit=10)
+    assert sorted(meal_id for meal_id, _ in ranked) == [2, 3]
+
+
+def test_row_commits_reach_other_workers_through_the_stamp(app, tmp_path):
+    from app import create_app
+    from extensions import db
+    from meal_routes import get_meal_engine, load_meal_rows
+    from models import Meal
+
+    # A second app on the same database and instance directory stands in for another worker;
+    # its engine has no session hooks, so only the shared stamp can tell it about the change
+    other = create_app(dict(app.config), instance_path=app.instance_path)
+    other.extensions['meal_engine'] = MealRankingEngine(load_meal_rows)
+    with app.app_context():
+        meal = Meal(name='Lentil soup', calories=320, category='lunch')
+        db.session.add(meal)
+        db.session.commit()
+        meal_id = meal.id
+    with other.app_context():
+        assert [i for i, _ in get_meal_engine().rank(category='lunch', limit=5)] == [meal_id]
+
+    with app.app_context():
+        db.session.get(Meal, meal_id).category = 'dinner'
+        db.session.commit()
+    with other.app_context():
+        other.extensions['meal_row_version']._next_check = 0  # skip the once-a-second recheck
+        engine = get_meal_engine()
+        assert engine.rank(category='lunch', limit=5) == []
+        assert [i for i, _ in engine.rank(category='dinner', limit=5)] == [meal_id]
@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/metrics', '/api/metrics/audit', '/api/metrics/email-outbox'])
+def test_metrics_hidden_from_public_clients(client, path):
+    assert client.get(path, environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 404
+    assert client.get(path, headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 404
+    assert client.get(path).status_code == 200
+
+
+def test_metrics_token_admits_any_client(app, client):
+    app.config['METRICS_TOKEN'] = 'scrape-token'
+    public = {'REMOTE_ADDR': '203.0.113.7'}
+    assert client.get('/api/metrics/audit', environ_base=public,
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 404
+    assert client.get('/api/metrics/audit', environ_base=public,
+                      headers={'Authorization': 'Bearer scrape-token'}).status_code == 200
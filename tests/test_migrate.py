@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def migrate(app, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'app', app, raising=False)
+    import migrate
+    return migrate
+
+
+def test_nutrient_backfill_skips_blobs_that_are_not_objects(app, migrate):
+    from extensions import db
+    from models import Meal
+
+    with app.app_context():
+        blobs = [json.dumps({'protein': 30, 'carbs': 'n/a'}), '[1, 2]', '"high protein"', 'null', '{broken']
+        for i, blob in enumerate(blobs):
+            db.session.add(Meal(name=f'Meal {i}', category='dinner', calories=400, nutrients=blob))
+        db.session.commit()
+
+        migrate.meal_nutrient_columns()
+
+        rows = db.session.query(Meal.name, Meal.protein, Meal.carbs).order_by(Meal.id).all()
+        assert rows[0] == ('Meal 0', 30.0, 0.0)
+        assert all(protein == 0.0 and carbs == 0.0 for _, protein, carbs in rows[1:])
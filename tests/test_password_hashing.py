@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from extensions import db, hasher
+from models import User
+from password_hashing import HasherBusy, PasswordHasher
+
+
+def test_login_rehashes_when_the_cost_factor_rises(app, client, auth_headers, monkeypatch):
+    with app.app_context():
+        assert User.query.filter_by(email='tester@example.com').one().password_hash.startswith('$2b$04$')
+    monkeypatch.setattr(hasher, 'rounds', 5)
+    response = client.post('/api/login', json={'email': 'tester@example.com', 'password': 'Passw0rd!x'})
+    assert response.status_code == 200
+    with app.app_context():
+        stored = User.query.filter_by(email='tester@example.com').one().password_hash
+    assert stored.startswith('$2b$05$')
+    assert hasher.verify('Passw0rd!x', stored)
+
+
+def test_saturated_hashing_sheds_logins_with_503(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(hasher, '_admitted', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(hasher, 'queue_timeout', 0.05)
+    hasher._admitted.acquire()  # every place in line is taken
+    try:
+        response = client.post('/api/login', json={'email': 'tester@example.com', 'password': 'Passw0rd!x'})
+    finally:
+        hasher._admitted.release()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_callers_queue_behind_running_calls_and_the_excess_is_shed():
+    limited = PasswordHasher(rounds=4, max_workers=1, max_pending=1, queue_timeout=0.05)
+    limited._running.acquire()  # a call is running
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limited.verify('x', limited_hash)))
+    limited_hash = PasswordHasher(rounds=4).hash('x')
+    waiter.start()
+    while limited._admitted._value:  # the waiter has taken the one pending place
+        pass
+    with pytest.raises(HasherBusy):
+        limited.hash('y')
+    limited._running.release()
+    waiter.join()
+    assert results == [True] and limited.rejected == 1
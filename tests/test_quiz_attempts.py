@@ -0,0 +1,36 @@
+import re
+
+from sqlalchemy.dialects import mysql
+
+from extensions import db
+from models import Quiz, QuizScore, User
+from quiz_attempts import AttemptRecorder, make_attempt, score_update
+
+
+def attempts(user_id, quiz_id, *passes):
+    return [make_attempt(user_id, quiz_id, [0], [ok]) for ok in passes]
+
+
+def test_streak_after_a_miss_does_not_inflate_best_streak(app):
+    with app.app_context():
+        user = User(username='streaker', email='streaker@example.com', password_hash='x')
+        quiz = Quiz(title='Fibre', questions='[]')
+        db.session.add_all([user, quiz])
+        db.session.commit()
+        user_id, quiz_id = user.id, quiz.id
+
+    recorder = AttemptRecorder(app, pass_percent=70.0)
+    expected = [((True,), 1, 1), ((False,), 0, 1), ((True, True), 2, 2), ((True,), 3, 3), ((False, True), 1, 3)]
+    for passes, streak, best_streak in expected:
+        recorder.write(attempts(user_id, quiz_id, *passes))
+        with app.app_context():
+            score = db.session.get(QuizScore, (user_id, quiz_id))
+            assert (score.streak, score.best_streak) == (streak, best_streak)
+    assert recorder.stats()['failed'] == 0
+
+
+def test_best_streak_is_set_before_streak():
+    # MySQL evaluates SET left to right; best_streak must read the old streak
+    sql = str(score_update().compile(dialect=mysql.dialect()))
+    assignments = re.findall(r'(?:SET |, )(\w+)=', sql)
+    assert assignments.index('best_streak') < assignments.index('streak')
@@ -0,0 +1,37 @@
+import analytics
+import recipe_worker
+from extensions import db
+from models import Recipe
+from recipe_analysis import split_ingredients
+from recipe_worker import RecipeWorker
+
+SUBMISSION = {
+    'title': 'Chicken rice bowl',
+    'description': 'Rice topped with grilled chicken and broccoli.',
+    'ingredients': ['200 g chicken breast', '1,5 cups rice', '100 g broccoli'],
+    'servings': 2,
+}
+
+
+def test_decimal_commas_stay_inside_their_ingredient():
+    assert split_ingredients('1,5 cups rice, 2 eggs,3 tomatoes; salt') == [
+        '1,5 cups rice', '2 eggs', '3 tomatoes', 'salt']
+
+
+def test_concurrently_published_near_duplicates_keep_the_oldest(app, client, auth_headers, monkeypatch):
+    for _ in range(2):
+        assert client.post('/api/recipes', headers=auth_headers, json=SUBMISSION).status_code == 202
+    # As if each recipe were analysed by a different worker before the other was published
+    monkeypatch.setattr(recipe_worker, 'find_duplicate', lambda recipe_id, fingerprint: None)
+    worker = RecipeWorker(app)
+    assert worker.run_once() == 2
+
+    with app.app_context():
+        first, second = Recipe.query.order_by(Recipe.id).all()
+        assert (first.status, second.status, second.duplicate_of) == ('published', 'duplicate', first.id)
+        assert analytics.community_totals()['recipes_shared'] == 1
+        # The other worker's second pass finds nothing left to demote
+        assert worker.demote_duplicates([(first.id, recipe_worker.from_bands(
+            [getattr(first, f'band{band}') for band in range(recipe_worker.BANDS)]))]) == 0
+        assert analytics.community_totals()['recipes_shared'] == 1
+    assert (worker.published, worker.duplicates) == (1, 1)
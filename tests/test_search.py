@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from search_index import JournalGap, SearchJournal, SearchService, SearchUnavailable, upsert_entry
+
+
+def document(doc_id, title):
+    return {'kind': 'meal', 'id': doc_id, 'title': title, 'body': '', 'category': 'lunch'}
+
+
+def test_compacted_journal_keeps_logical_offsets(tmp_path):
+    journal = SearchJournal(str(tmp_path / 'journal.jsonl'))
+    journal.append([upsert_entry(document(1, 'Oat porridge')), upsert_entry(document(2, 'Rice bowl'))])
+    _, middle = journal.read(0)
+    journal.append([upsert_entry(document(3, 'Lentil soup'))])
+    end = journal.size()
+
+    journal.compact(middle)
+    assert journal.bounds() == (middle, end)
+    assert os.path.getsize(journal.path) < end
+    entries, offset = journal.read(middle)
+    assert [entry['document']['id'] for entry in entries] == [3] and offset == end
+    with pytest.raises(JournalGap):
+        journal.read(0)
+    journal.append([upsert_entry(document(4, 'Bean chili'))])
+    entries, _ = journal.read(end)
+    assert [entry['document']['id'] for entry in entries] == [4]
+
+
+def test_service_loads_in_background_and_truncates_the_journal(tmp_path):
+    documents = [document(1, 'Chicken rice'), document(2, 'Tofu stir fry')]
+    service = SearchService(str(tmp_path), lambda: iter(documents), lambda: 1)
+    service.journal.append([upsert_entry(document(9, 'Stale chicken'))])
+
+    with pytest.raises(SearchUnavailable):
+        service.search('chicken')
+    assert service.ready(timeout=30)
+    assert [hit[1] for hit in service.search('chicken')['hits']] == [1]
+    # The build covered everything journaled before it
+    assert service.journal.bounds()[0] == service.journal.size()
+
+    service.journal.append([upsert_entry(document(3, 'Chicken soup'))])
+    assert sorted(hit[1] for hit in service.search('chicken')['hits']) == [1, 3]
+
+    # Another worker starting now loads the snapshot and replays only the tail
+    other = SearchService(str(tmp_path), lambda: iter(()), lambda: 1)
+    assert other.ready(timeout=30)
+    assert sorted(hit[1] for hit in other.search('chicken')['hits']) == [1, 3]
+    assert other.rebuilds == 0
+
+
+def test_search_route_answers_503_until_the_index_is_ready(app, client, auth_headers):
+    from search_routes import get_search_service
+
+    response = client.get('/api/search?q=oats', headers=auth_headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    with app.app_context():
+        assert get_search_service().ready(timeout=30)
+    assert client.get('/api/search?q=oats', headers=auth_headers).status_code == 200
@@ -0,0 +1,22 @@
+from flask_jwt_extended import decode_token
+
+from extensions import db
+from models import Meal
+
+
+def test_token_carries_allergen_codes_but_not_free_text(app, client, auth_headers):
+    with app.app_context():
+        db.session.add_all([Meal(name='Kiwi smoothie', calories=250, category='breakfast'),
+                            Meal(name='Oat porridge', calories=300, category='breakfast')])
+        db.session.commit()
+    response = client.put('/api/profile', headers=auth_headers, json={'allergies': 'peanut, kiwi'})
+    assert response.status_code == 200
+    token = response.get_json()['access_token']
+    with app.app_context():
+        claims = decode_token(token)
+    assert claims['allergens']
+    assert 'allergy_terms' not in claims and 'kiwi' not in str(claims)
+
+    # The free-text allergy is still applied, from the profile on the server
+    meals = client.get('/api/meals', headers={'Authorization': f'Bearer {token}'}).get_json()
+    assert [meal['name'] for meal in meals['meals']] == ['Oat porridge']
@@ -0,0 +1,132 @@
+"""Per-process cache of user profiles and the profile claims carried in access tokens.
+
+Login puts the stable, non-sensitive profile fields (dietary goals, allergen
+codes, a weight bucket) and the profile's version into the JWT, so clients
+can personalise without fetching the profile. Endpoints that need the full
+profile read it from a bounded LRU keyed by user id: an entry serves any
+token whose ``pv`` claim is not newer than it, so in steady state the user
+row is read once per process rather than once per request.
+
+update_profile bumps ``User.profile_version``, writes the new profile
+through to this process's cache and returns a fresh token. Other processes
+see the newer ``pv`` on that token and reload; requests still carrying an
+older token get at most ``ttl`` seconds of the previous profile.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from allergens import parse_allergies
+
+WEIGHT_BUCKET_KG = 5
+MAX_GOALS_CLAIM = 200  # characters; the token travels with every request
+
+
+class UserProfile:
+    """Read-only snapshot of the profile columns of a User row"""
+
+    __slots__ = ('id', 'username', 'email', 'age', 'weight', 'dietary_goals', 'allergies', 'version')
+
+    def __init__(self, id, username, email, age, weight, dietary_goals, allergies, version):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.age = age
+        self.weight = weight
+        self.dietary_goals = dietary_goals
+        self.allergies = allergies
+        self.version = version
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.age, user.weight, user.dietary_goals,
+                   user.allergies, user.profile_version or 0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'age': self.age,
+            'weight': self.weight,
+            'dietary_goals': self.dietary_goals,
+            'allergies': self.allergies,
+        }
+
+
+def token_claims(profile):
+    """Additional JWT claims for a profile: its version and the fields safe to hand to the client"""
+    # Only the allergen codes: free-text allergies are health data, and the
+    # token is readable by anyone who sees it. The server reads them from the cached profile.
+    mask, _ = parse_allergies(profile.allergies or '')
+    claims = {'pv': profile.version, 'allergens': mask}
+    if profile.dietary_goals:
+        claims['goals'] = profile.dietary_goals[:MAX_GOALS_CLAIM]
+    if profile.weight:
+        claims['weight_bucket'] = int(profile.weight // WEIGHT_BUCKET_KG * WEIGHT_BUCKET_KG)
+    return claims
+
+
+class ProfileCache:
+    """Bounded LRU of UserProfile snapshots by user id, with a TTL"""
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, user_id, version=0):
+        """The cached profile if it is at least ``version`` and hasn't expired, else None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, profile = entry
+                if expires_at > now and profile.version >= version:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return profile
+                del self._entries[user_id]
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def put(self, profile):
+        """Cache ``profile`` unless a newer version is already cached; returns the cached one"""
+        user_id = profile.id
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1].version > profile.version:
+                return entry[1]
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return profile
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
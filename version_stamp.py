@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class VersionStamp:
+    """Version number shared by every worker process through a small file.
+
+    Writers call ``bump()``; readers call ``current()``, which re-reads the
+    file at most once per ``check_interval`` seconds, so checking it on a hot
+    path costs no I/O in steady state.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._next_check = 0.0
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def current(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._value = self._read()
+            self._next_check = now + self.check_interval
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            # Nanosecond clock keeps concurrent bumps from different processes distinct
+            value = max(self._read() + 1, time.time_ns())
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(str(value))
+            os.replace(tmp_path, self.path)
+            self._value = value
+            self._next_check = time.monotonic() + self.check_interval
+            return value
+
+
+def track_changes(session, model, stamp, flushes=True):
+    """Bump ``stamp`` whenever a transaction that wrote ``model`` rows commits.
+
+    With ``flushes=False`` only bulk statements count, for callers that already
+    apply row-level changes themselves.
+    """
+    from sqlalchemy import event
+
+    def mark_dirty(session):
+        session.info.setdefault('dirty_stamps', set()).add(stamp)
+
+    if flushes:
+        @event.listens_for(session, 'after_flush')
+        def collect_changes(session, flush_context):
+            if any(isinstance(obj, model) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+                mark_dirty(session)
+
+    @event.listens_for(session, 'do_orm_execute')
+    def collect_bulk_changes(orm_execute_state):
+        # Bulk insert/update/delete statements (and Query.update()/delete()) skip the flush
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            mapper = orm_execute_state.bind_mapper
+            if mapper is not None:
+                touched = issubclass(mapper.class_, model)
+            else:
+                # Core statements on the model's table, e.g. catalog_import.py upserts
+                touched = getattr(orm_execute_state.statement, 'table', None) is model.__table__
+            if touched:
+                mark_dirty(orm_execute_state.session)
+
+    @event.listens_for(session, 'after_commit')
+    def bump_version(session):
+        dirty = session.info.get('dirty_stamps')
+        if dirty and stamp in dirty:
+            dirty.discard(stamp)
+            deferred = session.info.get('deferred_stamps')
+            if deferred is not None:
+                deferred.add(stamp)
+            else:
+                stamp.bump()
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_changes(session):
+        dirty = session.info.get('dirty_stamps')
+        if dirty:
+            dirty.discard(stamp)
+
+
+@contextmanager
+def deferred_bumps(session):
+    """Bump each tracked stamp once when the block exits, not after every commit inside it.
+
+    For long runs of commits such as catalog imports: every bump makes each
+    worker reload what the stamp guards, so one per run is enough.
+    """
+    if 'deferred_stamps' in session.info:
+        yield
+        return
+    deferred = session.info['deferred_stamps'] = set()
+    try:
+        yield
+    finally:
+        del session.info['deferred_stamps']
+        # Batches committed before a failure are in the database too
+        for stamp in deferred:
+            stamp.bump()